@@ -0,0 +1,99 @@
+import json
+import os
+import socket
+import time
+
+# Unix socket of the acquisition daemon (acquisition/daemon.py)
+SOCKET_PATH = os.getenv('ACQ_SOCKET', '/tmp/iot_health_acq.sock')
+
+# how long a connect keeps retrying while the daemon's listen backlog is full
+CONNECT_RETRY_S = 2.0
+
+# Job states; the last three are final
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINAL_STATES = ('done', 'failed', 'cancelled')
+
+
+class AcquisitionError(Exception):
+    """The daemon answered with an error (unknown job, bad parameters, ...)."""
+
+
+class AcquisitionClient:
+    """
+    Talks to the acquisition daemon: one JSON request line per connection, one JSON
+    answer line back. Raises OSError (ConnectionError, FileNotFoundError) when the daemon
+    is not running and AcquisitionError when it refused the request.
+    """
+
+    def __init__(self, path=SOCKET_PATH, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+
+    def _connect(self, timeout):
+        # a full listen backlog (many callers at once) answers EAGAIN: retry for a while
+        # rather than report the daemon as gone
+        give_up = time.monotonic() + CONNECT_RETRY_S
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(self.path)
+                return sock
+            except BlockingIOError:
+                sock.close()
+                if time.monotonic() >= give_up:
+                    raise
+                time.sleep(0.02)
+            except BaseException:
+                sock.close()
+                raise
+
+    def _call(self, op, timeout=None, **fields):
+        with self._connect(timeout if timeout is not None else self.timeout) as sock:
+            sock.sendall(json.dumps({"op": op, **fields}).encode() + b"\n")
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        if not line:
+            raise ConnectionError("acquisition daemon closed the connection")
+        answer = json.loads(line)
+        if not answer.get("ok"):
+            raise AcquisitionError(answer.get("error", "request failed"))
+        return answer
+
+    def ping(self):
+        """True if the daemon answers."""
+        try:
+            self._call("ping", timeout=1.0)
+            return True
+        except (OSError, ValueError, AcquisitionError):
+            return False
+
+    def submit(self, kind, **params):
+        """Queue a measurement; returns the new job (dict with 'id') right away."""
+        return self._call("submit", kind=kind, params=params)["job"]
+
+    def status(self, job_id):
+        return self._call("status", job_id=job_id)["job"]
+
+    def wait(self, job_id, version=None, timeout=10.0):
+        """
+        The job once it changed after `version` (its 'version' field) or reached a final
+        state, or as it is when `timeout` s passed. version=None waits for the end.
+        """
+        return self._call("wait", timeout=timeout + self.timeout,
+                          job_id=job_id, version=version, wait=timeout)["job"]
+
+    def cancel(self, job_id):
+        return self._call("cancel", job_id=job_id)["job"]
+
+    def events(self, after=None, timeout=10.0):
+        """
+        Live data of the running jobs: {'seq', 'events', 'lost', 'active'} with the events
+        after seq `after`, once there is at least one or `timeout` s passed. after=None
+        returns the current seq at once (see JobManager.events).
+        """
+        return self._call("events", timeout=timeout + self.timeout, after=after, wait=timeout)
+
+    def jobs(self):
+        """Recent jobs, newest first."""
+        return self._call("jobs")["jobs"]
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Acquisition daemon: keeps the sensor drivers, SQLite writers and filters loaded and runs
+measurement jobs sent over a Unix socket (see client.AcquisitionClient), so the web app
+no longer starts a new interpreter and re-initializes the sensor for every measurement.
+
+    python3 acquisition/daemon.py [--socket /tmp/iot_health_acq.sock] [--no-warm-up]
+"""
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from acquisition.client import SOCKET_PATH, FINAL_STATES
+from acquisition.jobs import JOB_KINDS, WarmSensors
+
+
+class Job:
+    """One measurement. Every change bumps `version` and wakes the manager's waiters."""
+
+    def __init__(self, manager, kind, devices, params):
+        self._manager = manager
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.devices = tuple(devices)
+        self.params = params
+        self.state = 'queued'
+        self.version = 0
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+
+    def cancelled(self):
+        """True once cancel was requested (runners poll this as should_stop)."""
+        return self._cancel.is_set()
+
+    def update(self, **progress):
+        with self._manager._cond:
+            self.progress.update(progress)
+            self._changed()
+
+    def publish(self, channel, **data):
+        """Live data for viewers (a reading, a block of filtered ECG); see JobManager.events."""
+        with self._manager._cond:
+            self._manager._event(self, channel, data)
+
+    def _changed(self, state_changed=False):
+        # caller holds the manager's condition
+        self.version += 1
+        if state_changed:
+            self._manager._event(self, 'state', {"state": self.state})
+        self._manager._cond.notify_all()
+
+    def summary(self):
+        return {"id": self.id, "kind": self.kind, "state": self.state, "progress": dict(self.progress)}
+
+    def to_dict(self):
+        return {"id": self.id, "kind": self.kind, "devices": list(self.devices), "params": self.params,
+                "state": self.state, "version": self.version, "submitted": self.submitted,
+                "started": self.started, "finished": self.finished, "progress": dict(self.progress),
+                "result": self.result, "error": self.error}
+
+
+class JobManager:
+    """
+    Runs jobs on their own threads, each once every device it needs is free: two ECG jobs
+    never share the SPI bus, while a temperature and an ECG job run side by side, and a
+    session (all sensors) waits for the bus to be free. Jobs start in submission order
+    among those that need a common device, so a session is not starved by single-sensor
+    jobs. Finished jobs are kept (the newest `keep`) for status queries.
+
+    Live data the runners publish (and job state changes) goes to one sequence of
+    events, the newest `keep_events` kept, which viewers read with events(after=seq).
+    """
+
+    def __init__(self, sensors=None, kinds=JOB_KINDS, keep=100, keep_events=5000):
+        self.sensors = sensors or WarmSensors()
+        self.kinds = kinds
+        self.keep = keep
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict()
+        self._queue = deque()
+        self._busy = set()      # devices held by running jobs
+        self._running = {}      # job id -> thread
+        self._closed = False
+        self._events = deque(maxlen=keep_events)
+        self._event_seq = 0
+
+    def submit(self, kind, params=None):
+        """Validate and queue a job; returns it at once. ValueError for a bad kind/params."""
+        spec = self.kinds.get(kind)
+        if spec is None:
+            raise ValueError(f"unknown job kind {kind!r}; one of {', '.join(self.kinds)}")
+        job = Job(self, kind, spec.devices, spec.params(params or {}))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("acquisition daemon is shutting down")
+            self._jobs[job.id] = job
+            self._trim()
+            self._queue.append(job)
+            self._dispatch()
+        return job
+
+    def _dispatch(self):
+        # caller holds the condition; start every queued job whose devices are free and
+        # not wanted by an earlier queued job
+        if self._closed:
+            return
+        wanted = set()
+        for job in list(self._queue):
+            devices = set(job.devices)
+            if not devices & (self._busy | wanted):
+                self._queue.remove(job)
+                self._busy |= devices
+                job.state = 'running'
+                job.started = time.time()
+                job._changed(state_changed=True)
+                thread = threading.Thread(target=self._run, args=(job,), name=f'acq-{job.kind}', daemon=True)
+                self._running[job.id] = thread
+                thread.start()
+            wanted |= devices
+
+    def _trim(self):
+        finished = [j.id for j in self._jobs.values() if j.state in FINAL_STATES]
+        for job_id in finished[:max(0, len(self._jobs) - self.keep)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def jobs(self):
+        with self._cond:
+            return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def wait(self, job_id, version=None, timeout=10.0):
+        """The job once its version passed `version` (None: once it finished), or at timeout."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if version is None:
+                changed = lambda: job.state in FINAL_STATES
+            else:
+                changed = lambda: job.version > version or job.state in FINAL_STATES
+            self._cond.wait_for(changed, timeout)
+            return job.to_dict()
+
+    def _event(self, job, channel, data):
+        # caller holds the condition
+        self._event_seq += 1
+        self._events.append({"seq": self._event_seq, "job": job.id, "kind": job.kind,
+                             "channel": channel, "t": time.time(), **data})
+        self._cond.notify_all()
+
+    def events(self, after=None, timeout=10.0):
+        """
+        Live events with seq > `after`, waiting up to `timeout` for the first one, plus the
+        queued/running jobs. after=None answers at once with no events (a viewer joining
+        now starts from the current seq). `lost` counts events already dropped from the buffer.
+        """
+        with self._cond:
+            if after is not None and after > self._event_seq:
+                after = 0  # seq from before a daemon restart
+            if after is not None:
+                self._cond.wait_for(lambda: self._event_seq > after or self._closed, timeout)
+            events = [e for e in self._events if after is not None and e["seq"] > after]
+            first = events[0]["seq"] if events else self._event_seq + 1
+            return {"seq": self._event_seq, "events": events,
+                    "lost": max(0, first - (after if after is not None else self._event_seq) - 1),
+                    "active": [j.summary() for j in self._jobs.values() if j.state not in FINAL_STATES]}
+
+    def cancel(self, job_id):
+        """A queued job is dropped, a running one asked to stop early."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job._cancel.set()
+            if job.state == 'queued':
+                self._queue.remove(job)
+                job.state = 'cancelled'
+                job.finished = time.time()
+                job._changed(state_changed=True)
+                self._dispatch()
+            return job.to_dict()
+
+    def _run(self, job):
+        try:
+            result = self.kinds[job.kind].run(job, self.sensors)
+            state, error = ('cancelled' if job.cancelled() else 'done'), None
+        except Exception as e:
+            traceback.print_exc()
+            result, state, error = None, 'failed', f"{type(e).__name__}: {e}"
+        with self._cond:
+            job.result, job.state, job.error = result, state, error
+            job.finished = time.time()
+            job._changed(state_changed=True)
+            self._busy -= set(job.devices)
+            del self._running[job.id]
+            self._dispatch()
+
+    def close(self, timeout=None):
+        """Cancel what is queued or running, wait for the running jobs, close the sensors."""
+        with self._cond:
+            self._closed = True
+            jobs = [j.id for j in self._jobs.values() if j.state not in FINAL_STATES]
+        for job_id in jobs:
+            self.cancel(job_id)
+        with self._cond:
+            threads = list(self._running.values())
+        for thread in threads:
+            thread.join(timeout)
+        self.sensors.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            answer = self.server.dispatch(json.loads(line))
+        except (ValueError, KeyError, TypeError, RuntimeError) as e:
+            answer = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(answer).encode() + b"\n")
+
+
+class AcquisitionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # the live follower, the OLED end-of-job waiters, /api/jobs?wait= and submits all
+    # connect at once; socketserver's default backlog of 5 turns them away with EAGAIN
+    request_queue_size = 64
+
+    def __init__(self, path, manager):
+        if os.path.exists(path):
+            os.unlink(path)  # left over from a previous run
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+        self.manager = manager
+
+    def dispatch(self, request):
+        op = request.get("op")
+        manager = self.manager
+        if op == "ping":
+            return {"ok": True}
+        if op == "submit":
+            return {"ok": True, "job": manager.submit(request["kind"], request.get("params")).to_dict()}
+        if op == "jobs":
+            return {"ok": True, "jobs": manager.jobs()}
+        if op == "events":
+            wait = min(float(request.get("wait", 10.0)), 60.0)
+            return {"ok": True, **manager.events(request.get("after"), wait)}
+        if op == "status":
+            job = manager.get(request["job_id"])
+        elif op == "wait":
+            wait = min(float(request.get("wait", 10.0)), 60.0)
+            job = manager.wait(request["job_id"], request.get("version"), wait)
+        elif op == "cancel":
+            job = manager.cancel(request["job_id"])
+        else:
+            return {"ok": False, "error": f"unknown op {op!r}"}
+        if job is None:
+            return {"ok": False, "error": f"no job {request['job_id']!r}"}
+        return {"ok": True, "job": job}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--socket", default=SOCKET_PATH, help=f"Unix socket path, default {SOCKET_PATH} (ACQ_SOCKET)")
+    ap.add_argument("--no-warm-up", action="store_true", help="import the sensor scripts on the first job instead")
+    args = ap.parse_args()
+
+    manager = JobManager()
+    if not args.no_warm_up:
+        for kind, error in manager.sensors.warm_up().items():
+            print(f"warm-up of {kind} failed ({error}); it is retried with the first job", flush=True)
+
+    server = AcquisitionServer(args.socket, manager)
+    # SIGTERM (systemctl stop) ends serve_forever like Ctrl+C does
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"acquisition daemon listening on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        manager.close(timeout=5.0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# Transaction priorities on I2C bus 1 (lower goes first when several drivers wait):
+# the MAX30102 FIFO holds 32 samples (1.28 s at 25 samples/s) and loses data when it
+# fills; a late MCP9808 read only delays one reading; the OLED can drop frames.
+PRIORITY_MAX30102 = 0
+PRIORITY_MCP9808 = 1
+PRIORITY_OLED = 2
+
+# smbus / smbus2 calls that are one bus transaction each
+BUS_METHODS = ('read_byte', 'write_byte', 'read_byte_data', 'write_byte_data',
+               'read_word_data', 'write_word_data', 'read_i2c_block_data',
+               'write_i2c_block_data', 'i2c_rdwr')
+
+
+class BusArbiter:
+    """
+    One I2C bus shared by several drivers in this process. Every call through a client()
+    is one transaction; while one runs the others queue, and a free bus goes to the
+    queued transaction with the lowest priority number (first come first served within
+    a priority). Drivers that split long writes into block-sized transactions (the OLED
+    frame in 32-byte blocks) therefore never keep an urgent read waiting for more than
+    one block.
+    """
+
+    def __init__(self, bus, clock=time.monotonic):
+        self.bus = bus
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._busy = False
+        self._stats = {}
+        self.busy_s = 0.0
+        self._started = clock()
+
+    def client(self, name, priority):
+        """smbus-style handle for one driver; close() on it leaves the bus open."""
+        return ArbitratedBus(self, name, priority)
+
+    @contextmanager
+    def transaction(self, name, priority):
+        """Hold the bus for one transaction; yields the underlying bus."""
+        ticket = (priority, next(self._seq))
+        requested = self.clock()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._cond.wait_for(lambda: not self._busy and self._waiting[0] == ticket)
+            heapq.heappop(self._waiting)
+            self._busy = True
+        granted = self.clock()
+        try:
+            yield self.bus
+        finally:
+            done = self.clock()
+            with self._cond:
+                self._busy = False
+                stats = self._stats.setdefault(name, {"priority": priority, "transactions": 0,
+                                                      "wait_s": 0.0, "wait_max_s": 0.0, "busy_s": 0.0})
+                stats["transactions"] += 1
+                stats["wait_s"] += granted - requested
+                stats["wait_max_s"] = max(stats["wait_max_s"], granted - requested)
+                stats["busy_s"] += done - granted
+                self.busy_s += done - granted
+                self._cond.notify_all()
+
+    def stats(self):
+        """Per client: transactions, mean/max wait for the bus (ms) and bus time used (s)."""
+        with self._cond:
+            elapsed = max(self.clock() - self._started, 1e-9)
+            clients = {}
+            for name, s in self._stats.items():
+                clients[name] = {"priority": s["priority"], "transactions": s["transactions"],
+                                 "wait_avg_ms": 1000.0 * s["wait_s"] / max(1, s["transactions"]),
+                                 "wait_max_ms": 1000.0 * s["wait_max_s"], "busy_s": round(s["busy_s"], 3)}
+            return {"utilization": min(1.0, self.busy_s / elapsed), "clients": clients}
+
+    def close(self):
+        self.bus.close()
+
+
+class ArbitratedBus:
+    """smbus-style handle whose calls each run as one arbitrated transaction."""
+
+    def __init__(self, arbiter, name, priority):
+        self.arbiter = arbiter
+        self.name = name
+        self.priority = priority
+
+    def __getattr__(self, method):
+        if method not in BUS_METHODS:
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            with self.arbiter.transaction(self.name, self.priority) as bus:
+                return getattr(bus, method)(*args, **kwargs)
+        return call
+
+    def close(self):
+        # the arbiter owns the bus
+        pass
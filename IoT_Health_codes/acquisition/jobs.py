@@ -0,0 +1,301 @@
+import importlib
+import os
+import sys
+import threading
+import traceback
+from collections import namedtuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# the sensor scripts import their helpers as top-level modules
+for _path in (ROOT,
+              os.path.join(ROOT, 'temp_project'),
+              os.path.join(ROOT, 'ecg_project'),
+              os.path.join(ROOT, 'pox_project'),
+              os.path.join(ROOT, 'pox_project', 'max30102')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from acquisition.i2c_bus import BusArbiter, PRIORITY_MAX30102, PRIORITY_MCP9808, PRIORITY_OLED
+
+I2C_BUS = 1
+# BCM GPIO wired to the MAX30102 INT pin; set to wait for its A_FULL interrupt
+MAX30102_INT_PIN = int(os.environ['MAX30102_INT_PIN']) if os.getenv('MAX30102_INT_PIN') else None
+
+# kind -> devices it needs (a device runs one job at a time), parameter check, runner
+JobKind = namedtuple('JobKind', 'devices params run')
+
+
+def _int_param(params, name, default, lo, hi):
+    value = params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if not lo <= value <= hi:
+        raise ValueError(f"{name} must be between {lo} and {hi}")
+    return value
+
+
+class WarmSensors:
+    """
+    The sensor scripts, imported once and kept: their SPI/I2C handles, SQLite writers,
+    filter designs and the MAX30102 monitor survive between jobs, so a job only pays
+    for the measurement itself. Imports happen on first use (or in warm_up()).
+
+    All I2C drivers of the daemon (MCP9808, MAX30102, session OLED) share one BusArbiter
+    on bus 1: the temperature script's `bus` is replaced by an arbitrated handle after
+    import. i2c_bus: the bus to arbitrate (default smbus2.SMBus(I2C_BUS); a simulated
+    one in the benchmarks).
+    """
+
+    def __init__(self, i2c_bus=None):
+        self._lock = threading.RLock()
+        self._modules = {}
+        self._hrm = None
+        self._i2c_bus = i2c_bus
+        self._arbiter = None
+        self._display = None
+        self._display_error = None
+
+    def module(self, name):
+        with self._lock:
+            if name not in self._modules:
+                module = importlib.import_module(name)
+                if name == SCRIPTS['temperature']:
+                    module.bus.close()
+                    module.bus = self.i2c('mcp9808', PRIORITY_MCP9808)
+                self._modules[name] = module
+            return self._modules[name]
+
+    def i2c(self, name, priority):
+        """Handle on the shared I2C bus for one driver (see acquisition.i2c_bus)."""
+        with self._lock:
+            if self._arbiter is None:
+                if self._i2c_bus is None:
+                    import smbus2
+                    self._i2c_bus = smbus2.SMBus(I2C_BUS)
+                self._arbiter = BusArbiter(self._i2c_bus)
+            return self._arbiter.client(name, priority)
+
+    def i2c_stats(self):
+        with self._lock:
+            return self._arbiter.stats() if self._arbiter is not None else None
+
+    def heart_rate_monitor(self):
+        spo2 = self.module(SCRIPTS['spo2'])
+        with self._lock:
+            if self._hrm is None:
+                self._hrm = spo2.HeartRateMonitor(print_raw=False, print_result=False,
+                                                  int_pin=MAX30102_INT_PIN,
+                                                  bus=self.i2c('max30102', PRIORITY_MAX30102))
+            return self._hrm
+
+    def display(self):
+        """The session OLED (VitalsDisplay) on the shared bus, or None if it can't be driven here."""
+        with self._lock:
+            if self._display is None and self._display_error is None:
+                try:
+                    from acquisition.vitals_display import VitalsDisplay
+                    self._display = VitalsDisplay(self.i2c('oled', PRIORITY_OLED))
+                except Exception as e:
+                    self._display_error = f"{type(e).__name__}: {e}"
+                    print(f"session display disabled ({self._display_error})", flush=True)
+            return self._display
+
+    def warm_up(self):
+        """Import the sensor scripts now; returns {kind: error} for those that failed."""
+        errors = {}
+        for kind in SCRIPTS:
+            try:
+                self.module(SCRIPTS[kind])
+            except Exception as e:
+                errors[kind] = f"{type(e).__name__}: {e}"
+        return errors
+
+    def close(self):
+        """Flush and close the writers and buses of the imported scripts."""
+        with self._lock:
+            modules = dict(self._modules)
+        for module in modules.values():
+            writer = getattr(module, 'writer', None)
+            if writer is not None:
+                writer.close()
+            for name in ('bus', 'spi'):
+                handle = getattr(module, name, None)
+                if handle is not None:
+                    handle.close()
+        if self._arbiter is not None:
+            self._arbiter.close()
+
+
+# --- runners: run(job, sensors) -> result dict; job.update() reports progress,
+# job.publish() streams the readings to live viewers ---
+
+def _publish_ecg(job, rate, samples, filtered):
+    """
+    One 'ecg' event per run of consecutive samples: t0 is the sampling time of its
+    first sample, gaps the deadlines missed (or samples dropped) right before it.
+    """
+    start = 0
+    for i in range(1, len(samples) + 1):
+        if i == len(samples) or samples[i].missed:
+            job.publish('ecg', rate=rate, t0=samples[start].epoch, gaps=samples[start].missed,
+                        values=[round(float(v), 2) for v in filtered[start:i]])
+            start = i
+
+
+def _publish_spo2(job, hrm, value):
+    latest = hrm.latest()
+    bpm = round(float(latest.bpm)) if latest is not None and latest.valid_bpm and latest.finger else None
+    job.publish('spo2', spo2=value or None, bpm=bpm)
+
+
+def _temperature_params(params):
+    return {"count": _int_param(params, "count", 20, 1, 600)}
+
+
+def run_temperature(job, sensors):
+    temp = sensors.module(SCRIPTS['temperature'])
+    count = job.params["count"]
+    readings = []
+
+    def on_reading(i, value):
+        readings.append(value)
+        job.update(done=i, total=count, last=value)
+        job.publish('temperature', value=value)
+
+    saved = temp.measure(count=count, interval=1.0, on_reading=on_reading, should_stop=job.cancelled)
+    return {"readings": len(readings), "saved": saved,
+            "last": next((v for v in reversed(readings) if v is not None), None)}
+
+
+def _ecg_params(params):
+    ecg_sampler = importlib.import_module('ecg_sampler')
+    rate = _int_param(params, "rate", 100, 0, 10000)
+    if rate not in ecg_sampler.SAMPLE_RATES:
+        raise ValueError(f"rate must be one of {ecg_sampler.SAMPLE_RATES}")
+    return {"rate": rate, "samples": _int_param(params, "samples", 70, 1, 600 * rate)}
+
+
+def run_ecg(job, sensors):
+    ecg = sensors.module(SCRIPTS['ecg'])
+    total = job.params["samples"]
+    done = [0]
+
+    def on_filtered(samples, filtered):
+        done[0] += len(samples)
+        job.update(done=done[0], total=total, last=round(float(filtered[-1]), 2))
+        _publish_ecg(job, job.params["rate"], samples, filtered)
+
+    pipeline = ecg.measure(total, job.params["rate"], on_filtered=on_filtered, should_stop=job.cancelled)
+    return _ecg_summary(pipeline)
+
+
+def _ecg_summary(pipeline):
+    metrics = pipeline.metrics()
+    return {"samples": pipeline.sampler.samples, "missed": pipeline.sampler.missed,
+            "sampler": metrics["sampler"], "latency": metrics["latency"]}
+
+
+def _spo2_params(params):
+    return {"duration": _int_param(params, "duration", 20, 1, 600)}
+
+
+def run_spo2(job, sensors):
+    spo2 = sensors.module(SCRIPTS['spo2'])
+    hrm = sensors.heart_rate_monitor()
+    duration = job.params["duration"]
+    ticks = [0]
+
+    def on_reading(value, saved):
+        ticks[0] += 1
+        job.update(done=ticks[0], total=duration, last=value, saved=saved)
+        _publish_spo2(job, hrm, value)
+
+    saved = spo2.measure(duration, hrm=hrm, on_reading=on_reading, should_stop=job.cancelled)
+    return {"saved": saved, "acquisition": hrm.acquisition_stats()}
+
+
+def _session_params(params):
+    return {"duration": _int_param(params, "duration", 30, 1, 600), "rate": _ecg_params(params)["rate"]}
+
+
+def run_session(job, sensors):
+    """
+    Temperature, SpO2 and ECG at once for `duration` s, each on its own thread with its
+    own script's measure(); the I2C sensors and the OLED (live values twice a second)
+    share the bus through the arbiter, ECG runs on SPI alongside.
+    """
+    duration, rate = job.params["duration"], job.params["rate"]
+    temp = sensors.module(SCRIPTS['temperature'])
+    spo2 = sensors.module(SCRIPTS['spo2'])
+    ecg = sensors.module(SCRIPTS['ecg'])
+    hrm = sensors.heart_rate_monitor()
+    display = sensors.display()
+    vitals = {"temperature": None, "spo2": None, "ecg": 0}
+    results, errors = {}, {}
+
+    def on_temperature(i, value):
+        vitals["temperature"] = value
+        job.update(temperature=value, temperature_readings=i)
+        job.publish('temperature', value=value)
+
+    def on_spo2(value, saved):
+        vitals["spo2"] = value
+        job.update(spo2=value, spo2_saved=saved)
+        _publish_spo2(job, hrm, value)
+
+    def on_ecg(samples, filtered):
+        vitals["ecg"] += len(samples)
+        job.update(ecg_samples=vitals["ecg"], ecg=round(float(filtered[-1]), 2))
+        _publish_ecg(job, rate, samples, filtered)
+
+    parts = {
+        "temperature": lambda: {"saved": temp.measure(count=duration, interval=1.0, on_reading=on_temperature,
+                                                      should_stop=job.cancelled)},
+        "spo2": lambda: {"saved": spo2.measure(duration, hrm=hrm, on_reading=on_spo2, should_stop=job.cancelled),
+                         "acquisition": hrm.acquisition_stats()},
+        "ecg": lambda: _ecg_summary(ecg.measure(duration * rate, rate, on_filtered=on_ecg,
+                                                should_stop=job.cancelled)),
+    }
+
+    def run_part(name):
+        try:
+            results[name] = parts[name]()
+        except Exception as e:
+            traceback.print_exc()
+            errors[name] = f"{type(e).__name__}: {e}"
+
+    threads = [threading.Thread(target=run_part, args=(name,), name=f'session-{name}') for name in parts]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        if display is not None:
+            temp_text = "--" if vitals["temperature"] is None else f"{vitals['temperature']:.1f}"
+            try:
+                display.show("Vitals", [f"Temp {temp_text} C  SpO2 {vitals['spo2'] or '--'}",
+                                        f"ECG {vitals['ecg']} samples"])
+            except Exception as e:
+                print(f"session display stopped ({type(e).__name__}: {e})", flush=True)
+                display = None
+        threads[0].join(0.5)
+    for t in threads:
+        t.join()
+    if errors:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in errors.items()))
+    return {**results, "i2c": sensors.i2c_stats()}
+
+
+# script module behind each kind
+SCRIPTS = {
+    'temperature': 'mcp9808_read_db',
+    'ecg': 'spicheck_print_values_db',
+    'spo2': 'max30102_only_spo2_db_02',
+}
+
+JOB_KINDS = {
+    'temperature': JobKind(('mcp9808',), _temperature_params, run_temperature),
+    'ecg': JobKind(('ecg-spi',), _ecg_params, run_ecg),
+    'spo2': JobKind(('max30102',), _spo2_params, run_spo2),
+    'session': JobKind(('mcp9808', 'max30102', 'ecg-spi', 'oled'), _session_params, run_session),
+}
@@ -0,0 +1,31 @@
+from luma.core.interface.serial import i2c
+from luma.core.render import canvas
+from luma.oled.device import ssd1306
+from PIL import ImageFont
+
+OLED_ADDR = 0x3C
+
+
+class VitalsDisplay:
+    """
+    The SSD1306 during a measurement session, driven through a caller-supplied bus
+    handle (an arbitrated one): luma then sends each frame in 32-byte blocks instead of
+    one 1 KB transfer, so sensor reads get the bus between blocks.
+    Same layout as dz_app/oled_ui.py: a title line and two body lines.
+    """
+
+    def __init__(self, bus, address=OLED_ADDR):
+        self.device = ssd1306(i2c(bus=bus, address=address), width=128, height=64)
+        try:
+            self.font_title = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 14)
+            self.font_body = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
+        except OSError:
+            self.font_title = self.font_body = ImageFont.load_default()
+
+    def show(self, title, lines):
+        with canvas(self.device) as draw:
+            draw.text((0, 0), title, font=self.font_title, fill=255)
+            y = 18
+            for line in list(lines)[:3]:
+                draw.text((0, y), line, font=self.font_body, fill=255)
+                y += 14
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark + check: a SpO2 measurement as a fresh `python3 script` per click vs as a job in
+the acquisition daemon (acquisition/daemon.py), on the simulated MAX30102 of max30102_sim.py.
+
+1. Cold: each run is a new interpreter that imports NumPy, builds MAX30102() (reset + 1 s
+   wait) and waits for the first HR/SpO2 result, like the old subprocess.run per route.
+2. Warm: the same measurement as jobs sent over the daemon's Unix socket; the
+   HeartRateMonitor and its sensor are kept between jobs. Reported: time until the job id
+   came back (what the Flask worker now waits for) and until the job was done.
+3. Device locks: two jobs on the same device must run one after the other, a job on
+   another device alongside them, and a cancelled queued job must never start.
+
+The simulated sensor runs at --sps samples/s so a window fills in 100 / sps s.
+
+    python3 benchmarks/bench_acq_daemon.py --runs 3 --sps 200
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'pox_project', 'max30102'))
+sys.path.insert(0, HERE)
+
+from acquisition.client import AcquisitionClient
+from acquisition.daemon import AcquisitionServer, JobManager
+from acquisition.jobs import JobKind
+
+COLD_RUN = """
+import sys, time
+sys.path[:0] = [{max30102!r}, {here!r}]
+import max30102_sim
+max30102_sim.install(max30102_sim.SimMAX30102(sps={sps}, realtime=True))
+from heartrate_monitor import HeartRateMonitor
+hrm = HeartRateMonitor()
+hrm.start_sensor()
+result = hrm.wait(timeout=30)
+hrm.stop_sensor()
+sys.exit(0 if result is not None else 1)
+"""
+
+
+def run_cold(sps):
+    code = COLD_RUN.format(max30102=os.path.join(ROOT, 'pox_project', 'max30102'), here=HERE, sps=sps)
+    t = time.monotonic()
+    ok = subprocess.run([sys.executable, '-c', code]).returncode == 0
+    return time.monotonic() - t, ok
+
+
+def spo2_kind(sps):
+    import max30102_sim
+    max30102_sim.install(max30102_sim.SimMAX30102(sps=sps, realtime=True))
+    from heartrate_monitor import HeartRateMonitor
+    monitors = []
+
+    def run(job, sensors):
+        if not monitors:
+            monitors.append(HeartRateMonitor())
+        hrm = monitors[0]
+        hrm.start_sensor()
+        try:
+            result = hrm.wait(timeout=30)
+        finally:
+            hrm.stop_sensor()
+        if result is None:
+            raise RuntimeError("no result")
+        return {"spo2": result.spo2, "bpm": result.bpm}
+
+    return JobKind(('max30102',), lambda params: {}, run)
+
+
+def sleeper_kind(device, spans, seconds=0.3):
+    def run(job, sensors):
+        start = time.monotonic()
+        time.sleep(seconds)
+        spans[job.id] = (start, time.monotonic())
+        return {}
+    return JobKind((device,), lambda params: {}, run)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=3, help="measurements per path, default 3")
+    ap.add_argument("--sps", type=int, default=200, help="simulated sensor rate, default 200 samples/s")
+    args = ap.parse_args()
+
+    cold = [run_cold(args.sps) for _ in range(args.runs)]
+    ok = all(good for _, good in cold)
+    print("cold (new interpreter per run): " + ", ".join(f"{t:.2f}" for t, _ in cold) + " s")
+
+    spans = {}
+    kinds = {'spo2': spo2_kind(args.sps),
+             'ecg': sleeper_kind('ecg-spi', spans),
+             'temperature': sleeper_kind('mcp9808', spans)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'acq.sock')
+        manager = JobManager(kinds=kinds)
+        server = AcquisitionServer(path, manager)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = AcquisitionClient(path)
+        try:
+            accepted, done = [], []
+            for _ in range(args.runs):
+                t = time.monotonic()
+                job = client.submit('spo2')
+                accepted.append(time.monotonic() - t)
+                job = client.wait(job["id"], timeout=30)
+                done.append(time.monotonic() - t)
+                ok &= job["state"] == 'done'
+            print("warm (daemon job): accepted in " + ", ".join(f"{t * 1000:.1f}" for t in accepted) +
+                  " ms, done in " + ", ".join(f"{t:.2f}" for t in done) + " s")
+
+            ids = [client.submit(k)["id"] for k in ('ecg', 'ecg', 'temperature', 'ecg')]
+            cancelled = client.cancel(ids[3])["state"] == 'cancelled'
+            states = [client.wait(i, timeout=10)["state"] for i in ids[:3]]
+            (a0, a1), (b0, b1), (c0, c1) = (spans[i] for i in ids[:3])
+            serial = b0 >= a1
+            parallel = c0 < a1
+            locks_ok = (states == ['done'] * 3 and cancelled and ids[3] not in spans and serial and parallel)
+            print(f"device locks: same device serialized {serial}, other device in parallel {parallel}, "
+                  f"queued job cancelled {cancelled and ids[3] not in spans}")
+            ok &= locks_ok
+        finally:
+            server.shutdown()
+            server.server_close()
+            manager.close(timeout=5)
+    print(f"first warm job includes the 1 s sensor init; later ones skip it. ok: {ok}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
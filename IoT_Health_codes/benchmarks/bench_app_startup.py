@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark + check: dashboard startup (dz_app/app8.py) in fresh interpreters.
+
+Each run is a new `python3` that imports app8 (OLED_BACKEND=null, on a copy of the
+database) and serves one request through Flask's test client. Reported, median over
+--runs: time to `import app8`, time to the first response, and what importing the
+modules app8 now loads on first use would have added at startup (NumPy + lttb for the
+chart/export routes, requests for the Ollama chat, the OLED's luma/PIL where installed).
+
+Fails (exit 1) if a heavy module is loaded by `import app8` or the median import time
+is over --budget-ms, so a module-level import that slips back in shows up here.
+For the per-module breakdown: python3 dz_app/import_report.py
+
+    python3 benchmarks/bench_app_startup.py --runs 5 --budget-ms 400
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+DZ_APP = os.path.join(ROOT, 'dz_app')
+
+# must not be imported by `import app8`: hardware, GUI, numerics and HTTP client stacks
+HEAVY_MODULES = ('numpy', 'scipy', 'lttb', 'requests', 'luma', 'PIL', 'smbus', 'smbus2', 'spidev')
+
+CHILD = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+import app8
+t1 = time.perf_counter()
+status = app8.app.test_client().get({path!r}).status_code
+t2 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+deferred = {{}}
+for name in ('numpy', 'lttb', 'requests', 'PIL.ImageFont', 'luma.oled.device'):
+    t = time.perf_counter()
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        continue
+    deferred[name] = (time.perf_counter() - t) * 1000
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "first_response_ms": (t2 - t1) * 1000,
+                  "status": status, "heavy": heavy, "deferred_ms": deferred}}))
+"""
+
+
+def run_once(path, db_path):
+    env = dict(os.environ, OLED_BACKEND='null', DB_PATH=db_path)
+    proc = subprocess.run([sys.executable, '-c', CHILD.format(path=path, heavy=HEAVY_MODULES)],
+                          cwd=DZ_APP, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--runs', type=int, default=5, help="fresh interpreters, default 5")
+    ap.add_argument('--path', default='/about', help="first request, default /about")
+    ap.add_argument('--budget-ms', type=float, default=400.0, help="max median import time, default 400")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='app_startup_')
+    try:
+        db_path = os.path.join(tmp, 'health_data.db')
+        shutil.copy(os.path.join(ROOT, 'health_database', 'health_data.db'), db_path)
+        runs = [run_once(args.path, db_path) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    first_ms = statistics.median(r["first_response_ms"] for r in runs)
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    deferred = {name: statistics.median(r["deferred_ms"].get(name, 0.0) for r in runs)
+                for name in runs[0]["deferred_ms"]}
+    print(f"import app8: median {import_ms:.0f} ms (min {min(r['import_ms'] for r in runs):.0f}, "
+          f"max {max(r['import_ms'] for r in runs):.0f}) over {args.runs} runs")
+    print(f"first response ({args.path}, HTTP {runs[0]['status']}): median {first_ms:.0f} ms after import")
+    print("loaded on first use instead of at startup: "
+          + (", ".join(f"{name} {ms:.0f} ms" for name, ms in deferred.items()) or "none installed")
+          + f" (eager startup would be ~{import_ms + sum(deferred.values()):.0f} ms)")
+
+    ok = True
+    if heavy:
+        print(f"FAIL: loaded by `import app8`: {', '.join(heavy)}")
+        ok = False
+    if import_ms > args.budget_ms:
+        print(f"FAIL: median import {import_ms:.0f} ms over the {args.budget_ms:.0f} ms budget")
+        ok = False
+    if any(r["status"] >= 500 for r in runs):
+        print("FAIL: first request answered with a server error")
+        ok = False
+    print(f"startup: no heavy imports, within budget: {ok}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: row-by-row decrypt_field vs decrypt_many for a large history read.
+
+The default size is a year of temperature plus SpO2 at one reading every two
+minutes each (~525k blobs), encrypted with the real utils.encryption_utils key.
+
+    python3 benchmarks/bench_bulk_decrypt.py --rows 525600 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(ROOT, '.env'))
+
+from utils.encryption_utils import decrypt_field
+from health_database.crypto_batch import decrypt_many, encrypt_many
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=2 * 365 * 24 * 30)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = ap.parse_args()
+
+    plaintexts = [f"{random.uniform(35.5, 38.5):.3f}".encode() for _ in range(args.rows)]
+    t = time.perf_counter()
+    blobs = encrypt_many(plaintexts, workers=args.workers)
+    print(f"encrypted {args.rows:,} values in {time.perf_counter() - t:.2f} s (encrypt_many)")
+
+    t = time.perf_counter()
+    seq = [float(decrypt_field(b).decode()) for b in blobs]
+    seq_s = time.perf_counter() - t
+    print(f"decrypt_field loop : {seq_s:.2f} s  ({args.rows / seq_s:,.0f} rows/s)")
+
+    t = time.perf_counter()
+    bulk = [float(pt.decode()) for pt in decrypt_many(blobs, threshold=1, workers=args.workers)]
+    bulk_s = time.perf_counter() - t
+    print(f"decrypt_many x{args.workers:<3}: {bulk_s:.2f} s  ({args.rows / bulk_s:,.0f} rows/s)")
+
+    assert bulk == seq, "decrypt_many returned different values"
+    print(f"speed-up {seq_s / bulk_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
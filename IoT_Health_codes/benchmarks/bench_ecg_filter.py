@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-sample ECG filtering, old window refilter vs ecg_filter.EcgFilter.
+
+The old loop appended each sample to a 200-sample deque and ran both lfilter passes over
+list(window) to keep the last value. EcgFilter keeps the second-order-section state and
+filters each sample once (step) or a block at a time (process).
+
+Outputs are compared against filtering the whole record in one go with the original
+lfilter coefficients. The old per-window result differs from that by the restart
+transient of each window: negligible at 100 Hz, but a 200-sample window is too short for
+the filters to settle at 250/500 Hz.
+
+    python3 benchmarks/bench_ecg_filter.py --samples 20000 --fs 100 250 500
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+from scipy.signal import butter, iirnotch, lfilter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(ROOT, 'ecg_project'))
+
+from ecg_filter import EcgFilter
+
+
+def synthetic_ecg(n, fs, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / fs
+    beat = np.exp(-((t % 0.8) - 0.2) ** 2 / 0.0005)            # R peaks, 75 bpm
+    mains = 0.2 * np.sin(2 * np.pi * 50 * t)
+    return np.clip(512 + 300 * beat + 60 * mains + rng.normal(0, 5, n), 0, 1023).round()
+
+
+def old_loop(samples, fs, window_size=200):
+    nyq = 0.5 * fs
+    b_lp, a_lp = butter(2, 40 / nyq, btype='low')
+    b_notch, a_notch = iirnotch(50.0 / nyq, 30.0)
+    raw_data = deque([0] * window_size, maxlen=window_size)
+    out = []
+    for value in samples:
+        raw_data.append(value)
+        out.append(lfilter(b_lp, a_lp, lfilter(b_notch, a_notch, list(raw_data)))[-1])
+    return np.array(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--samples", type=int, default=20000, help="samples per rate, default 20000")
+    ap.add_argument("--fs", type=int, nargs='+', default=[100, 250, 500], help="sample rates, default 100 250 500")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    ok = True
+    for fs in args.fs:
+        x = synthetic_ecg(args.samples, fs, args.seed)
+        nyq = 0.5 * fs
+        b_lp, a_lp = butter(2, 40 / nyq, btype='low')
+        b_notch, a_notch = iirnotch(50.0 / nyq, 30.0)
+        reference = lfilter(b_lp, a_lp, lfilter(b_notch, a_notch, x))
+
+        t = time.perf_counter()
+        old = old_loop(x, fs)
+        t_old = time.perf_counter() - t
+
+        f = EcgFilter(fs)
+        t = time.perf_counter()
+        stepped = np.array([f.step(v) for v in x.tolist()])
+        t_step = time.perf_counter() - t
+
+        f = EcgFilter(fs)
+        t = time.perf_counter()
+        blocks = np.concatenate([f.process(x[i:i + 50]) for i in range(0, len(x), 50)])
+        t_block = time.perf_counter() - t
+
+        err_step = np.abs(stepped - reference).max()
+        err_block = np.abs(blocks - reference).max()
+        err_old = np.abs(old - reference).max()
+        ok &= err_step < 1e-6 and err_block < 1e-6
+        us = 1e6 / len(x)
+        print(f"fs={fs:>3} Hz: old {t_old * us:6.1f} us/sample, step {t_step * us:5.2f} us/sample "
+              f"(x{t_old / t_step:.0f}), 50-sample blocks {t_block * us:5.2f} us/sample; "
+              f"max |diff| step {err_step:.1e}, block {err_block:.1e}, old window {err_old:.1e}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ECG acquisition with slow consumers, inline loop vs ecg_pipeline.EcgPipeline.
+
+A fake ADC is sampled at --fs Hz for --seconds. Printing costs --print-ms per filtered
+sample batch and every SQLite flush is followed by a --fsync-ms stall (what a slow SD
+card does), with real chunk encryption under the current key. The inline loop does the
+read, filter, print, encryption and commit one after the other (the old script shape);
+the pipeline runs them in separate stages. Compared: missed ADC deadlines, lateness of the
+reads, and the pipeline's per-stage metrics. An idle sampler (no consumers at all) gives the
+baseline the machine's scheduler allows.
+
+    python3 benchmarks/bench_ecg_pipeline.py --fs 500 --seconds 5 --fsync-ms 150
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'ecg_project'))
+
+from dotenv import load_dotenv
+load_dotenv(os.path.join(ROOT, '.env'))
+
+from health_database.enc_keys import encrypt
+from health_database.sample_writer import SampleWriter
+from health_database.ecg_chunks import ECG_CHUNK_COLUMNS, EcgChunker, ensure_ecg_chunks_table
+from ecg_filter import EcgFilter
+from ecg_sampler import DeadlineSampler
+from ecg_pipeline import EcgPipeline
+
+
+def make_writer(db_path, fsync_s):
+    writer = SampleWriter(db_path, 'ecg_chunks', ECG_CHUNK_COLUMNS, max_rows=1, max_delay_ms=1000)
+    writer.add_flush_hook(lambda conn: time.sleep(fsync_s))
+    return writer
+
+
+def fake_adc():
+    return int(512 + 300 * (time.monotonic() % 0.8 < 0.05))
+
+
+def run_idle(fs, seconds):
+    sampler = DeadlineSampler(fs, fake_adc)
+    for _ in sampler.run(duration=seconds):
+        pass
+    return sampler.report()
+
+
+def run_inline(fs, seconds, db_path, print_s, fsync_s):
+    sampler = DeadlineSampler(fs, fake_adc)
+    ecg_filter = EcgFilter(fs)
+    chunker = EcgChunker(fs, encrypt, chunk_size=500)
+    writer = make_writer(db_path, fsync_s)
+    n = 0
+    for sample in sampler.run(duration=seconds):
+        ecg_filter.step(sample.value)
+        n += 1
+        if n % 50 == 0:
+            time.sleep(print_s)
+        row = chunker.add(sample.value, sample.epoch)
+        if row:
+            writer.add(row)
+    row = chunker.flush()
+    if row:
+        writer.add(row)
+    writer.close()
+    return sampler.report()
+
+
+def run_pipeline(fs, seconds, db_path, print_s, fsync_s):
+    sampler = DeadlineSampler(fs, fake_adc)
+    writer = make_writer(db_path, fsync_s)
+    pipeline = EcgPipeline(sampler, EcgFilter(fs), EcgChunker(fs, encrypt, chunk_size=500), writer,
+                           on_filtered=lambda samples, filtered: time.sleep(print_s))
+    pipeline.run(duration=seconds)
+    writer.close()
+    return pipeline
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fs", type=int, default=500, choices=(100, 250, 500), help="sample rate, default 500")
+    ap.add_argument("--seconds", type=float, default=5.0, help="run time, default 5")
+    ap.add_argument("--print-ms", type=float, default=5.0, help="cost of printing 50 samples, default 5 ms")
+    ap.add_argument("--fsync-ms", type=float, default=150.0, help="stall after each commit, default 150 ms")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        ensure_ecg_chunks_table(db_path)
+        print_s, fsync_s = args.print_ms / 1000.0, args.fsync_ms / 1000.0
+
+        r = run_idle(args.fs, args.seconds)
+        print(f"idle    : {r['samples']} samples at {r['achieved_hz']:.1f} Hz, {r['missed']} missed deadlines, "
+              f"lateness p50/p99/max {r['jitter_p50_us']:.0f}/{r['jitter_p99_us']:.0f}/{r['jitter_max_us']:.0f} us")
+
+        r = run_inline(args.fs, args.seconds, db_path, print_s, fsync_s)
+        print(f"inline  : {r['samples']} samples at {r['achieved_hz']:.1f} Hz, {r['missed']} missed deadlines, "
+              f"lateness p50/p99/max {r['jitter_p50_us']:.0f}/{r['jitter_p99_us']:.0f}/{r['jitter_max_us']:.0f} us")
+
+        pipeline = run_pipeline(args.fs, args.seconds, db_path, print_s, fsync_s)
+        r = pipeline.sampler.report()
+        print(f"pipeline: {r['samples']} samples at {r['achieved_hz']:.1f} Hz, {r['missed']} missed deadlines, "
+              f"lateness p50/p99/max {r['jitter_p50_us']:.0f}/{r['jitter_p99_us']:.0f}/{r['jitter_max_us']:.0f} us")
+        print("\n".join(pipeline.report_lines()))
+        stored = pipeline.latency["storage"].count
+        print(f"stored {stored} of {r['samples']} samples")
+    return 0 if stored == r['samples'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
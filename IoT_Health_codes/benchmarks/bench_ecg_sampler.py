@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark + check: ECG sampling pace, old `read; work; time.sleep(1/fs)` loop vs
+ecg_sampler.DeadlineSampler.
+
+1. Fake clock + fake ADC (deterministic): per-sample work of 30-90% of a period and one
+   stall of 5.5 periods. The sampler must keep every sample on the k / fs grid, skip
+   exactly the deadlines the stall overran and report them.
+2. Real clock at each rate for --seconds, with --work-ms of simulated processing per
+   sample: achieved rate and lateness percentiles for both loops.
+
+    python3 benchmarks/bench_ecg_sampler.py --seconds 3 --work-ms 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(ROOT, 'ecg_project'))
+
+from ecg_sampler import SAMPLE_RATES, DeadlineSampler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+def check_fake_clock(fs, n=400):
+    clock = FakeClock()
+    reads = []
+
+    def adc():
+        clock.now += 20e-6  # the SPI transfer
+        reads.append(clock.now)
+        return len(reads) % 1024
+
+    period = 1.0 / fs
+    sampler = DeadlineSampler(fs, adc, clock=clock.monotonic, sleep=clock.sleep, wall_clock=lambda: 0.0)
+    samples = []
+    for sample in sampler.run(n_samples=n):
+        samples.append(sample)
+        # processing after each read: 30-90% of a period, and one long stall
+        clock.now += period * (0.3 + 0.6 * ((len(samples) * 7) % 10) / 10)
+        if len(samples) == 100:
+            clock.now += 5.5 * period
+
+    indices = [s.index for s in samples]
+    gaps = [b - a - 1 for a, b in zip(indices, indices[1:])]
+    ok = (len(samples) == n
+          and all(abs(s.deadline - (samples[0].deadline + s.index * period)) < 1e-9 for s in samples)
+          and all(abs(s.epoch - s.index * period) < 1e-9 for s in samples)
+          and sum(gaps) == sampler.missed == sum(s.missed for s in samples) > 0
+          and all(s.missed == g for s, g in zip(samples[1:], gaps)))
+    report = sampler.report()
+    print(f"fake clock {fs:>3} Hz: {n} samples, {sampler.missed} missed deadline(s) after the stall, "
+          f"achieved {report['achieved_hz']:.1f} Hz, grid/gap accounting ok: {ok}")
+    return ok
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def run_old(fs, seconds, work_s):
+    # the original loop shape: read, process, then sleep one period
+    times = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        times.append(time.monotonic())
+        busy(work_s)
+        time.sleep(1.0 / fs)
+    return (len(times) - 1) / (times[-1] - times[0])
+
+
+def run_deadline(fs, seconds, work_s):
+    sampler = DeadlineSampler(fs, lambda: 0)
+    for _ in sampler.run(duration=seconds):
+        busy(work_s)
+    return sampler.report()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=3.0, help="real-clock run per rate, default 3")
+    ap.add_argument("--work-ms", type=float, default=0.5, help="simulated processing per sample, default 0.5 ms")
+    args = ap.parse_args()
+
+    ok = all([check_fake_clock(fs) for fs in SAMPLE_RATES])
+
+    work_s = args.work_ms / 1000.0
+    for fs in SAMPLE_RATES:
+        old_hz = run_old(fs, args.seconds, work_s)
+        r = run_deadline(fs, args.seconds, work_s)
+        print(f"real clock {fs:>3} Hz: old loop {old_hz:6.1f} Hz | deadlines {r['achieved_hz']:6.1f} Hz, "
+              f"{r['missed']} missed, lateness p50/p95/p99 "
+              f"{r['jitter_p50_us']:.0f}/{r['jitter_p95_us']:.0f}/{r['jitter_p99_us']:.0f} us")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
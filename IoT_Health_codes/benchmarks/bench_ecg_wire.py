@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark + check: the live ECG waveform as binary delta-encoded frames (dz_app/ecg_wire.py,
+/api/live/ecg) vs the JSON the dashboard sent before.
+
+A synthetic filtered ECG (P-QRS-T at 72 bpm, ~400 counts QRS, 2 counts noise, values
+with 2 decimals as the daemon publishes them) is cut into 4 frames/s.
+
+1. Round trip: ecg_wire.decode_frames and the browser decoder (static/js/ecg_stream.js,
+   run in node if installed) give back every sample to within half a quantization step,
+   and agree with each other exactly.
+2. Bandwidth at --rates Hz, bytes/s of
+     series : /api/series JSON, a string timestamp and a value per sample (ecg.html)
+     sse    : the ECG blocks of an /api/live JSON frame
+     binary : ecg_wire frames
+   plain and gzipped (what a compressing tunnel would carry), and how many frames fit
+   int8 deltas.
+3. Per-frame cost and latency: encode / decode time per frame (Python, and node), and
+   through a LiveHub fed in real time, the delay from a block's last sample to the
+   frame decoded by a /api/live/ecg reader vs parsed by an /api/live SSE reader.
+
+    python3 benchmarks/bench_ecg_wire.py --rates 100 250 500 --seconds 4
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+DZ_APP = os.path.join(ROOT, 'dz_app')
+if DZ_APP not in sys.path:
+    sys.path.insert(0, DZ_APP)
+
+import ecg_wire
+from live_stream import LiveHub
+
+FRAMES_PER_S = 4
+ECG_STREAM_JS = os.path.join(DZ_APP, 'static', 'js', 'ecg_stream.js')
+
+NODE_DECODE = """
+const fs = require('fs');
+global.window = global;
+eval(fs.readFileSync(process.argv[1], 'utf8'));
+const bytes = new Uint8Array(fs.readFileSync(0));
+const t = process.hrtime.bigint();
+let out;
+for (let i = 0; i < 20; i++) out = decodeEcgFrames(bytes);
+const ms = Number(process.hrtime.bigint() - t) / 1e6 / 20;
+console.log(JSON.stringify({ ms, rest: out.rest.length,
+  frames: out.frames.map((f) => ({ id: f.id, rate: f.rate, t0: f.t0, ended: f.ended, values: Array.from(f.samples) })) }));
+"""
+
+
+def synthetic_ecg(rate, seconds, seed=1):
+    rnd = random.Random(seed)
+    beat = 60.0 / 72
+    waves = ((0.16, 0.025, 40.0), (0.36, 0.010, 420.0), (0.38, 0.012, -90.0), (0.60, 0.040, 90.0))
+    out = []
+    for i in range(int(rate * seconds)):
+        phase = (i / rate) % beat
+        v = sum(a * math.exp(-((phase - c) ** 2) / (2 * w * w)) for c, w, a in waves)
+        out.append(round(v + rnd.gauss(0, 2.0), 2))
+    return out
+
+
+def frames_of(values, rate, t0=1_700_000_000.0):
+    step = rate // FRAMES_PER_S
+    return [(t0 + i / rate, values[i:i + step]) for i in range(0, len(values), step)]
+
+
+def check_round_trip(rate, seconds):
+    frames = frames_of(synthetic_ecg(rate, seconds), rate)
+    data = b''.join(ecg_wire.encode_frame(t0, rate, block, i) for i, (t0, block) in enumerate(frames))
+    data += ecg_wire.encode_marker(len(frames), ended=True)
+    decoded, rest = ecg_wire.decode_frames(data)
+    err = max(abs(a - b) for (_, block), f in zip(frames, decoded) for a, b in zip(block, f["values"]))
+    ok = (not rest and len(decoded) == len(frames) + 1 and decoded[-1]["ended"]
+          and all(len(f["values"]) == len(block) for (_, block), f in zip(frames, decoded))
+          and err <= 0.5 / ecg_wire.DEFAULT_SCALE + 1e-9)
+    print(f"round trip {rate} Hz: {len(frames)} frames, max error {err:.3f} counts "
+          f"(step {1 / ecg_wire.DEFAULT_SCALE:g}): {ok}")
+
+    node = shutil.which('node')
+    if node is None:
+        print("browser decoder: node not installed, skipped")
+        return ok, None
+    proc = subprocess.run([node, '-e', NODE_DECODE, ECG_STREAM_JS], input=data, capture_output=True)
+    if proc.returncode != 0:
+        print(proc.stderr.decode()[-2000:])
+        return False, None
+    js = json.loads(proc.stdout)
+    # Float32Array against Python floats: equal to float32 precision
+    same = (js["rest"] == 0 and len(js["frames"]) == len(decoded) and all(
+        a["id"] == b["id"] and a["rate"] == b["rate"] and a["t0"] == b["t0"] and a["ended"] == b["ended"]
+        and len(a["values"]) == len(b["values"])
+        and all(abs(x - y) <= 1e-6 * max(1.0, abs(y)) for x, y in zip(a["values"], b["values"]))
+        for a, b in zip(js["frames"], decoded)))
+    print(f"browser decoder (node) matches ecg_wire.decode_frames: {same}, "
+          f"{js['ms'] / len(decoded) * 1000:.1f} µs per frame")
+    return ok and same, js["ms"] / len(decoded)
+
+
+def bandwidth(rate, seconds):
+    frames = frames_of(synthetic_ecg(rate, seconds), rate)
+    sizes = {"series": [], "sse": [], "binary": []}
+    narrow = 0
+    for i, (t0, block) in enumerate(frames):
+        labels = [datetime.fromtimestamp(t0 + k / rate).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+                  for k in range(len(block))]
+        sizes["series"].append(json.dumps({"timestamp": labels, "value": block}).encode())
+        sizes["sse"].append(json.dumps({"job": "0123456789ab", "t0": t0, "rate": rate,
+                                        "values": block}).encode())
+        frame = ecg_wire.encode_frame(t0, rate, block, i)
+        narrow += frame[1] & ecg_wire.WIDTH_MASK == 1
+        sizes["binary"].append(frame)
+    line = []
+    binary_bps = sum(map(len, sizes["binary"])) / seconds
+    for name, parts in sizes.items():
+        plain = sum(map(len, parts)) / seconds
+        zipped = sum(len(gzip.compress(p)) for p in parts) / seconds
+        line.append(f"{name} {plain / 1024:.1f} KB/s (gzip {zipped / 1024:.1f}, x{plain / binary_bps:.1f})")
+    print(f"bandwidth {rate} Hz: " + ", ".join(line) + f"; int8 deltas in {narrow}/{len(frames)} frames")
+    return binary_bps
+
+
+def codec_cost(rate, seconds):
+    frames = frames_of(synthetic_ecg(rate, seconds), rate)
+    t = time.perf_counter()
+    encoded = [ecg_wire.encode_frame(t0, rate, block, i) for i, (t0, block) in enumerate(frames)]
+    encode_us = (time.perf_counter() - t) / len(frames) * 1e6
+    t = time.perf_counter()
+    for data in encoded:
+        ecg_wire.decode_frames(data)
+    decode_us = (time.perf_counter() - t) / len(frames) * 1e6
+    print(f"codec {rate} Hz: encode {encode_us:.0f} µs, decode {decode_us:.0f} µs per frame (Python)")
+
+
+class FakeDaemon(object):
+    """AcquisitionClient.events look-alike fed by a thread publishing ECG blocks in real time."""
+
+    def __init__(self, rate, seconds, block=10):
+        self.cond = threading.Condition()
+        self.events = []
+        self.seq = 0
+        self.rate, self.seconds, self.block = rate, seconds, block
+        self.values = synthetic_ecg(rate, seconds)
+
+    def run(self):
+        start = time.time()
+        for i in range(0, len(self.values), self.block):
+            time.sleep(max(0.0, start + (i + self.block - 1) / self.rate - time.time()))
+            with self.cond:
+                self.seq += 1
+                self.events.append({"seq": self.seq, "job": "j", "kind": "ecg", "channel": "ecg",
+                                    "t": time.time(), "rate": self.rate, "t0": start + i / self.rate, "gaps": 0,
+                                    "values": self.values[i:i + self.block]})
+                self.cond.notify_all()
+        with self.cond:
+            self.seq += 1
+            self.events.append({"seq": self.seq, "job": "j", "kind": "ecg", "channel": "state",
+                                "t": time.time(), "state": "done"})
+            self.cond.notify_all()
+
+    def fetch(self, after, timeout):
+        with self.cond:
+            if after is not None:
+                self.cond.wait_for(lambda: self.seq > after, timeout)
+            events = [e for e in self.events if after is not None and e["seq"] > after]
+            return {"seq": self.seq, "events": events, "lost": 0, "active": []}
+
+
+def hub_latency(rate, seconds):
+    daemon = FakeDaemon(rate, seconds)
+    hub = LiveHub(daemon.fetch, rate_hz=FRAMES_PER_S, poll_s=1.0, heartbeat_s=1.0)
+    results = {"binary": [], "sse": []}
+    received = {"binary": 0, "sse": 0}
+    done = threading.Event()
+
+    def binary_reader():
+        pending = b''
+        for chunk in hub.stream_ecg():
+            frames, pending = ecg_wire.decode_frames(pending + chunk)
+            now = time.time()
+            for f in frames:
+                if f["ended"]:
+                    return
+                if f["values"]:
+                    received["binary"] += len(f["values"])
+                    results["binary"].append(now - (f["t0"] + (len(f["values"]) - 1) / f["rate"]))
+
+    def sse_reader():
+        for chunk in hub.stream():
+            if not chunk.startswith("id: ") or "event: live" not in chunk:
+                continue
+            frame = json.loads(chunk.split("data: ", 1)[1])
+            now = time.time()
+            for b in frame["ecg"]:
+                received["sse"] += len(b["values"])
+                results["sse"].append(now - (b["t0"] + (len(b["values"]) - 1) / b["rate"]))
+            if frame["ended"] or done.is_set():
+                return
+
+    readers = [threading.Thread(target=binary_reader), threading.Thread(target=sse_reader)]
+    for t in readers:
+        t.start()
+    time.sleep(0.3)
+    daemon.run()
+    done.set()
+    for t in readers:
+        t.join(5.0)
+    out = []
+    for name, delays in results.items():
+        delays.sort()
+        out.append(f"{name} median {statistics.median(delays) * 1000:.0f} ms "
+                   f"p95 {delays[int(0.95 * (len(delays) - 1))] * 1000:.0f} ms ({received[name]} samples)")
+    complete = received["binary"] == len(daemon.values)
+    print(f"latency {rate} Hz through LiveHub: " + ", ".join(out) + f"; binary stream complete: {complete}")
+    return complete
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rates", type=int, nargs='+', default=[100, 250, 500], help="ECG sample rates, default 100 250 500")
+    ap.add_argument("--seconds", type=float, default=4.0, help="signal length, default 4")
+    args = ap.parse_args()
+
+    ok = True
+    for rate in args.rates:
+        good, _ = check_round_trip(rate, args.seconds)
+        ok &= good
+        bandwidth(rate, args.seconds)
+        codec_cost(rate, args.seconds)
+    ok &= hub_latency(args.rates[len(args.rates) // 2], args.seconds)
+    print(f"binary ECG frames lossless to the quantization step, decoders agree, stream complete: {ok}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HeartRateMonitor's per-drain processing, old list version vs ppg_stream.HRStream.
+
+A synthetic 25 samples/s PPG stream is cut into FIFO drains of 0-3 samples (what a
+10 ms poll sees) and fed to
+  - the old loop: append to lists, trim with pop(0), recompute after every drain;
+  - HRStream(hop=1): ring buffer, one result per drain, must match the old loop exactly;
+  - HRStream(hop=25): ring buffer, one result per second, must match the old loop's
+    result for the same window.
+
+    python3 benchmarks/bench_hr_stream.py --seconds 600
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(ROOT, 'pox_project', 'max30102'))
+
+import hrcalc
+from ppg_stream import HRStream
+
+
+def synthetic_drains(seconds, seed):
+    rng = np.random.default_rng(seed)
+    n = seconds * hrcalc.SAMPLE_FREQ
+    t = np.arange(n) / hrcalc.SAMPLE_FREQ
+    bpm = 70 + 15 * np.sin(2 * np.pi * t / 120)
+    wave = np.sin(2 * np.pi * np.cumsum(bpm / 60) / hrcalc.SAMPLE_FREQ)
+    ir = (100000 + 1500 * wave + rng.normal(0, 80, n)).astype(np.int64)
+    red = (90000 + 1200 * wave + rng.normal(0, 80, n)).astype(np.int64)
+    # finger off for a while in the middle
+    off = slice(n // 2, n // 2 + 20 * hrcalc.SAMPLE_FREQ)
+    ir[off] = rng.integers(1000, 3000, ir[off].shape[0])
+    red[off] = rng.integers(1000, 3000, red[off].shape[0])
+
+    drains, i = [], 0
+    while i < n:
+        k = int(rng.integers(0, 4))
+        drains.append((ir[i:i + k].tolist(), red[i:i + k].tolist()))
+        i += k
+    return drains
+
+
+def run_old(drains):
+    """The pre-ring-buffer loop body of HeartRateMonitor.run_sensor; results keyed by sample count."""
+    ir_data, red_data, bpms = [], [], []
+    out, count, bpm_avg = {}, 0, 0
+    for drain_ir, drain_red in drains:
+        if not drain_ir:
+            continue
+        for ir, red in zip(drain_ir, drain_red):
+            ir_data.append(ir)
+            red_data.append(red)
+        count += len(drain_ir)
+        while len(ir_data) > 100:
+            ir_data.pop(0)
+            red_data.pop(0)
+        if len(ir_data) == 100:
+            bpm, valid_bpm, spo2, valid_spo2 = hrcalc.calc_hr_and_spo2(ir_data, red_data)
+            if valid_bpm:
+                bpms.append(bpm)
+                while len(bpms) > 4:
+                    bpms.pop(0)
+                bpm_avg = np.mean(bpms)
+                if np.mean(ir_data) < 50000 and np.mean(red_data) < 50000:
+                    bpm_avg = 0
+            out[count] = (bpm_avg, valid_bpm, spo2, valid_spo2)
+    return out
+
+
+def run_stream(drains, hop):
+    stream = HRStream(hop=hop)
+    out = {}
+    for drain_ir, drain_red in drains:
+        result = stream.push(drain_ir, drain_red)
+        if result is not None:
+            out[result.samples] = (result.bpm, result.valid_bpm, result.spo2, result.valid_spo2)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=int, default=600, help="length of the synthetic stream, default 600")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    drains = synthetic_drains(args.seconds, args.seed)
+    print(f"{args.seconds} s of PPG, {len(drains):,} drains")
+
+    t = time.perf_counter()
+    old = run_old(drains)
+    t_old = time.perf_counter() - t
+    print(f"  old loop      : {t_old:.2f} s, {len(old):,} results")
+
+    failures = 0
+    for hop in (1, hrcalc.SAMPLE_FREQ):
+        t = time.perf_counter()
+        new = run_stream(drains, hop)
+        elapsed = time.perf_counter() - t
+        if hop == 1:
+            # same drains, same smoothing: every result must match
+            mismatches = sum(1 for k in old if new.get(k) != old[k]) + len(set(new) - set(old))
+        else:
+            # raw readings for the same window must match (smoothing differs: fewer readings)
+            mismatches = sum(1 for k, v in new.items() if v[1:] != old[k][1:])
+        failures += mismatches
+        print(f"  HRStream hop={hop:<2}: {elapsed:.2f} s, {len(new):,} results, "
+              f"speedup x{t_old / elapsed:.1f}, {mismatches} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark + equivalence check: vectorized hrcalc.calc_hr_and_spo2 vs the loop version
+(benchmarks/hrcalc_reference.py).
+
+Every 100-sample buffer is run through both and the (hr, hr_valid, spo2, spo2_valid)
+tuples must be identical, value and type. Buffers are synthetic PPG (varying rate,
+noise, amplitude, quantisation, plus random and near-flat inputs) and, with --recorded,
+sliding windows over a raw capture as printed by `python main.py --raw` ("IR, Red" lines).
+
+    python3 benchmarks/bench_hrcalc.py --buffers 20000
+    python3 benchmarks/bench_hrcalc.py --recorded raw_capture.txt
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(ROOT, 'pox_project', 'max30102'))
+sys.path.insert(0, HERE)
+
+import hrcalc
+import hrcalc_reference
+
+SIZE = hrcalc.BUFFER_SIZE
+
+
+def synthetic_buffers(count, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(SIZE) / hrcalc.SAMPLE_FREQ
+    for k in range(count):
+        kind = k % 4
+        if kind == 2:
+            # random counts over the sensor's 18-bit range
+            yield rng.integers(0, 1 << 18, SIZE).tolist(), rng.integers(0, 1 << 18, SIZE).tolist()
+            continue
+        if kind == 3:
+            # near-flat (no finger): long plateaus exercise the flat-peak handling
+            spread = int(rng.integers(0, 5))
+            yield (rng.integers(1000, 1001 + spread, SIZE).tolist(),
+                   rng.integers(1000, 1002 + spread, SIZE).tolist())
+            continue
+        bpm = rng.uniform(40, 180)
+        phase = rng.uniform(0, 2 * np.pi)
+        amp = rng.uniform(10, 3000)
+        noise = rng.uniform(0, amp / 4)
+        quant = int(rng.integers(1, 400)) if kind == 1 else 1
+        wave = np.sin(2 * np.pi * bpm / 60 * t + phase) + 0.3 * np.sin(4 * np.pi * bpm / 60 * t + phase)
+        drift = rng.normal(0, amp * 0.05) * t
+        ir = 100000 + amp * wave + drift + rng.normal(0, noise, SIZE)
+        red = 90000 + 0.8 * amp * wave + rng.normal(0, noise, SIZE)
+        yield ((ir.astype(np.int64) // quant * quant).tolist(),
+               (red.astype(np.int64) // quant * quant).tolist())
+
+
+def recorded_buffers(path, step):
+    ir, red = [], []
+    with open(path) as f:
+        for line in f:
+            parts = line.replace(',', ' ').split()
+            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+                ir.append(int(parts[0]))
+                red.append(int(parts[1]))
+    # the monitor re-runs the calculation on a sliding 100-sample window
+    for start in range(0, len(ir) - SIZE + 1, step):
+        yield ir[start:start + SIZE], red[start:start + SIZE]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--buffers", type=int, default=20000, help="synthetic buffers, default 20000")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--recorded", help="raw capture ('IR, Red' per line) to check as well")
+    ap.add_argument("--step", type=int, default=1, help="window step over the recorded capture")
+    args = ap.parse_args()
+
+    buffers = list(synthetic_buffers(args.buffers, args.seed))
+    if args.recorded:
+        recorded = list(recorded_buffers(args.recorded, args.step))
+        print(f"recorded: {len(recorded)} windows from {args.recorded}")
+        buffers += recorded
+
+    timings = {}
+    results = {}
+    for name, func in (("loop", hrcalc_reference.calc_hr_and_spo2), ("vectorized", hrcalc.calc_hr_and_spo2)):
+        t = time.perf_counter()
+        results[name] = [func(list(ir), list(red)) for ir, red in buffers]
+        timings[name] = time.perf_counter() - t
+        per_call = timings[name] / len(buffers) * 1e6
+        print(f"{name:>10}: {len(buffers):,} buffers in {timings[name]:.2f} s ({per_call:.0f} us/call)")
+
+    mismatches = [
+        i for i, (a, b) in enumerate(zip(results["loop"], results["vectorized"]))
+        if a != b or [type(v) for v in a] != [type(v) for v in b]
+    ]
+    valid = sum(1 for r in results["loop"] if r[1] and r[3])
+    print(f"speedup x{timings['loop'] / timings['vectorized']:.1f}; "
+          f"{valid:,} buffers with valid HR and SpO2; {len(mismatches)} mismatches")
+    for i in mismatches[:5]:
+        print(f"  buffer {i}: loop={results['loop'][i]} vectorized={results['vectorized'][i]}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark + check: all vitals at once on one I2C bus, with and without the priority
+arbiter (acquisition/i2c_bus.py), on the simulated bus of i2c_sim.py.
+
+1. Ordering: while the bus is held, an OLED block write, an MCP9808 read, a MAX30102
+   FIFO read and a second OLED write queue up in that order. They must run MAX30102,
+   MCP9808, then both OLED writes in submission order.
+2. Session, --seconds long, bus at --bus-hz: HeartRateMonitor on the MAX30102 (--sps
+   samples/s), an MCP9808 read every second, the OLED animating at up to 20 fps and the
+   ECG sampler at 250 Hz on its own thread (SPI, not on the bus).
+   shared : every driver on the bare bus, the OLED sending whole 1 KB frames in one
+            transfer (what luma does when it opens the bus itself)
+   arbiter: MAX30102 > MCP9808 > OLED priorities, OLED frames in 32-byte blocks
+   Reported: samples dropped by the MAX30102 FIFO, the worst wait of a FIFO read,
+   temperature readings, OLED frames/s, ECG missed deadlines, bus throughput per device
+   and transactions that found the bus busy (must be 0 behind the arbiter).
+   HeartRateMonitor's adaptive wait assumes at most twice the nominal 25 samples/s,
+   so --sps 50 and up overflows the FIFO whatever the bus does.
+
+    python3 benchmarks/bench_i2c_session.py --seconds 10 --sps 25 --bus-hz 100000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'pox_project', 'max30102'))
+sys.path.insert(0, os.path.join(ROOT, 'ecg_project'))
+sys.path.insert(0, HERE)
+
+import i2c_sim
+import max30102_sim
+
+max30102_sim.install(max30102_sim.SimMAX30102())  # `import smbus` for the driver; buses are passed in
+
+from acquisition.i2c_bus import BusArbiter, PRIORITY_MAX30102, PRIORITY_MCP9808, PRIORITY_OLED
+from heartrate_monitor import HeartRateMonitor
+from ecg_sampler import DeadlineSampler
+
+MAX30102_ADDR, MCP9808_ADDR, OLED_ADDR = 0x57, 0x18, 0x3C
+
+
+def make_bus(bus_hz, sps):
+    bus = i2c_sim.SimI2CBus(bus_hz)
+    ppg = bus.attach(MAX30102_ADDR, max30102_sim.SimMAX30102(sps=sps, realtime=True))
+    bus.attach(MCP9808_ADDR, i2c_sim.SimMCP9808())
+    oled = bus.attach(OLED_ADDR, i2c_sim.SimSSD1306())
+    return bus, ppg, oled
+
+
+def check_ordering():
+    bus, _, _ = make_bus(100000, 25)
+    arbiter = BusArbiter(bus)
+    clients = {"max30102": arbiter.client("max30102", PRIORITY_MAX30102),
+               "mcp9808": arbiter.client("mcp9808", PRIORITY_MCP9808),
+               "oled": arbiter.client("oled", PRIORITY_OLED)}
+    calls = [("oled", lambda c: c.write_i2c_block_data(OLED_ADDR, 0x40, [0] * 5)),
+             ("mcp9808", lambda c: c.read_word_data(MCP9808_ADDR, 0x05)),
+             ("max30102", lambda c: c.read_i2c_block_data(MAX30102_ADDR, 0x07, 30)),
+             ("oled", lambda c: c.write_i2c_block_data(OLED_ADDR, 0x40, [0] * 7))]
+    threads = []
+    with arbiter.transaction("holder", PRIORITY_MAX30102):
+        start = time.monotonic()
+        for name, call in calls:
+            t = threading.Thread(target=call, args=(clients[name],))
+            t.start()
+            threads.append(t)
+            time.sleep(0.02)  # queued in this order
+    for t in threads:
+        t.join()
+    order = [(t.address, t.nbytes) for t in bus.log if t.start >= start]
+    expected = [(MAX30102_ADDR, 30), (MCP9808_ADDR, 2), (OLED_ADDR, 5), (OLED_ADDR, 7)]
+    ok = order == expected and bus.overlaps == 0
+    print(f"ordering: {['0x%02x/%d' % o for o in order]} (expected MAX30102, MCP9808, OLED, OLED): {ok}")
+    return ok
+
+
+class TimedBus(object):
+    """Worst-case latency of one driver's bus calls, waiting for the bus included."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.worst = 0.0
+
+    def __getattr__(self, name):
+        method = getattr(self.bus, name)
+
+        def call(*args, **kwargs):
+            t = time.monotonic()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.worst = max(self.worst, time.monotonic() - t)
+        return call
+
+
+def run_session(mode, seconds, sps, bus_hz):
+    bus, ppg, oled = make_bus(bus_hz, sps)
+    arbiter = BusArbiter(bus) if mode == 'arbiter' else None
+
+    def handle(name, priority):
+        return arbiter.client(name, priority) if arbiter else bus
+
+    stop = threading.Event()
+    ppg_bus = TimedBus(handle("max30102", PRIORITY_MAX30102))
+    hrm = HeartRateMonitor(bus=ppg_bus)
+    temperatures = []
+
+    def temperature():
+        temp_bus = handle("mcp9808", PRIORITY_MCP9808)
+        while not stop.wait(1.0):
+            data = temp_bus.read_word_data(MCP9808_ADDR, 0x05)
+            raw = ((data & 0xFF) << 8) | ((data >> 8) & 0xFF)
+            temperatures.append((raw & 0x0FFF) / 16.0)
+
+    def display():
+        oled_bus = handle("oled", PRIORITY_OLED)
+        frame = [0x55] * i2c_sim.SimSSD1306.FRAME_BYTES
+        while not stop.is_set():
+            oled_bus.write_i2c_block_data(OLED_ADDR, 0x00, [0x21, 0, 127, 0x22, 0, 7])
+            if arbiter:
+                for i in range(0, len(frame), 32):
+                    oled_bus.write_i2c_block_data(OLED_ADDR, 0x40, frame[i:i + 32])
+            else:
+                oled_bus.i2c_rdwr(i2c_sim.Msg(OLED_ADDR, [0x40] + frame))
+            stop.wait(0.05)  # oled_ui's KITT animation
+
+    sampler = DeadlineSampler(250, lambda: 512)
+
+    def ecg():
+        for _ in sampler.run(should_stop=stop.is_set):
+            pass
+
+    hrm.start_sensor()
+    time.sleep(1.2)  # sensor reset + 1 s
+    dropped0, frames0, t0 = ppg.dropped, oled.frames, time.monotonic()
+    ppg_bus.worst = 0.0
+    threads = [threading.Thread(target=f) for f in (temperature, display, ecg)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    hrm.stop_sensor()
+
+    through = bus.throughput(since=t0)
+    names = {MAX30102_ADDR: "MAX30102", MCP9808_ADDR: "MCP9808", OLED_ADDR: "OLED"}
+    print(f"{mode:>7}: MAX30102 dropped {ppg.dropped - dropped0} samples (monitor counted "
+          f"{hrm.acquisition_stats()['dropped']}), worst FIFO read wait {ppg_bus.worst * 1000:.1f} ms, "
+          f"{len(temperatures)} temperature readings, OLED {(oled.frames - frames0) / elapsed:.1f} frames/s, "
+          f"ECG {sampler.missed} missed deadlines, overlaps {bus.overlaps}")
+    print("         bus: " + ", ".join(f"{names[a]} {s['bytes'] / elapsed:.0f} B/s ({s['bus_s'] / elapsed:.0%})"
+                                       for a, s in sorted(through.items())))
+    if arbiter:
+        for name, s in arbiter.stats()["clients"].items():
+            print(f"         {name:>8} (priority {s['priority']}): {s['transactions']} transactions, "
+                  f"wait avg {s['wait_avg_ms']:.2f} ms, max {s['wait_max_ms']:.2f} ms")
+    return ppg.dropped - dropped0, bus.overlaps, len(temperatures)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=10.0, help="session length, default 10")
+    ap.add_argument("--sps", type=int, default=25, help="MAX30102 samples/s, default 25 (the driver's setting)")
+    ap.add_argument("--bus-hz", type=int, default=100000, help="I2C clock, default 100000")
+    args = ap.parse_args()
+
+    ok = check_ordering()
+    run_session('shared', args.seconds, args.sps, args.bus_hz)
+    dropped, overlaps, readings = run_session('arbiter', args.seconds, args.sps, args.bus_hz)
+    ok &= dropped == 0 and overlaps == 0 and readings >= int(args.seconds) - 1
+    print(f"arbiter session: no FIFO overflow, no overlapping transactions, temperature served: {ok}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Benchmark + check: live measurement data to many dashboard viewers (dz_app/live_stream.py).
+
+A simulated session job in a real JobManager + AcquisitionServer (Unix socket) publishes
+filtered ECG in 10-sample blocks at --ecg-rate Hz plus a temperature and a SpO2/BPM
+reading every second, for --seconds. --viewers clients follow it:
+
+  hub      : one LiveHub (what app8's /api/live uses); every viewer reads its SSE stream
+  per-view : every viewer long-polls the daemon itself at the same rate (no hub)
+
+Reported per mode: daemon calls, frames and bytes per viewer, ECG samples each viewer
+received out of those published, delay from a sample's publication to its frame reaching
+the viewer (median / 95th percentile) and process CPU time. Checks that with the hub
+every viewer got every ECG sample in order, frames stay at --rate-hz or below and the
+daemon calls do not grow with the number of viewers.
+
+    python3 benchmarks/bench_live_stream.py --viewers 50 --seconds 5 --rate-hz 4
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..'))
+for _path in (ROOT, os.path.join(ROOT, 'dz_app')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from acquisition.client import AcquisitionClient
+from acquisition.daemon import AcquisitionServer, JobManager
+from acquisition.jobs import JobKind
+from live_stream import LiveHub, coalesce
+
+ECG_BLOCK = 10
+
+
+def session_kind(seconds, ecg_rate):
+    def run(job, sensors):
+        n, start, wall_start = 0, time.monotonic(), time.time()
+        next_reading = 1.0
+        while time.monotonic() - start < seconds:
+            # a block is published once its last sample is due, like the ECG pipeline does
+            time.sleep(max(0.0, start + (n + ECG_BLOCK - 1) / ecg_rate - time.monotonic()))
+            # the block's samples are numbered, so viewers can check order and completeness
+            job.publish('ecg', rate=ecg_rate, t0=wall_start + n / ecg_rate, gaps=0,
+                        values=list(range(n, n + ECG_BLOCK)))
+            n += ECG_BLOCK
+            if time.monotonic() - start >= next_reading:
+                job.publish('temperature', value=36.6)
+                job.publish('spo2', spo2=97, bpm=72)
+                next_reading += 1.0
+        return {"samples": n}
+    return JobKind(('ecg-spi',), lambda params: {}, run)
+
+
+class Viewer(object):
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.samples = []
+        self.delays = []
+
+    def frame(self, frame, size):
+        now = time.time()
+        self.frames += 1
+        self.bytes += size
+        for block in frame["ecg"]:
+            self.samples.extend(block["values"])
+            # since the block's last sample was taken
+            self.delays.append(now - (block["t0"] + (len(block["values"]) - 1) / block["rate"]))
+
+
+def sse_viewer(hub, viewer, stop):
+    stream = hub.stream()
+    event, data = None, []
+    try:
+        for chunk in stream:
+            for line in chunk.split("\n"):
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    data.append(line[6:])
+                elif line == "" and data:
+                    if event == 'live':
+                        viewer.frame(json.loads("".join(data)), len(chunk))
+                    event, data = None, []
+            if stop.is_set():
+                break
+    finally:
+        stream.close()
+
+
+def polling_viewer(client, interval, viewer, stop, calls, refused):
+    after = None
+    while not stop.is_set():
+        tick = time.monotonic()
+        try:
+            answer = client.events(after, timeout=1.0)
+        except OSError:
+            # the daemon's listen backlog is full: retry on the next tick
+            refused.append(1)
+            time.sleep(interval)
+            continue
+        calls.append(1)
+        if after is None:
+            after = answer["seq"]
+            continue
+        if answer["events"]:
+            frame = coalesce(answer["events"])
+            viewer.frame(frame, len(json.dumps(frame)))
+        after = answer["seq"]
+        time.sleep(max(0.0, interval - (time.monotonic() - tick)))
+
+
+def retry(call, *args, attempts=50, **kwargs):
+    """The driver's own daemon calls, retried while the polling viewers crowd the socket."""
+    for i in range(attempts):
+        try:
+            return call(*args, **kwargs)
+        except OSError:
+            if i == attempts - 1:
+                raise
+            time.sleep(0.1)
+
+
+def run_mode(mode, args, path):
+    client = AcquisitionClient(path)
+    calls, refused = [], []
+
+    def fetch(after, timeout):
+        calls.append(1)
+        return client.events(after, min(timeout, 1.0))
+
+    hub = LiveHub(fetch, rate_hz=args.rate_hz, poll_s=1.0)
+    viewers = [Viewer() for _ in range(args.viewers)]
+    stop = threading.Event()
+    if mode == 'hub':
+        threads = [threading.Thread(target=sse_viewer, args=(hub, v, stop), daemon=True) for v in viewers]
+    else:
+        threads = [threading.Thread(target=polling_viewer, args=(client, 1.0 / args.rate_hz, v, stop, calls, refused),
+                                    daemon=True)
+                   for v in viewers]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)  # viewers connected
+    cpu0, t0 = time.process_time(), time.monotonic()
+    try:
+        job = retry(client.submit, 'session')
+        retry(client.wait, job["id"], timeout=args.seconds + 30)
+        time.sleep(2.0 / args.rate_hz + 0.3)  # last frame out
+        elapsed = time.monotonic() - t0
+        cpu = time.process_time() - cpu0
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(5.0)
+
+    published = int(retry(client.status, job["id"])["result"]["samples"])
+    complete = sum(v.samples == list(range(published)) for v in viewers)
+    delays = sorted(d for v in viewers for d in v.delays)
+    p95 = delays[int(0.95 * (len(delays) - 1))] if delays else float('nan')
+    frames = statistics.mean(v.frames for v in viewers)
+    print(f"{mode:>8}: {len(calls)} daemon calls ({len(refused)} refused), {frames / elapsed:.1f} frames/s and "
+          f"{statistics.mean(v.bytes for v in viewers) / elapsed / 1024:.1f} KB/s per viewer, "
+          f"{complete}/{len(viewers)} viewers got all {published} ECG samples, "
+          f"delay median {statistics.median(delays) * 1000 if delays else float('nan'):.0f} ms "
+          f"p95 {p95 * 1000:.0f} ms, CPU {cpu:.2f} s")
+    return {"calls": len(calls), "frames_per_s": frames / elapsed, "complete": complete == len(viewers),
+            "stats": hub.stats()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--viewers", type=int, default=50, help="concurrent viewers, default 50")
+    ap.add_argument("--seconds", type=float, default=5.0, help="measurement length, default 5")
+    ap.add_argument("--rate-hz", type=float, default=4.0, help="frames per second (LIVE_RATE_HZ), default 4")
+    ap.add_argument("--ecg-rate", type=int, default=250, help="ECG samples/s, default 250")
+    args = ap.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'acq.sock')
+        manager = JobManager(kinds={'session': session_kind(args.seconds, args.ecg_rate)})
+        server = AcquisitionServer(path, manager)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            for mode in ('hub', 'per-view'):
+                results[mode] = run_mode(mode, args, path)
+        finally:
+            server.shutdown()
+            server.server_close()
+            manager.close(timeout=5)
+
+    hub = results['hub']
+    # one follower: about rate_hz polls/s whatever the number of viewers
+    calls_ok = hub["calls"] <= (args.seconds + 5) * args.rate_hz * 1.5
+    ok = hub["complete"] and hub["frames_per_s"] <= args.rate_hz * 1.1 and calls_ok
+    print(f"hub: {hub['stats']['viewers_max']} viewers, {hub['stats']['frames']} frames encoded once each, "
+          f"{hub['stats']['lost']} events lost")
+    print(f"every viewer complete, frames within {args.rate_hz:g}/s, daemon calls independent of viewers: {ok}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: day lookups on a synthetic multi-million-row ecg_data table.
+
+Compares the old reader filter (date(timestamp)=?) with the half-open range
+(timestamp >= day AND timestamp < next_day) before and after the timestamp
+index from health_database/init_db.py, plus MAX(timestamp) for get_latest_date.
+
+    python3 benchmarks/bench_timestamp_index.py --rows 3000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from health_database.init_db import create_timestamp_indexes
+
+
+def build_table(path, rows, days):
+    """ecg_data with `rows` samples spread over `days` days, in 10 s sessions at 100 Hz."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ecg_data (id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, enc_ecg BLOB)")
+    start = datetime(2025, 1, 1)
+    blob = os.urandom(33)  # same size as a real encrypted 3-digit ADC value
+    per_session = 1000
+    sessions = max(1, rows // per_session)
+    span = days * 86400
+
+    def gen():
+        written = 0
+        offsets = sorted(random.randrange(span) for _ in range(sessions))
+        for off in offsets:
+            t0 = start + timedelta(seconds=off)
+            for k in range(min(per_session, rows - written)):
+                ts = (t0 + timedelta(seconds=k // 100)).strftime('%Y-%m-%d %H:%M:%S')
+                yield (ts, blob)
+            written += per_session
+            if written >= rows:
+                break
+
+    with conn:
+        conn.executemany("INSERT INTO ecg_data (timestamp, enc_ecg) VALUES (?, ?)", gen())
+    return conn
+
+
+def timed(conn, sql, params, repeat):
+    samples = []
+    n = 0
+    for _ in range(repeat):
+        t = time.perf_counter()
+        n = len(conn.execute(sql, params).fetchall())
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), n
+
+
+def plan(conn, sql, params):
+    return "; ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--db", help="keep the synthetic database at this path")
+    args = ap.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_ecg.db")
+    if os.path.exists(path):
+        os.remove(path)
+
+    t = time.perf_counter()
+    conn = build_table(path, args.rows, args.days)
+    print(f"built {args.rows:,} rows in {time.perf_counter() - t:.1f} s ({path})")
+
+    day = conn.execute("SELECT date(MAX(timestamp)) FROM ecg_data").fetchone()[0]
+    nxt = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    queries = [
+        ("date(timestamp)=?", "SELECT id, timestamp, enc_ecg FROM ecg_data WHERE date(timestamp)=?", (day,)),
+        ("range", "SELECT id, timestamp, enc_ecg FROM ecg_data WHERE timestamp >= ? AND timestamp < ?", (day, nxt)),
+        ("MAX(timestamp)", "SELECT MAX(timestamp) FROM ecg_data", ()),
+    ]
+
+    results = {}
+    for phase in ("no index", "indexed"):
+        if phase == "indexed":
+            t = time.perf_counter()
+            with conn:
+                create_timestamp_indexes(conn.cursor(), ['ecg_data'])
+            print(f"index built in {time.perf_counter() - t:.1f} s")
+        for name, sql, params in queries:
+            ms, n = timed(conn, sql, params, args.repeat)
+            results[(phase, name)] = ms
+            print(f"{phase:9} {name:18} {ms:9.2f} ms  rows={n:<7} plan: {plan(conn, sql, params)}")
+
+    old = results[("no index", "date(timestamp)=?")]
+    new = results[("indexed", "range")]
+    print(f"\nday load for {day}: {old:.1f} ms -> {new:.1f} ms ({old / max(new, 1e-6):.0f}x)")
+    conn.close()
+    if not args.db:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
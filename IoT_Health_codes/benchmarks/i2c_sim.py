@@ -0,0 +1,155 @@
+"""
+Simulated I2C bus 1 with several devices on it, for checks of acquisition.i2c_bus and
+multi-sensor sessions without the hardware.
+
+SimI2CBus routes smbus/smbus2 calls by address to attached devices (anything with
+read(reg, length) / write(reg, values), e.g. max30102_sim.SimMAX30102) and makes each
+transaction take its wire time at `bus_hz` (9 clocks per byte plus address/register
+bytes). Like the kernel driver it runs one transaction at a time; `overlaps` counts
+calls that found the bus already in use (always 0 behind a BusArbiter) and `log` keeps
+(address, start, end, bytes) of every transaction for ordering and throughput checks.
+
+SimMCP9808 serves a slowly drifting temperature at register 0x05, SimSSD1306 counts
+command and display-data bytes (1024 data bytes = one 128x64 frame).
+
+    import i2c_sim, max30102_sim
+    bus = i2c_sim.SimI2CBus()
+    bus.attach(0x57, max30102_sim.SimMAX30102(sps=25, realtime=True))
+    bus.attach(0x18, i2c_sim.SimMCP9808())
+    bus.attach(0x3C, i2c_sim.SimSSD1306())
+"""
+import threading
+import time
+from collections import namedtuple
+
+I2C_BLOCK_MAX = 32
+
+Transaction = namedtuple('Transaction', 'address start end nbytes')
+# smbus2.i2c_msg look-alike for i2c_rdwr
+Msg = namedtuple('Msg', 'addr buf')
+
+
+class SimMCP9808(object):
+    """MCP9808: ambient temperature register 0x05 (13-bit, 0.0625 °C), writes accepted and kept."""
+
+    def __init__(self, base=36.6):
+        self.base = base
+        self.t0 = time.monotonic()
+        self.regs = {}
+        self.reads = 0
+
+    def read(self, reg, length):
+        if reg == 0x05:
+            self.reads += 1
+            temp = self.base + 0.2 * ((time.monotonic() - self.t0) % 10) / 10
+            raw = int(round(temp * 16)) & 0x0FFF
+            return [(raw >> 8) & 0xFF, raw & 0xFF][:length]
+        value = self.regs.get(reg, 0)
+        return [(value >> 8) & 0xFF, value & 0xFF][:length]
+
+    def write(self, reg, values):
+        value = 0
+        for v in values:
+            value = (value << 8) | v
+        self.regs[reg] = value
+
+
+class SimSSD1306(object):
+    """SSD1306 on I2C: control byte 0x00 = commands, 0x40 = display data."""
+
+    FRAME_BYTES = 128 * 64 // 8
+
+    def __init__(self):
+        self.command_bytes = 0
+        self.data_bytes = 0
+
+    @property
+    def frames(self):
+        return self.data_bytes // self.FRAME_BYTES
+
+    def read(self, reg, length):
+        return [0] * length
+
+    def write(self, reg, values):
+        if reg == 0x40:
+            self.data_bytes += len(values)
+        else:
+            self.command_bytes += len(values)
+
+
+class SimI2CBus(object):
+    """smbus/smbus2.SMBus look-alike for several simulated devices (see module docstring)."""
+
+    def __init__(self, bus_hz=100000):
+        self.bus_hz = bus_hz
+        self.devices = {}
+        self.lock = threading.Lock()
+        self.overlaps = 0
+        self.log = []
+        self._log_lock = threading.Lock()
+
+    def attach(self, address, device):
+        self.devices[address] = device
+        return device
+
+    def _transfer(self, addr, nbytes, fn, block=True):
+        device = self.devices.get(addr)
+        if device is None:
+            raise IOError("no device at 0x%02x" % addr)
+        if block and nbytes > I2C_BLOCK_MAX:
+            raise OverflowError("SMBus block length %d > %d" % (nbytes, I2C_BLOCK_MAX))
+        if not self.lock.acquire(False):
+            self.overlaps += 1
+            self.lock.acquire()
+        try:
+            start = time.monotonic()
+            # address + register (+ repeated-start address for reads) + payload, 9 clocks each
+            time.sleep((3 + nbytes) * 9.0 / self.bus_hz)
+            result = fn(device)
+            end = time.monotonic()
+        finally:
+            self.lock.release()
+        with self._log_lock:
+            self.log.append(Transaction(addr, start, end, nbytes))
+        return result
+
+    def read_byte_data(self, addr, reg):
+        return self._transfer(addr, 1, lambda d: d.read(reg, 1)[0])
+
+    def write_byte_data(self, addr, reg, value):
+        return self._transfer(addr, 1, lambda d: d.write(reg, [value]))
+
+    def read_word_data(self, addr, reg):
+        # SMBus words are little-endian on the wire: first byte is the low byte
+        return self._transfer(addr, 2, lambda d: (lambda b: b[0] | (b[1] << 8))(d.read(reg, 2)))
+
+    def write_word_data(self, addr, reg, value):
+        return self._transfer(addr, 2, lambda d: d.write(reg, [value & 0xFF, (value >> 8) & 0xFF]))
+
+    def read_i2c_block_data(self, addr, reg, length=32):
+        return self._transfer(addr, length, lambda d: d.read(reg, length))
+
+    def write_i2c_block_data(self, addr, reg, values):
+        values = list(values)
+        return self._transfer(addr, len(values), lambda d: d.write(reg, values))
+
+    def i2c_rdwr(self, *msgs):
+        # one combined transfer of any size (how luma sends a whole frame when it owns the bus)
+        for msg in msgs:
+            buf = list(msg.buf)
+            self._transfer(msg.addr, len(buf), lambda d: d.write(buf[0], buf[1:]), block=False)
+
+    def close(self):
+        pass
+
+    def throughput(self, since=0.0):
+        """Per address: transactions, bytes and bus time (s) of transactions that started after `since`."""
+        out = {}
+        with self._log_lock:
+            for t in self.log:
+                if t.start >= since:
+                    s = out.setdefault(t.address, {"transactions": 0, "bytes": 0, "bus_s": 0.0})
+                    s["transactions"] += 1
+                    s["bytes"] += t.nbytes
+                    s["bus_s"] += t.end - t.start
+        return out
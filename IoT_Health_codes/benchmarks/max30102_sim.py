@@ -0,0 +1,191 @@
+"""
+Simulated MAX30102 on a simulated SMBus, for benchmarks/checks of the pox_project driver
+without the sensor.
+
+SimMAX30102 models the registers the driver touches: the 32-sample FIFO with its write/read
+pointers, the overflow counter (rollover disabled: new samples are dropped while the FIFO is
+full, OVF_COUNTER counts them up to 0x1F and is cleared when a sample is popped), the
+A_FULL / PPG_RDY interrupt flags (cleared by reading INTR_STATUS_1) and register address
+auto-increment (except on FIFO_DATA). Samples come from a synthetic PPG waveform, either
+on demand (advance(n)) or in real time at `sps` samples/s; in real time a clock thread
+generates them as they fall due, so on_interrupt (the INT pin) fires without bus reads.
+
+SimSMBus counts every bus transaction and, like smbus, refuses blocks over 32 bytes.
+install() registers a fake `smbus` module so `from max30102 import MAX30102` works.
+
+    import max30102_sim
+    device = max30102_sim.install(max30102_sim.SimMAX30102(sps=25, realtime=True))
+    from max30102 import MAX30102
+"""
+import math
+import sys
+import threading
+import time
+import types
+from collections import deque
+
+REG_INTR_STATUS_1 = 0x00
+REG_INTR_ENABLE_1 = 0x02
+REG_FIFO_WR_PTR = 0x04
+REG_OVF_COUNTER = 0x05
+REG_FIFO_RD_PTR = 0x06
+REG_FIFO_DATA = 0x07
+REG_FIFO_CONFIG = 0x08
+REG_MODE_CONFIG = 0x09
+
+FIFO_DEPTH = 32
+I2C_BLOCK_MAX = 32
+
+
+def ppg_sample(i, sps, bpm=72.0):
+    """(red, ir) 18-bit counts of a synthetic finger PPG at sample index i."""
+    phase = 2 * math.pi * bpm / 60.0 * i / sps
+    wave = math.sin(phase) + 0.3 * math.sin(2 * phase)
+    return int(90000 + 1200 * wave), int(100000 + 1500 * wave)
+
+
+class SimMAX30102(object):
+
+    def __init__(self, sps=25, realtime=False, source=ppg_sample):
+        self.sps = sps
+        self.realtime = realtime
+        self.source = source
+        self.regs = bytearray(256)
+        self.regs[0xFF] = 0x15  # part id
+        self.fifo = deque()
+        self.produced = 0       # samples generated by the "ADC"
+        self.dropped = 0        # samples lost because the FIFO was full
+        self.lock = threading.RLock()
+        self.bus_lock = threading.Lock()
+        self.t0 = time.monotonic()
+        self.running = False      # MODE_CONFIG has a measurement mode and no shutdown
+        self.on_interrupt = None  # called when the INT pin would go low
+        if realtime:
+            clock = threading.Thread(target=self._clock, daemon=True)
+            clock.start()
+
+    def _clock(self):
+        while True:
+            time.sleep(1.0 / self.sps)
+            with self.lock:
+                self._catch_up()
+
+    def stall(self, seconds):
+        """Hold the bus for `seconds` (as a busy or wedged I2C bus would); the ADC keeps sampling."""
+        with self.bus_lock:
+            time.sleep(seconds)
+
+    # --- sample generation ---
+    def advance(self, n):
+        """Generate n samples now."""
+        with self.lock:
+            for _ in range(n):
+                self._push(self.source(self.produced, self.sps))
+
+    def _catch_up(self):
+        if self.realtime and self.running:
+            due = int((time.monotonic() - self.t0) * self.sps) - self.produced
+            if due > 0:
+                self.advance(due)
+
+    def _push(self, sample):
+        self.produced += 1
+        if len(self.fifo) >= FIFO_DEPTH:
+            self.dropped += 1
+            self.regs[REG_OVF_COUNTER] = min(self.regs[REG_OVF_COUNTER] + 1, 0x1F)
+            return
+        self.fifo.append(sample)
+        self.regs[REG_FIFO_WR_PTR] = (self.regs[REG_FIFO_WR_PTR] + 1) % FIFO_DEPTH
+        self.regs[REG_INTR_STATUS_1] |= 0x40  # PPG_RDY
+        if len(self.fifo) >= FIFO_DEPTH - (self.regs[REG_FIFO_CONFIG] & 0x0F):
+            if not self.regs[REG_INTR_STATUS_1] & 0x80 and self.on_interrupt is not None:
+                self.on_interrupt()
+            self.regs[REG_INTR_STATUS_1] |= 0x80  # A_FULL
+
+    # --- register access ---
+    def read(self, reg, length):
+        with self.lock:
+            self._catch_up()
+            if reg == REG_FIFO_DATA:
+                out = []
+                for _ in range(length // 6):
+                    red, ir = 0, 0
+                    if self.fifo:
+                        red, ir = self.fifo.popleft()
+                        self.regs[REG_FIFO_RD_PTR] = (self.regs[REG_FIFO_RD_PTR] + 1) % FIFO_DEPTH
+                        self.regs[REG_OVF_COUNTER] = 0
+                    out += [(red >> 16) & 0x03, (red >> 8) & 0xFF, red & 0xFF,
+                            (ir >> 16) & 0x03, (ir >> 8) & 0xFF, ir & 0xFF]
+                return out
+            out = [self.regs[(reg + k) & 0xFF] for k in range(length)]
+            if reg <= REG_INTR_STATUS_1 < reg + length:
+                self.regs[REG_INTR_STATUS_1] = 0
+            if reg <= REG_INTR_STATUS_1 + 1 < reg + length:
+                self.regs[REG_INTR_STATUS_1 + 1] = 0
+            return out
+
+    def write(self, reg, values):
+        with self.lock:
+            for k, v in enumerate(values):
+                r = (reg + k) & 0xFF
+                if r == REG_MODE_CONFIG and v & 0x40:
+                    # reset: registers back to power-on values, FIFO emptied
+                    self.regs[:0xFF] = bytes(0xFF)
+                    self.fifo.clear()
+                    continue
+                if r == REG_MODE_CONFIG:
+                    self._catch_up()
+                    self.running = bool(v & 0x07) and not v & 0x80
+                    # the sample clock (re)starts now
+                    self.t0 = time.monotonic() - self.produced / float(self.sps)
+                self.regs[r] = v
+                if r in (REG_FIFO_WR_PTR, REG_FIFO_RD_PTR):
+                    self.fifo.clear()
+                    self.regs[REG_FIFO_WR_PTR] = self.regs[REG_FIFO_RD_PTR] = 0
+
+
+class SimSMBus(object):
+    """smbus.SMBus look-alike on a SimMAX30102 that counts transactions."""
+
+    def __init__(self, device, address=0x57):
+        self.device = device
+        self.address = address
+        self.transactions = 0
+        self.bytes_read = 0
+
+    def _check(self, addr, length):
+        with self.device.bus_lock:
+            pass
+        if addr != self.address:
+            raise IOError("no device at 0x%02x" % addr)
+        if length > I2C_BLOCK_MAX:
+            raise OverflowError("SMBus block length %d > %d" % (length, I2C_BLOCK_MAX))
+        self.transactions += 1
+        self.bytes_read += length
+
+    def read_byte_data(self, addr, reg):
+        self._check(addr, 1)
+        return self.device.read(reg, 1)[0]
+
+    def read_i2c_block_data(self, addr, reg, length=32):
+        self._check(addr, length)
+        return self.device.read(reg, length)
+
+    def write_byte_data(self, addr, reg, value):
+        self._check(addr, 0)
+        self.device.write(reg, [value])
+
+    def write_i2c_block_data(self, addr, reg, values):
+        self._check(addr, 0)
+        self.device.write(reg, list(values))
+
+    def close(self):
+        pass
+
+
+def install(device):
+    """Make `import smbus` return a module whose SMBus(channel) talks to device; returns device."""
+    module = types.ModuleType('smbus')
+    module.SMBus = lambda channel=1: SimSMBus(device)
+    sys.modules['smbus'] = module
+    return device
@@ -1,11 +1,20 @@
 import os
 import sys
+import io
+import csv
+import json
 import time
-from flask import Flask, render_template, request, jsonify
+from datetime import datetime, timedelta
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import sqlite3
 import subprocess
+import threading
 from dotenv import load_dotenv
 from oled_ui import display_message
+from value_cache import DecryptedValueCache
+from qa_mirror import QAMirror
+from live_stream import LiveHub
+from db_pool import ConnectionPool
 
 
 # === chat_verb (Ollama backend) ===
@@ -22,19 +31,28 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from utils.encryption_utils import decrypt_field
+from health_database.enc_keys import decrypt, ensure_key_id_columns
+from health_database.crypto_batch import decrypt_many
+from health_database.rollups import unpack_stats
+from acquisition.client import AcquisitionClient, AcquisitionError, FINAL_STATES
 
 # Load environment variables from project root
 load_dotenv(os.path.join(ROOT, '.env'))
 
-# Δείξε welcome μήνυμα στην OLED με το ξεκίνημα του service
-try:
-    display_message("IoT_Health", "Welcome!", False)
-except Exception as e:
-    app.logger.warning(f"Could not display welcome message: {e}")
-
 app = Flask(__name__)
 
+
+# Δείξε welcome μήνυμα στην OLED με το ξεκίνημα του service· σε δικό του thread, ώστε
+# το άνοιγμα της οθόνης (luma, PIL, I2C) να μην καθυστερεί την πρώτη απάντηση
+def _welcome():
+    try:
+        display_message("IoT_Health", "Welcome!", False)
+    except Exception as e:
+        app.logger.warning(f"Could not display welcome message: {e}")
+
+
+threading.Thread(target=_welcome, name='oled-welcome', daemon=True).start()
+
 # Warn if encryption key is missing
 if not os.getenv('DB_ENC_KEY'):
     app.logger.warning('DB_ENC_KEY is not set in .env — decrypt_field may fail; proceeding with best-effort (values will be None).')
@@ -47,6 +65,40 @@ MCP9808_SCRIPT = os.path.join(ROOT, 'temp_project', 'mcp9808_read_db.py')
 ECG_SCRIPT     = os.path.join(ROOT, 'ecg_project', 'spicheck_print_values_db.py')
 MAX30102_SCRIPT= os.path.join(ROOT, 'pox_project', 'max30102_only_spo2_db_02.py')
 
+# Measurements run as jobs in the acquisition daemon (acquisition/daemon.py, socket ACQ_SOCKET);
+# when it is not running the routes fall back to running the scripts above
+acq = AcquisitionClient()
+# longest wait for a job before the OLED gives up on showing "Finished!"
+ACQ_JOB_TIMEOUT_S = float(os.getenv('ACQ_JOB_TIMEOUT_S', '900'))
+# Live measurement data (/api/live): at most LIVE_RATE_HZ frames/s to every viewer
+live_hub = LiveHub(acq.events, rate_hz=float(os.getenv('LIVE_RATE_HZ', '4')))
+
+# Rows record the key that encrypted them (key_id, see health_database/enc_keys.py); older
+# databases get the column here so reads keep working while rotate_key.py runs.
+try:
+    ensure_key_id_columns(DB_PATH)
+except sqlite3.Error as e:
+    app.logger.error(f"Could not add key_id columns: {e}")
+
+# One reusable connection per request thread; SQLITE_BUSY_TIMEOUT_MS covers the sensor scripts' commits
+db_pool = ConnectionPool(DB_PATH, busy_timeout_ms=int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')))
+
+# Decrypted values keyed by (table, id); rows never change so entries stay valid.
+# Budget in MB via DECRYPT_CACHE_MB (default 32).
+value_cache = DecryptedValueCache(max_bytes=float(os.getenv('DECRYPT_CACHE_MB', '32')) * 1024 * 1024)
+
+# Reads with more rows to decrypt than this go through decrypt_many's thread pool
+BULK_DECRYPT_THRESHOLD = int(os.getenv('BULK_DECRYPT_THRESHOLD', '2000'))
+
+# Tables served by /api/series and the point counts it accepts
+SERIES_TABLES = ('temp_data', 'spo2_data', 'ecg_data')
+SERIES_DEFAULT_POINTS = 1000
+SERIES_MAX_POINTS = 10000
+
+# Exports: tables and rows fetched/decrypted per step (ecg_chunks rows are whole chunks)
+EXPORT_TABLES = {'temp_data': 'enc_temp', 'spo2_data': 'enc_spo2', 'ecg_data': 'enc_ecg', 'ecg_chunks': 'enc_samples'}
+EXPORT_BATCH_ROWS = int(os.getenv('EXPORT_BATCH_ROWS', '1000'))
+
 
 # ---- Global JSON error handler (so the UI never gets HTML) ----
 @app.errorhandler(Exception)
@@ -56,29 +108,100 @@ def _json_errors(e):
 
 
 def get_db_connection():
+    """This thread's pooled connection; do not close it (it is released on app-context teardown)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return db_pool.connection()
     except sqlite3.Error as e:
         app.logger.error(f"Database connection error: {e}")
         return None
 
 
+@app.teardown_appcontext
+def _release_db_connection(exc):
+    db_pool.release()
+
+
+def day_range(day):
+    """Half-open bounds ('YYYY-MM-DD', next day) for a day, or None if it is not a valid date.
+       timestamp >= start AND timestamp < end can use idx_<table>_timestamp; date(timestamp)=? cannot."""
+    try:
+        start = datetime.strptime(day, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+    return start.isoformat(), (start + timedelta(days=1)).isoformat()
+
+
 def get_latest_date(table):
     conn = get_db_connection()
     if not conn:
         return None
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"SELECT MAX(timestamp) as latest FROM {table}")
-        result = cursor.fetchone()
+
+    def query():
+        # MAX() over an indexed column is a single index lookup (see init_db.create_timestamp_indexes)
+        result = conn.execute(f"SELECT MAX(timestamp) as latest FROM {table}").fetchone()
         return result['latest'].split(' ')[0] if result['latest'] else None
+
+    try:
+        # re-queried only after a sensor script has committed new rows
+        return db_pool.cached(('latest_date', table), query)
     except sqlite3.Error as e:
         app.logger.error(f"Error getting latest date from {table}: {e}")
         return None
-    finally:
-        conn.close()
+
+
+def get_latest_ecg_date():
+    # New recordings live in ecg_chunks; days that were never migrated are still in ecg_data
+    return max(filter(None, [get_latest_date('ecg_chunks'), get_latest_date('ecg_data')]), default=None)
+
+
+def decrypt_value(table, blob, key_id=None):
+    """Decrypt one enc_* BLOB (stored under key_id) to float (None if missing or undecryptable)."""
+    if blob is None:
+        return None
+    try:
+        pt = decrypt(blob, key_id)
+        return float(pt.decode())
+    except Exception as ex:
+        app.logger.warning(f"Decrypt/parse failed for {table}: {ex}")
+        return None
+
+
+def decrypt_values(table, blobs, key_ids):
+    """decrypt_value for a list of blobs; large lists are decrypted in parallel with decrypt_many."""
+    if len(blobs) < BULK_DECRYPT_THRESHOLD:
+        return [decrypt_value(table, blob, key_id) for blob, key_id in zip(blobs, key_ids)]
+    values = []
+    failed = 0
+    for blob, pt in zip(blobs, decrypt_many(blobs, threshold=BULK_DECRYPT_THRESHOLD, key_ids=key_ids)):
+        try:
+            values.append(float(pt.decode()) if pt is not None else None)
+        except ValueError:
+            values.append(None)
+        failed += (values[-1] is None and blob is not None)
+    if failed:
+        app.logger.warning(f"Decrypt/parse failed for {failed} row(s) of {table}")
+    return values
+
+
+def decode_rows(table, rows, blob_col):
+    """
+    Turn (id, timestamp, blob, key_id) rows into [{'id','timestamp','value'}], decrypting only
+    rows that are not already in value_cache. Failed decrypts are not cached.
+    """
+    cached = value_cache.get_many(table, [row['id'] for row in rows])
+    missing = [row for row in rows if row['id'] not in cached]
+    decrypted = dict(zip((row['id'] for row in missing),
+                         decrypt_values(table, [row[blob_col] for row in missing],
+                                        [row['key_id'] for row in missing])))
+    fresh = [(id_, val) for id_, val in decrypted.items() if val is not None]
+    result = []
+    for row in rows:
+        id_ = row['id']
+        val = cached[id_] if id_ in cached else decrypted[id_]
+        result.append({'id': id_, 'timestamp': row['timestamp'], 'value': val})
+    if fresh:
+        value_cache.put_many(table, fresh)
+    return result
 
 
 # Original reader (all rows when date=None)
@@ -98,36 +221,24 @@ def get_data_OLD(table, date=None):
 
     try:
         if date:
-            cursor.execute(f"SELECT id, timestamp, {blob_col} FROM {table} WHERE date(timestamp)=?", (date,))
+            bounds = day_range(date)
+            if not bounds:
+                return []
+            cursor.execute(f"SELECT id, timestamp, {blob_col}, key_id FROM {table} WHERE timestamp >= ? AND timestamp < ?", bounds)
         else:
-            cursor.execute(f"SELECT id, timestamp, {blob_col} FROM {table}")
+            cursor.execute(f"SELECT id, timestamp, {blob_col}, key_id FROM {table}")
 
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            blob = row[blob_col]
-            if blob is not None:
-                try:
-                    pt = decrypt_field(blob)
-                    val = float(pt.decode())
-                except Exception as ex:
-                    app.logger.warning(f"Decrypt/parse failed for {table}: {ex}")
-                    val = None
-            else:
-                val = None
-            result.append({'id': row['id'], 'timestamp': row['timestamp'], 'value': val})
-        return result
+        return decode_rows(table, cursor.fetchall(), blob_col)
     except sqlite3.Error as e:
         app.logger.error(f"Error fetching data from {table}: {e}")
         return []
-    finally:
-        conn.close()
 
 
 # Current reader used by pages (returns selected day or latest-day only)
-def get_data(table, date=None, latest_date=None):
+def get_data(table, date=None, latest_date=None, bounds=None):
     """Fetch and decrypt data for the given table.
-       If no date is given, fall back to latest_date (if provided)."""
+       If no date is given, fall back to latest_date (if provided).
+       bounds=(start, end) reads that half-open range instead of a single day."""
     conn = get_db_connection()
     if not conn:
         return []
@@ -144,31 +255,140 @@ def get_data(table, date=None, latest_date=None):
         date = latest_date
 
     try:
-        if date:
-            cursor.execute(f"SELECT id, timestamp, {blob_col} FROM {table} WHERE date(timestamp)=?", (date,))
+        bounds = bounds or (day_range(date) if date else None)
+        if bounds:
+            cursor.execute(f"SELECT id, timestamp, {blob_col}, key_id FROM {table} WHERE timestamp >= ? AND timestamp < ? "
+                           "ORDER BY timestamp", bounds)
         else:
             return []
 
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            blob = row[blob_col]
-            if blob is not None:
-                try:
-                    pt = decrypt_field(blob)
-                    val = float(pt.decode())
-                except Exception as ex:
-                    app.logger.warning(f"Decrypt/parse failed for {table}: {ex}")
-                    val = None
-            else:
-                val = None
-            result.append({'id': row['id'], 'timestamp': row['timestamp'], 'value': val})
-        return result
+        return decode_rows(table, cursor.fetchall(), blob_col)
     except sqlite3.Error as e:
         app.logger.error(f"Error fetching data from {table}: {e}")
         return []
-    finally:
-        conn.close()
+
+
+# Chunked ECG reader (ecg_chunks: one encrypted int16 array per row)
+def get_ecg_chunks(date, bounds=None):
+    """
+    Decrypt the ECG chunks of one day (or of bounds=(start, end)) into NumPy arrays
+    (t, values): t is datetime64[ms] per sample, values int16 ADC readings. Built from
+    one np.frombuffer per chunk, with no per-sample Python objects.
+    """
+    import numpy as np  # only the chart/export paths need it; keeps it out of startup
+    empty = (np.empty(0, dtype='datetime64[ms]'), np.empty(0, dtype='<i2'))
+    bounds = bounds or (day_range(date) if date else None)
+    if not bounds:
+        return empty
+    conn = get_db_connection()
+    if not conn:
+        return empty
+    try:
+        rows = conn.execute(
+            "SELECT timestamp, sample_rate, enc_samples, key_id FROM ecg_chunks "
+            "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp", bounds
+        ).fetchall()
+    except sqlite3.Error as e:
+        app.logger.error(f"Error fetching data from ecg_chunks: {e}")
+        return empty
+
+    parts, starts, rates = [], [], []
+    # chunks are few but large; a multi-day read still benefits from the pool
+    for row, pt in zip(rows, decrypt_many([row['enc_samples'] for row in rows], threshold=64,
+                                          key_ids=[row['key_id'] for row in rows])):
+        if pt is None:
+            app.logger.warning(f"Decrypt failed for ecg_chunks row at {row['timestamp']}")
+            continue
+        parts.append(np.frombuffer(pt, dtype='<i2'))
+        starts.append(row['timestamp'])
+        rates.append(row['sample_rate'])
+    if not parts:
+        return empty
+
+    values = np.concatenate(parts)
+    counts = np.array([p.size for p in parts])
+    first = np.repeat(np.cumsum(counts) - counts, counts)  # index of each sample's chunk start
+    step_ms = np.repeat(1000.0 / np.array(rates, dtype=float), counts)
+    t = (np.repeat(np.array(starts, dtype='datetime64[ms]'), counts)
+         + ((np.arange(values.size) - first) * step_ms).astype('timedelta64[ms]'))
+    return t, values
+
+
+def get_series(table, bounds):
+    """
+    One table's samples in bounds as time-ordered arrays (t datetime64[ms], values float).
+    ECG comes from ecg_chunks, falling back to the legacy ecg_data rows.
+    """
+    import numpy as np
+    if table == 'ecg_data':
+        t, values = get_ecg_chunks(None, bounds=bounds)
+        if values.size:
+            return t, values.astype(float)
+    rows = [row for row in get_data(table, bounds=bounds) if row['value'] is not None]
+    t = np.array([row['timestamp'] for row in rows], dtype='datetime64[ms]')
+    return t, np.array([row['value'] for row in rows], dtype=float)
+
+
+def series_labels(t):
+    """datetime64[ms] array -> 'YYYY-MM-DD HH:MM:SS.mmm' strings for the chart axis."""
+    import numpy as np
+    if not t.size:
+        return []
+    return np.char.replace(np.datetime_as_string(t, unit='ms'), 'T', ' ').tolist()
+
+
+def range_bounds(start, end):
+    """Inclusive day range -> (start, day after end, number of days), or None if invalid."""
+    first, last = day_range(start), day_range(end)
+    if not first or not last or last[0] < first[0]:
+        return None
+    days = (datetime.strptime(last[0], '%Y-%m-%d') - datetime.strptime(first[0], '%Y-%m-%d')).days + 1
+    return first[0], last[1], days
+
+
+def get_rollups(vital, resolution, start, end):
+    """Decrypted rollup buckets of a vital in [start, end): [{'timestamp','value'(avg),'min','max','n'}]."""
+    conn = get_db_connection()
+    if not conn:
+        return []
+    try:
+        rows = conn.execute(
+            "SELECT bucket, enc_stats, key_id FROM rollups WHERE vital=? AND resolution=? AND bucket >= ? AND bucket < ? "
+            "ORDER BY bucket", (vital, resolution, start, end)
+        ).fetchall()
+    except sqlite3.Error as e:
+        app.logger.error(f"Error fetching rollups for {vital}: {e}")
+        return []
+
+    result = []
+    for row, pt in zip(rows, decrypt_many([row['enc_stats'] for row in rows], threshold=BULK_DECRYPT_THRESHOLD,
+                                          key_ids=[row['key_id'] for row in rows])):
+        if pt is None:
+            continue
+        s = unpack_stats(pt)
+        result.append({'timestamp': row['bucket'], 'value': round(s['avg'], 2),
+                       'min': s['min'], 'max': s['max'], 'n': s['n']})
+    return result
+
+
+def get_range_rollups(vital):
+    """
+    For ?start=&end= spanning more than one day, return (data, resolution) from the rollups
+    (hourly up to a week, daily beyond). None means: show the single-day raw view.
+    """
+    bounds = range_bounds(request.args.get('start'), request.args.get('end'))
+    if not bounds or bounds[2] <= 1:
+        return None
+    resolution = 'hour' if bounds[2] <= 7 else 'day'
+    return get_rollups(vital, resolution, bounds[0], bounds[1]), resolution
+
+
+def selected_day():
+    """The day to show raw: ?date=, or the day of a one-day ?start=D&end=D range."""
+    bounds = range_bounds(request.args.get('start'), request.args.get('end'))
+    if bounds and bounds[2] == 1:
+        return bounds[0]
+    return request.args.get('date')
 
 
 # Small helper for Q&A: get ALL rows (decrypted)
@@ -176,60 +396,77 @@ def get_all_data(table):
     return get_data_OLD(table, date=None)
 
 
-# === In-memory mirror for Q&A (Temperature & SpO2 only) ===
+# Incremental reader for the Q&A mirror: rows with id > after_id, decrypted, in id order
+def get_data_after(table, after_id):
+    conn = get_db_connection()
+    if not conn:
+        return []
+    cursor = conn.cursor()
+    blob_col = 'enc_spo2' if table == 'spo2_data' else 'enc_temp'
+    try:
+        cursor.execute(f"SELECT id, timestamp, {blob_col}, key_id FROM {table} WHERE id > ? ORDER BY id", (after_id,))
+        rows = cursor.fetchall()
+        values = decrypt_values(table, [row[blob_col] for row in rows], [row['key_id'] for row in rows])
+        return [
+            {'id': row['id'], 'timestamp': row['timestamp'], 'value': val}
+            for row, val in zip(rows, values)
+        ]
+    except sqlite3.Error as e:
+        app.logger.error(f"Error fetching new rows from {table}: {e}")
+        return []
+
 
-def make_inmemory_conn(temp_rows, spo2_rows):
+def iter_export_batches(table, bounds=None, batch_rows=EXPORT_BATCH_ROWS):
     """
-    Create an in-memory SQLite with two simple tables fed by already-decrypted data.
-    IMPORTANT: set PRAGMA query_only=ON *after* creating & populating tables,
-    otherwise CREATE/INSERT will fail with 'attempt to write a readonly database'.
+    Yield the table's decrypted samples as lists of (timestamp, value), one list per
+    fetchmany() batch, so only one batch is in memory at a time. bounds=None exports
+    everything. ecg_chunks rows are expanded to one (timestamp with ms, value) per sample.
+    Runs inside a streaming response, so it opens and closes its own connection.
     """
-    mem = sqlite3.connect(":memory:")
-
-    # 1) CREATE schema (allow writes εδώ)
-    mem.execute("""
-        CREATE TABLE temp_data (
-            id INTEGER PRIMARY KEY,
-            timestamp TEXT NOT NULL,
-            temp REAL
-        );
-    """)
-    mem.execute("""
-        CREATE TABLE spo2_data (
-            id INTEGER PRIMARY KEY,
-            timestamp TEXT NOT NULL,
-            spo2 REAL
-        );
-    """)
-
-    # 2) INSERT data
-    if temp_rows:
-        mem.executemany(
-            "INSERT INTO temp_data(id,timestamp,temp) VALUES (?,?,?)",
-            [
-                (i + 1, r['timestamp'], float(r['value']))
-                for i, r in enumerate(temp_rows)
-                if r.get('value') is not None
-            ],
-        )
-    if spo2_rows:
-        mem.executemany(
-            "INSERT INTO spo2_data(id,timestamp,spo2) VALUES (?,?,?)",
-            [
-                (i + 1, r['timestamp'], float(r['value']))
-                for i, r in enumerate(spo2_rows)
-                if r.get('value') is not None
-            ],
-        )
-    mem.commit()
-
-    # 3) ΤΩΡΑ κάνε το read-only
+    import numpy as np
+    blob_col = EXPORT_TABLES[table]
+    extra = ", sample_rate" if table == 'ecg_chunks' else ""
+    where = "WHERE timestamp >= ? AND timestamp < ? " if bounds else ""
+    if table == 'ecg_chunks':
+        batch_rows = max(1, batch_rows // 100)  # a chunk holds hundreds of samples
+    conn = get_db_connection()
+    if not conn:
+        return
+    cursor = None
     try:
-        mem.execute("PRAGMA query_only=ON;")
-    except sqlite3.Error:
-        pass
+        cursor = conn.execute(f"SELECT timestamp, {blob_col}, key_id{extra} FROM {table} {where}ORDER BY timestamp",
+                              bounds or ())
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            blobs = [row[blob_col] for row in rows]
+            key_ids = [row['key_id'] for row in rows]
+            if table != 'ecg_chunks':
+                yield [(row['timestamp'], val) for row, val in zip(rows, decrypt_values(table, blobs, key_ids))]
+                continue
+            batch = []
+            for row, pt in zip(rows, decrypt_many(blobs, threshold=64, key_ids=key_ids)):
+                if pt is None:
+                    app.logger.warning(f"Decrypt failed for ecg_chunks row at {row['timestamp']}")
+                    continue
+                values = np.frombuffer(pt, dtype='<i2')
+                t = (np.datetime64(row['timestamp'], 'ms')
+                     + (np.arange(values.size) * (1000.0 / row['sample_rate'])).astype('timedelta64[ms]'))
+                batch.extend(zip(series_labels(t), values.tolist()))
+            yield batch
+    except sqlite3.Error as e:
+        # headers are already sent; the client sees a truncated file
+        app.logger.error(f"Export of {table} aborted: {e}")
+    finally:
+        # also runs if the client disconnects; an unfinished cursor would keep the read lock
+        if cursor is not None:
+            cursor.close()
+
 
-    return mem
+# === In-memory mirror for Q&A (Temperature & SpO2 only) ===
+# Built on the first question, then only new rows are decrypted and appended.
+qa_mirror = QAMirror(get_data_after)
 
 
 
@@ -241,16 +478,26 @@ def index():
 
 @app.route('/temperature')
 def temperature():
-    selected_date = request.args.get('date')
+    selected_date = selected_day()
     latest_date = get_latest_date('temp_data')
+    ranged = get_range_rollups('temp')
+    if ranged:
+        data, resolution = ranged
+        return render_template('temperature.html', data=data, selected_date=None, latest_date=latest_date,
+                               start=request.args.get('start'), end=request.args.get('end'), resolution=resolution)
     data = get_data('temp_data', selected_date, latest_date)
     return render_template('temperature.html', data=data, selected_date=selected_date, latest_date=latest_date)
 
 
 @app.route('/spo2')
 def spo2():
-    selected_date = request.args.get('date')
+    selected_date = selected_day()
     latest_date = get_latest_date('spo2_data')
+    ranged = get_range_rollups('spo2')
+    if ranged:
+        data, resolution = ranged
+        return render_template('spo2.html', data=data, selected_date=None, latest_date=latest_date,
+                               start=request.args.get('start'), end=request.args.get('end'), resolution=resolution)
     data = get_data('spo2_data', selected_date, latest_date)
     return render_template('spo2.html', data=data, selected_date=selected_date, latest_date=latest_date)
 
@@ -258,9 +505,9 @@ def spo2():
 @app.route('/ecg')
 def ecg():
     selected_date = request.args.get('date')
-    latest_date = get_latest_date('ecg_data')
-    data = get_data('ecg_data', selected_date, latest_date)
-    return render_template('ecg.html', data=data, selected_date=selected_date, latest_date=latest_date)
+    latest_date = get_latest_ecg_date()
+    # The chart itself is loaded from /api/series/ecg_data
+    return render_template('ecg.html', selected_date=selected_date, latest_date=latest_date)
 
 
 # === Q&A UI ===
@@ -282,12 +529,8 @@ def qa_api():
     if not question:
         return jsonify({"error": "Empty question"}), 400
 
-    # 1) Πάρε ΟΛΑ τα αποκρυπτογραφημένα δεδομένα
-    temp_rows = get_all_data('temp_data')   # [{'timestamp','value'}, ...]
-    spo2_rows = get_all_data('spo2_data')
-
-    # 2) In-memory SQLite
-    conn = make_inmemory_conn(temp_rows, spo2_rows)
+    # 1+2) Read-only snapshot of the in-memory mirror (tops up only rows added since last question)
+    conn = qa_mirror.snapshot()
 
     # 3) Κλήση στο Ollama – πιάστο αν σκάσει, και δώσε fallback
     try:
@@ -336,36 +579,239 @@ def qa_api():
     })
 
 
-# ---- Sensor script runners ----
+@app.route('/api/series/<table>')
+def series_api(table):
+    """
+    Chart series for ?date= (default: latest day) or ?start=&end= (inclusive days),
+    downsampled with LTTB to at most ?points= points. ?from=&to= (timestamps) narrow it
+    to the zoomed window, which is returned at full resolution once it fits in points.
+    """
+    import numpy as np
+    from lttb import lttb
+    if table not in SERIES_TABLES:
+        return jsonify({"error": f"Unknown table {table}"}), 404
+    try:
+        points = min(max(int(request.args.get('points', SERIES_DEFAULT_POINTS)), 3), SERIES_MAX_POINTS)
+    except ValueError:
+        return jsonify({"error": "points must be an integer"}), 400
+
+    if request.args.get('start') or request.args.get('end'):
+        bounds = range_bounds(request.args.get('start'), request.args.get('end'))
+        bounds = bounds[:2] if bounds else None
+    else:
+        date = request.args.get('date')
+        if not date:
+            date = get_latest_ecg_date() if table == 'ecg_data' else get_latest_date(table)
+        bounds = day_range(date)
+    if not bounds:
+        return jsonify({"error": "Invalid date or range"}), 400
+
+    t, values = get_series(table, bounds)
+    try:
+        if request.args.get('from'):
+            keep = t >= np.datetime64(request.args['from'].replace(' ', 'T'), 'ms')
+            t, values = t[keep], values[keep]
+        if request.args.get('to'):
+            keep = t <= np.datetime64(request.args['to'].replace(' ', 'T'), 'ms')
+            t, values = t[keep], values[keep]
+    except ValueError:
+        return jsonify({"error": "from/to must be timestamps"}), 400
+
+    idx = lttb(t.astype(np.int64), values, points)
+    return jsonify({
+        "table": table,
+        "total": int(values.size),
+        "points": int(idx.size),
+        "downsampled": bool(idx.size < values.size),
+        "timestamp": series_labels(t[idx]),
+        "value": values[idx].tolist(),
+    })
+
+
+@app.route('/api/export/<table>')
+def export_api(table):
+    """
+    Stream a table as NDJSON (default) or CSV (?format=csv): every row, or ?date= /
+    ?start=&end= (inclusive days). Rows are fetched and decrypted in batches and
+    written out as they go, so memory stays flat however long the range is.
+    """
+    if table not in EXPORT_TABLES:
+        return jsonify({"error": f"Unknown table {table}"}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+
+    bounds = None
+    if request.args.get('start') or request.args.get('end'):
+        bounds = range_bounds(request.args.get('start'), request.args.get('end'))
+        bounds = bounds[:2] if bounds else None
+        if not bounds:
+            return jsonify({"error": "Invalid range"}), 400
+    elif request.args.get('date'):
+        bounds = day_range(request.args.get('date'))
+        if not bounds:
+            return jsonify({"error": "Invalid date"}), 400
+
+    def generate():
+        if fmt == 'csv':
+            yield "timestamp,value\r\n"
+        for batch in iter_export_batches(table, bounds):
+            if fmt == 'csv':
+                buf = io.StringIO()
+                csv.writer(buf).writerows(batch)
+                yield buf.getvalue()
+            else:
+                yield "".join(json.dumps({"timestamp": ts, "value": val}) + "\n" for ts, val in batch)
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f"{table}.{fmt}"
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+@app.route('/api/cache_stats')
+def cache_stats():
+    return jsonify({**value_cache.stats(), "db_pool": db_pool.stats()})
+
+
+# ---- Sensor measurements (acquisition daemon jobs) ----
+def _show_job_end(job_id):
+    """OLED "Finished!" once the job is over (runs on its own thread)."""
+    deadline = time.monotonic() + ACQ_JOB_TIMEOUT_S
+    try:
+        job = acq.status(job_id)
+        while job["state"] not in FINAL_STATES and time.monotonic() < deadline:
+            job = acq.wait(job_id, timeout=30.0)
+    except (OSError, AcquisitionError) as e:
+        app.logger.warning(f"Lost track of acquisition job {job_id}: {e}")
+        return
+    if job["state"] == 'done':
+        display_message("IoT_Health", "Finished!", False)
+    elif job["state"] == 'failed':
+        display_message("IoT_Health", "Measurement failed", False)
+    elif job["state"] == 'cancelled':
+        display_message("IoT_Health", "Cancelled", False)
+
+
+def start_measurement(kind, script, message, progress=True):
+    """
+    Submit a job and answer 202 with its id at once; the page follows it through
+    /api/jobs/<id>. Parameters come from the JSON body (e.g. {"rate": 250} for ECG).
+    When the daemon is not running the script runs here as before, answering 200 when
+    it is done (503 for jobs that have no script). Any other socket error answers 503:
+    the daemon may have taken the job, so the sensor must not be driven from here too.
+    """
+    display_message("IoT_Health", message, progress)
+    try:
+        job = acq.submit(kind, **(request.get_json(silent=True) or {}))
+    except AcquisitionError as e:
+        display_message("IoT_Health", "Finished!", False)
+        return jsonify({"error": str(e)}), 400
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        if script is None:
+            display_message("IoT_Health", "Finished!", False)
+            return jsonify({"error": f"acquisition daemon unavailable: {e}"}), 503
+        app.logger.warning(f"Acquisition daemon unavailable ({e}); running {script} directly")
+        subprocess.run(['python3', script], check=True)
+        display_message("IoT_Health", "Finished!", False)
+        return ('', 200)
+    except OSError as e:
+        app.logger.warning(f"Acquisition daemon did not answer the {kind} submission: {e}")
+        display_message("IoT_Health", "Measurement failed", False)
+        return jsonify({"error": f"acquisition daemon did not answer: {e}"}), 503
+
+    threading.Thread(target=_show_job_end, args=(job["id"],), daemon=True).start()
+    return jsonify({"job_id": job["id"], "job": job}), 202
+
+
 @app.route('/run_mcp9808', methods=['POST'])
 def run_mcp9808():
-    display_message("IoT_Health", "Measuring Temperature...", True)
-    
-    subprocess.run(['python3', MCP9808_SCRIPT], check=True)
-    
-    display_message("IoT_Health", "Finished!", False)
-    
-    return ('', 200)
+    return start_measurement('temperature', MCP9808_SCRIPT, "Measuring Temperature...")
 
 
 @app.route('/run_ecg', methods=['POST'])
 def run_ecg_script():
-    display_message("IoT_Health", "Measuring ECG signals...", True)
-        
-    subprocess.run(['python3', ECG_SCRIPT], check=True)
-    
-    display_message("IoT_Health", "Finished!", False)
-    return ('', 200)
+    return start_measurement('ecg', ECG_SCRIPT, "Measuring ECG signals...")
 
 
 @app.route('/run_max30102', methods=['POST'])
 def run_max_script():
-    display_message("IoT_Health", "Measuring SpO2...", True)
-    
-    subprocess.run(['python3', MAX30102_SCRIPT], check=True)
-    
-    display_message("IoT_Health", "Finished!", False)
-    return ('', 200)
+    return start_measurement('spo2', MAX30102_SCRIPT, "Measuring SpO2...")
+
+
+@app.route('/run_session', methods=['POST'])
+def run_session():
+    # All vitals at once; the daemon draws live values on the OLED through its I2C
+    # arbiter, so no progress animation from this process competes for the bus.
+    # JSON body: {"duration": s, "rate": ECG Hz}
+    return start_measurement('session', None, "Measuring all vitals...", progress=False)
+
+
+@app.route('/api/jobs')
+def jobs_api():
+    try:
+        return jsonify(acq.jobs())
+    except OSError as e:
+        return jsonify({"error": f"acquisition daemon unavailable: {e}"}), 503
+
+
+@app.route('/api/jobs/<job_id>')
+def job_api(job_id):
+    """
+    A job's state and progress. With ?wait=S it long-polls: the answer comes when the job
+    changed after ?version=V (or finished, without version), or after S seconds (max 30).
+    """
+    try:
+        wait = min(float(request.args.get('wait', 0)), 30.0)
+        version = request.args.get('version', type=int)
+    except ValueError:
+        return jsonify({"error": "wait must be a number"}), 400
+    try:
+        job = acq.wait(job_id, version, timeout=wait) if wait > 0 else acq.status(job_id)
+    except AcquisitionError as e:
+        return jsonify({"error": str(e)}), 404
+    except OSError as e:
+        return jsonify({"error": f"acquisition daemon unavailable: {e}"}), 503
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job_api(job_id):
+    try:
+        return jsonify(acq.cancel(job_id))
+    except AcquisitionError as e:
+        return jsonify({"error": str(e)}), 404
+    except OSError as e:
+        return jsonify({"error": f"acquisition daemon unavailable: {e}"}), 503
+
+
+@app.route('/api/live')
+def live_api():
+    """
+    Server-Sent Events while measurements run: a 'status' event on connect, then 'live'
+    frames with the new temperature/SpO2 readings and filtered ECG blocks, the running
+    jobs and the ones that ended. One daemon follower serves every viewer (see LiveHub).
+    """
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(stream_with_context(live_hub.stream(last_id)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/live/ecg')
+def live_ecg_api():
+    """
+    The live ECG waveform as a chunked binary stream of ecg_wire frames (start time,
+    sample rate, delta-encoded int16 samples), decoded by static/js/ecg_stream.js.
+    ?after=<frame id> resumes after a reconnect.
+    """
+    after = request.args.get('after', type=int)
+    return Response(stream_with_context(live_hub.stream_ecg(after)), mimetype='application/octet-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/live/stats')
+def live_stats():
+    return jsonify(live_hub.stats())
 
 
 @app.route('/shutdown', methods=['POST'])
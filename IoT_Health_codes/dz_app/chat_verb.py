@@ -1,7 +1,7 @@
 # chat_verb_fixed.py — Improved LLM-to-SQL translator for app8.py
 # Fixes: temperature→temp mapping, proper daily aggregates, English-only verbalizer
 
-import os, re, time, json, sqlite3, requests
+import os, re, time, json, sqlite3
 from typing import List, Tuple, Any
 
 # === Ollama Config ===
@@ -17,7 +17,10 @@ HTTP_TIMEOUT = int(os.environ.get("OLLAMA_TIMEOUT", "120"))
 SCHEMA = """
 CREATE TABLE temp_data (id INTEGER PRIMARY KEY, timestamp TEXT, temp REAL);
 CREATE TABLE spo2_data (id INTEGER PRIMARY KEY, timestamp TEXT, spo2 REAL);
+CREATE TABLE temp_rollup (resolution TEXT, bucket TEXT, n INTEGER, min_temp REAL, max_temp REAL, avg_temp REAL);
+CREATE TABLE spo2_rollup (resolution TEXT, bucket TEXT, n INTEGER, min_spo2 REAL, max_spo2 REAL, avg_spo2 REAL);
 Mapping: temperature/temp → temp_data.temp, SpO2/oxygen → spo2_data.spo2.
+Rollups: resolution is 'minute', 'hour' or 'day'; bucket is 'YYYY-MM-DD' for days, 'YYYY-MM-DD HH:00:00' for hours.
 """
 
 GUIDANCE = r""" Use this minimal guidance to produce clear, correct SQL for the temp_data and spo2_data tables. Keep it concise — fewer rules, less confusion.
@@ -42,6 +45,10 @@ When user asks for daily results: SELECT date(timestamp) AS day, FROM GROUP BY d
 
 Always aggregate metrics (AVG(temp), AVG(spo2), etc). No raw timestamp with aggregates.
 
+Pre-aggregated daily/hourly values (faster, same results):
+
+SELECT bucket AS day, avg_temp, min_temp, max_temp FROM temp_rollup WHERE resolution = 'day' ORDER BY day;
+
 Average / aggregates (non-daily):
 
 Example: SELECT AVG(temp) AS avg_temp FROM temp_data [WHERE ...];
@@ -83,6 +90,7 @@ def ollama_chat(messages, model=MODEL_NAME, num_predict=200, temperature=TEMPERA
             "num_predict": int(num_predict),
         },
     }
+    import requests  # imported on the first Q&A call, not at app startup
     r = requests.post(f"{url}/api/chat", json=payload, timeout=timeout)
     r.raise_for_status()
     data = r.json()
@@ -170,19 +178,24 @@ def _apply_one_day_filter_if_requested(s: str, user_q: str) -> str:
     if not m:
         return s
     day = m.group(1)
+    # rollup tables have no timestamp column: match the day through the bucket prefix
+    day_expr = "substr(bucket, 1, 10)" if "_rollup" in s.lower() else "date(timestamp)"
     if re.search(r"where\b", s, flags=re.I):
-        if re.search(rf"date\(timestamp\)\s*=\s*'{day}'", s, flags=re.I):
+        if re.search(rf"{re.escape(day_expr)}\s*=\s*'{day}'", s, flags=re.I):
             return s
-        return re.sub(r"(where\b)", rf"\\1 date(timestamp)='{day}' AND ", s, flags=re.I, count=1)
+        return re.sub(r"(where\b)", rf"\1 {day_expr}='{day}' AND ", s, flags=re.I, count=1)
     m2 = re.search(r"\bgroup\s+by\b|\border\s+by\b|\blimit\b", s, flags=re.I)
     if m2:
-        return s[:m2.start()].rstrip(" ;") + f"\nWHERE date(timestamp)='{day}'\n" + s[m2.start():]
-    return s.rstrip(" ;") + f"\nWHERE date(timestamp)='{day}'"
+        return s[:m2.start()].rstrip(" ;") + f"\nWHERE {day_expr}='{day}'\n" + s[m2.start():]
+    return s.rstrip(" ;") + f"\nWHERE {day_expr}='{day}'"
 
 
 def _strip_unrequested_time_filters(s: str, user_q: str) -> str:
     if _user_wants_time_filter(user_q):
         return s
+    # rollup WHERE clauses carry the resolution filter; dropping them would mix minute/hour/day rows
+    if "_rollup" in s.lower():
+        return s
     m = re.search(r"\bwhere\b", s, flags=re.I)
     if not m:
         return s
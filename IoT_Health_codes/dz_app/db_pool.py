@@ -0,0 +1,115 @@
+# db_pool.py — reusable per-thread SQLite connections for app8.py
+import sqlite3
+import threading
+
+
+class ConnectionPool:
+    """
+    Hands each thread one SQLite connection and keeps it for the rest of the request.
+    release() (called on app-context teardown) parks it for the next request, so
+    connections and their prepared-statement caches are reused instead of reopened.
+
+    Also caches small query results (e.g. the latest timestamp per table). The cache
+    is dropped whenever PRAGMA data_version shows another connection has committed,
+    i.e. when a sensor script has written new rows.
+    """
+
+    def __init__(self, db_path, busy_timeout_ms=5000, cached_statements=256, max_idle=4):
+        self.db_path = db_path
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self.cached_statements = int(cached_statements)
+        self.max_idle = int(max_idle)
+        self._local = threading.local()
+        self._idle = []
+        self._versions = {}      # id(conn) -> last PRAGMA data_version seen on it
+        self._cache = {}
+        self._generation = 0     # bumped on every invalidation
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _open(self):
+        # check_same_thread=False: a parked connection may be picked up by another
+        # thread, but it is only ever used by one thread at a time.
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0,
+                               check_same_thread=False, cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+        self.opened += 1
+        return conn
+
+    def connection(self):
+        """This thread's connection (taken from the idle list or opened on first use)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+                if conn is not None:
+                    self.reused += 1
+            if conn is None:
+                conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def release(self):
+        """Give this thread's connection back for reuse (closed if enough are idle)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._versions.pop(id(conn), None)
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._versions.clear()
+        for conn in idle:
+            conn.close()
+
+    def _check_version(self, conn):
+        """Drop the result cache if conn sees commits made since it last looked."""
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            if self._versions.get(id(conn)) != version:
+                # a connection's first check also invalidates: it has no baseline yet
+                self._versions[id(conn)] = version
+                self._cache.clear()
+                self._generation += 1
+            return self._generation
+
+    def cached(self, key, compute):
+        """
+        compute() once per key until the database changes. compute should read
+        through this thread's connection(); its exceptions propagate uncached.
+        """
+        generation = self._check_version(self.connection())
+        with self._lock:
+            if key in self._cache:
+                self.cache_hits += 1
+                return self._cache[key]
+            self.cache_misses += 1
+        value = compute()
+        with self._lock:
+            # skip storing if an invalidation raced with compute()
+            if self._generation == generation:
+                self._cache[key] = value
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "idle": len(self._idle),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+            }
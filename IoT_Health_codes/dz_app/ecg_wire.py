@@ -0,0 +1,88 @@
+# ecg_wire.py — compact binary frames for the live ECG waveform (app8.py /api/live/ecg, static/js/ecg_stream.js)
+import struct
+
+# Frame, little-endian:
+#   uint8   version (1)
+#   uint8   flags: bits 0-1 delta width in bytes (1 or 2), bit 2 = a job producing ECG ended
+#   uint16  sample rate (Hz)
+#   float64 t0, time of the first sample (Unix s)
+#   float32 scale: a sample is q / scale, q the quantized integer
+#   uint32  frame id (resume with ?after=<id>)
+#   uint16  n, number of samples (0: keepalive / end marker, no samples)
+#   int16   q of the first sample
+# then n - 1 deltas q[i] - q[i - 1], int8 when they all fit (quiet stretches), else int16.
+HEADER = struct.Struct('<BBHdfIHh')
+VERSION = 1
+FLAG_ENDED = 0x04
+WIDTH_MASK = 0x03
+# 0.25 ADC counts per step, filtered values up to ±8191 counts
+DEFAULT_SCALE = 4.0
+MAX_SAMPLES = 0xFFFF
+
+_INT16 = (-32768, 32767)
+_DELTA_FORMAT = {1: 'b', 2: 'h'}
+
+
+def quantize(values, scale=DEFAULT_SCALE):
+    lo, hi = _INT16
+    return [min(hi, max(lo, int(round(v * scale)))) for v in values]
+
+
+def encode_frame(t0, rate, values, frame_id=0, scale=DEFAULT_SCALE, ended=False):
+    """
+    One frame for samples `values` (floats) starting at t0; blocks over MAX_SAMPLES
+    are split into several frames. A step too large for an int16 delta (more than
+    32767 / scale counts, far beyond a 10-bit ADC) is spread over the next samples
+    instead of shifting everything after it.
+    """
+    values = list(values)
+    if len(values) > MAX_SAMPLES:
+        return b''.join(encode_frame(t0 + i / rate, rate, values[i:i + MAX_SAMPLES], frame_id, scale,
+                                     ended and i + MAX_SAMPLES >= len(values))
+                        for i in range(0, len(values), MAX_SAMPLES))
+    q = quantize(values, scale)
+    lo, hi = _INT16
+    deltas = []
+    prev = q[0] if q else 0
+    for v in q[1:]:
+        d = min(hi, max(lo, v - prev))
+        deltas.append(d)
+        prev += d
+    width = 1 if all(-128 <= d <= 127 for d in deltas) else 2
+    flags = width | (FLAG_ENDED if ended else 0)
+    header = HEADER.pack(VERSION, flags, int(rate), float(t0), float(scale), frame_id & 0xFFFFFFFF,
+                         len(q), q[0] if q else 0)
+    return header + struct.pack(f'<{len(deltas)}{_DELTA_FORMAT[width]}', *deltas)
+
+
+def encode_marker(frame_id=0, ended=False, t0=0.0):
+    """Header-only frame: keepalive, or the end of a job's ECG with ended=True."""
+    return HEADER.pack(VERSION, 2 | (FLAG_ENDED if ended else 0), 0, float(t0), DEFAULT_SCALE,
+                       frame_id & 0xFFFFFFFF, 0, 0)
+
+
+def decode_frames(buf):
+    """
+    Complete frames at the start of `buf` -> ([{'id', 'rate', 't0', 'ended', 'values'}],
+    bytes left over for the next read). The reference for static/js/ecg_stream.js.
+    """
+    frames, pos = [], 0
+    while len(buf) - pos >= HEADER.size:
+        version, flags, rate, t0, scale, frame_id, n, first = HEADER.unpack_from(buf, pos)
+        if version != VERSION:
+            raise ValueError(f"unknown ECG frame version {version}")
+        width = flags & WIDTH_MASK
+        end = pos + HEADER.size + max(0, n - 1) * width
+        if len(buf) < end:
+            break
+        values = []
+        if n:
+            q = first
+            values.append(q / scale)
+            for d in struct.unpack_from(f'<{n - 1}{_DELTA_FORMAT[width]}', buf, pos + HEADER.size):
+                q += d
+                values.append(q / scale)
+        frames.append({"id": frame_id, "rate": rate, "t0": t0, "ended": bool(flags & FLAG_ENDED),
+                       "values": values})
+        pos = end
+    return frames, buf[pos:]
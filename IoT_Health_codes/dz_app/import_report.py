@@ -0,0 +1,89 @@
+# import_report.py — where app8.py's startup time goes (python -X importtime, summarized)
+#
+#   python3 import_report.py                  # top 15 by cumulative and by self time
+#   python3 import_report.py --top 30 --json
+#   python3 import_report.py --module oled_ui --oled-backend ssd1306
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# "import time:       123 |        456 |     package.module" (self µs | cumulative µs | name)
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+
+
+def run_importtime(module='app8', oled_backend='null', python=sys.executable):
+    """Import `module` in a fresh interpreter with -X importtime; returns its stderr lines."""
+    env = dict(os.environ, OLED_BACKEND=oled_backend)
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=HERE, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return proc.stderr.splitlines()
+
+
+def parse(lines, module='app8'):
+    """
+    Entries imported while `module` was being imported: dicts of name, self_ms,
+    cumulative_ms and depth (1 = imported directly by `module`). Modules the
+    interpreter had already loaded before (site, encodings, ...) are left out.
+    """
+    entries = []
+    for line in lines:
+        m = LINE.match(line)
+        if m:
+            entries.append((int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2, m.group(4)))
+    # -X importtime prints a module after its children, so `module` closes its own block
+    end = next((i for i, e in enumerate(entries) if e[3] == module and e[2] == 0), None)
+    if end is None:
+        raise ValueError(f"{module} not found in the importtime output")
+    start = end
+    while start > 0 and entries[start - 1][2] > 0:
+        start -= 1
+    return [{"name": name, "self_ms": us / 1000.0, "cumulative_ms": cum / 1000.0, "depth": depth}
+            for us, cum, depth, name in entries[start:end + 1]]
+
+
+def summarize(entries, top=15):
+    root = entries[-1]
+    direct = [e for e in entries if e["depth"] == 1]
+    return {
+        "module": root["name"],
+        "total_ms": root["cumulative_ms"],
+        "self_ms": root["self_ms"],
+        "modules": len(entries),
+        "by_cumulative": sorted(direct, key=lambda e: -e["cumulative_ms"])[:top],
+        "by_self": sorted(entries[:-1], key=lambda e: -e["self_ms"])[:top],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time report for the dashboard (python -X importtime).")
+    ap.add_argument('--module', default='app8', help="module to import, default app8")
+    ap.add_argument('--top', type=int, default=15, help="rows per table, default 15")
+    ap.add_argument('--oled-backend', default='null', choices=('auto', 'ssd1306', 'null'),
+                    help="OLED_BACKEND for the import, default null")
+    ap.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = ap.parse_args()
+
+    summary = summarize(parse(run_importtime(args.module, args.oled_backend), args.module), args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    print(f"import {summary['module']}: {summary['total_ms']:.1f} ms total, "
+          f"{summary['self_ms']:.1f} ms in the module itself, {summary['modules']} modules loaded")
+    print(f"\nimported directly by {summary['module']}, by cumulative time:")
+    for e in summary["by_cumulative"]:
+        print(f"  {e['cumulative_ms']:8.1f} ms  {e['name']}")
+    print("\nany depth, by self time:")
+    for e in summary["by_self"]:
+        print(f"  {e['self_ms']:8.1f} ms  {e['name']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
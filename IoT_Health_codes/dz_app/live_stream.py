@@ -0,0 +1,193 @@
+# live_stream.py — live measurement data for the dashboard as Server-Sent Events (app8.py /api/live)
+import json
+import threading
+import time
+from collections import deque
+
+import ecg_wire
+
+# frame fields filled from the daemon's event channels
+CHANNELS = ('temperature', 'spo2', 'ecg')
+# job kinds whose end closes an ECG waveform on /api/live/ecg
+ECG_KINDS = ('ecg', 'session')
+
+
+def coalesce(events):
+    """
+    One frame's worth of daemon events -> {'temperature': [...], 'spo2': [...],
+    'ecg': [...], 'ended': [...]}. Readings are kept one by one (they come at 1 Hz);
+    consecutive ECG blocks of a job are joined into one block, t0 being the sampling
+    time of its first sample. A block after missed deadlines or dropped samples (gaps),
+    or one that does not start where the previous one ended (events lost), starts a
+    new block, so the samples of a block are always 1/rate apart.
+    """
+    frame = {channel: [] for channel in CHANNELS}
+    frame["ended"] = []
+    for e in events:
+        channel = e["channel"]
+        if channel == 'state':
+            if e["state"] in ('done', 'failed', 'cancelled'):
+                frame["ended"].append({"job": e["job"], "kind": e["kind"], "state": e["state"]})
+        elif channel == 'ecg':
+            blocks = frame["ecg"]
+            last = blocks[-1] if blocks else None
+            if (last is not None and last["job"] == e["job"] and last["rate"] == e["rate"] and not e["gaps"]
+                    and abs(last["t0"] + len(last["values"]) / last["rate"] - e["t0"]) < 0.5 / e["rate"]):
+                last["values"].extend(e["values"])
+            else:
+                blocks.append({"job": e["job"], "t0": e["t0"], "gaps": e["gaps"], "rate": e["rate"],
+                               "values": list(e["values"])})
+        elif channel in frame:
+            frame[channel].append({k: v for k, v in e.items() if k not in ('seq', 'channel')})
+    return frame
+
+
+class LiveHub:
+    """
+    Fans the acquisition daemon's live events out to any number of SSE viewers.
+
+    A single follower thread long-polls the daemon (fetch(after, timeout), i.e.
+    AcquisitionClient.events) and turns whatever arrived during each 1/rate_hz s into
+    one frame, encoded once and kept in a short history; viewers only wait on a
+    condition and copy the encoded frames out, so another viewer costs no daemon call,
+    no SQLite query and no JSON encoding. The follower starts with the first viewer and
+    stops after the last one leaves. A viewer that reconnects with Last-Event-ID gets
+    the frames it missed while they are still in the history.
+
+    Each frame's ECG blocks are also encoded once as binary ecg_wire frames, served by
+    stream_ecg() to the ECG page's waveform.
+    """
+
+    def __init__(self, fetch, rate_hz=4.0, keep_frames=64, poll_s=10.0, retry_s=2.0, heartbeat_s=15.0):
+        self.fetch = fetch
+        self.interval = 1.0 / rate_hz
+        self.poll_s = poll_s
+        self.retry_s = retry_s
+        self.heartbeat_s = heartbeat_s
+        self._cond = threading.Condition()
+        self._frames = deque(maxlen=keep_frames)  # (id, encoded SSE message, ecg_wire bytes)
+        self._frame_id = 0
+        self._viewers = 0
+        self._follower = None
+        self._active = []
+        self._available = None
+        self._stats = {"polls": 0, "events": 0, "lost": 0, "frames": 0, "viewers_max": 0}
+
+    # --- viewers ---
+    def stream(self, last_id=None):
+        """SSE text for one viewer, until the client disconnects (the generator is closed)."""
+        self._join()
+        try:
+            yield f"retry: {int(self.retry_s * 1000)}\n\n"
+            with self._cond:
+                # a new viewer starts with the current state, a reconnecting one where it left off
+                if last_id is None or last_id > self._frame_id:
+                    last_id = self._frame_id
+                    yield self._encode_status(last_id)
+            while True:
+                frames = self._frames_after(last_id)
+                if not frames:
+                    yield ": keepalive\n\n"
+                    continue
+                for i, msg, _ in frames:
+                    yield msg
+                last_id = frames[-1][0]
+        finally:
+            self._leave()
+
+    def stream_ecg(self, after=None):
+        """
+        The ECG waveform as binary ecg_wire frames for one viewer: a header-only frame
+        at once and as keepalive, then the filtered ECG of every live frame after frame
+        id `after` (default: from now on), with an end marker when an ECG job ends.
+        """
+        self._join()
+        try:
+            with self._cond:
+                if after is None or after > self._frame_id:
+                    after = self._frame_id
+            yield ecg_wire.encode_marker(after)
+            while True:
+                frames = self._frames_after(after)
+                if not frames:
+                    yield ecg_wire.encode_marker(after)
+                    continue
+                data = b''.join(ecg for _, _, ecg in frames)
+                if data:
+                    yield data
+                after = frames[-1][0]
+        finally:
+            self._leave()
+
+    def _frames_after(self, last_id):
+        """Frames newer than last_id, waiting up to heartbeat_s for one; [] on timeout."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame_id > last_id, self.heartbeat_s)
+            return [f for f in self._frames if f[0] > last_id]
+
+    def _encode_status(self, frame_id):
+        # caller holds the condition
+        data = {"available": self._available, "active": self._active}
+        return f"id: {frame_id}\nevent: status\ndata: {json.dumps(data)}\n\n"
+
+    def _join(self):
+        with self._cond:
+            self._viewers += 1
+            self._stats["viewers_max"] = max(self._stats["viewers_max"], self._viewers)
+            if self._follower is None:
+                self._follower = threading.Thread(target=self._follow, name='live-follower', daemon=True)
+                self._follower.start()
+
+    def _leave(self):
+        with self._cond:
+            self._viewers -= 1
+
+    # --- follower ---
+    def _emit(self, frame):
+        with self._cond:
+            self._frame_id += 1
+            frame["id"] = self._frame_id
+            ecg = [ecg_wire.encode_frame(b["t0"], b["rate"], b["values"], self._frame_id) for b in frame["ecg"]]
+            ecg += [ecg_wire.encode_marker(self._frame_id, ended=True)
+                    for j in frame["ended"] if j["kind"] in ECG_KINDS]
+            self._frames.append((self._frame_id, f"id: {self._frame_id}\nevent: live\ndata: {json.dumps(frame)}\n\n",
+                                 b''.join(ecg)))
+            self._stats["frames"] += 1
+            self._cond.notify_all()
+
+    def _follow(self):
+        after = None
+        while True:
+            with self._cond:
+                if self._viewers == 0:
+                    self._follower = None
+                    return
+            tick = time.monotonic()
+            try:
+                answer = self.fetch(after, self.poll_s)
+            except Exception as e:
+                # daemon stopped or not installed: tell the viewers once, then retry
+                if self._available is not False:
+                    self._available, self._active = False, []
+                    self._emit({"available": False, "error": str(e), "active": [], "ended": [],
+                                **{channel: [] for channel in CHANNELS}})
+                after = None
+                time.sleep(self.retry_s)
+                continue
+            events = answer["events"]
+            with self._cond:
+                self._stats["polls"] += 1
+                self._stats["events"] += len(events)
+                self._stats["lost"] += answer["lost"]
+            if events or answer["active"] != self._active or not self._available:
+                self._available, self._active = True, answer["active"]
+                self._emit({"available": True, "active": answer["active"], "lost": answer["lost"],
+                            **coalesce(events)})
+            after = answer["seq"]
+            # what arrives until the next poll goes into the next frame
+            time.sleep(max(0.0, self.interval - (time.monotonic() - tick)))
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, "viewers": self._viewers, "frame_id": self._frame_id,
+                    "following": self._follower is not None}
@@ -0,0 +1,44 @@
+# lttb.py — Largest-Triangle-Three-Buckets downsampling for the chart series (used by app8.py)
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    """
+    Indices of the n_out points of (x, y) kept by Largest-Triangle-Three-Buckets.
+    x must be ascending. The first and last points are always kept; every other
+    bucket keeps the point forming the largest triangle with the previously kept
+    point and the average of the next bucket. If n_out >= len(x) all indices are returned.
+
+    Bucket edges and averages are computed for all buckets at once; the per-bucket
+    selection is a slice + argmax, so the Python loop runs n_out times, not len(x).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # relative to x[0] so the cumulative sums stay exact for epoch-ms values
+    x = np.asarray(x, dtype=float) - float(x[0])
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 non-empty buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    avg_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts
+    avg_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts
+    # the point "c" for bucket i is the average of bucket i+1 (the last point for the last bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
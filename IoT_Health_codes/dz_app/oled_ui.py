@@ -2,22 +2,74 @@
 import os, time, threading, textwrap
 os.environ.setdefault("LUMA_NO_EXIT", "1")
 
-from luma.core.interface.serial import i2c
-from luma.oled.device import ssd1306
-from luma.core.render import canvas
-from PIL import ImageFont
-
-# --- device ---
-serial = i2c(port=1, address=0x3C)
-device = ssd1306(serial, width=128, height=64)
-
-# --- fonts ---
-try:
-    FONT_TITLE = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 14)
-    FONT_BODY  = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
-except:
-    FONT_TITLE = ImageFont.load_default()
-    FONT_BODY  = ImageFont.load_default()
+# OLED_BACKEND: "auto" (SSD1306 αν υπάρχει, αλλιώς null), "ssd1306" ή "null" (χωρίς οθόνη)
+OLED_BACKEND = os.getenv("OLED_BACKEND", "auto").lower()
+
+
+class NullDisplay:
+    """Χωρίς οθόνη (ή χωρίς luma): κρατά μόνο το τελευταίο μήνυμα στο _state, δεν ζωγραφίζει τίποτα."""
+    width = 128
+    height = 64
+
+    def clear(self):
+        pass
+
+
+# --- device (ανοίγει με την πρώτη χρήση, όχι στο import) ---
+_device = None
+_device_lock = threading.Lock()
+FONT_TITLE = FONT_BODY = None
+
+
+def _open_ssd1306():
+    global FONT_TITLE, FONT_BODY
+    from luma.core.interface.serial import i2c
+    from luma.oled.device import ssd1306
+    from PIL import ImageFont
+
+    serial = i2c(port=1, address=0x3C)
+    dev = ssd1306(serial, width=128, height=64)
+    # --- fonts ---
+    try:
+        FONT_TITLE = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 14)
+        FONT_BODY  = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
+    except:
+        FONT_TITLE = ImageFont.load_default()
+        FONT_BODY  = ImageFont.load_default()
+    return dev
+
+
+def get_device():
+    """Η SSD1306 στο 0x3C, ή NullDisplay όταν λείπει (OLED_BACKEND=auto) ή ζητηθεί (null)."""
+    global _device
+    with _device_lock:
+        if _device is None:
+            if OLED_BACKEND == "null":
+                _device = NullDisplay()
+            elif OLED_BACKEND == "ssd1306":
+                _device = _open_ssd1306()
+            else:
+                try:
+                    _device = _open_ssd1306()
+                except Exception as e:  # ImportError (luma/PIL), OSError / luma DeviceNotFoundError (I2C)
+                    print(f"oled_ui: no SSD1306 ({type(e).__name__}: {e}); using the null display")
+                    _device = NullDisplay()
+        return _device
+
+
+def backend():
+    """"ssd1306" ή "null" (ανοίγει τη συσκευή αν δεν έχει ανοίξει)."""
+    return "null" if isinstance(get_device(), NullDisplay) else "ssd1306"
+
+
+def _paint(pos):
+    # καλείται με _state_lock
+    device = get_device()
+    if isinstance(device, NullDisplay):
+        return
+    from luma.core.render import canvas
+    with canvas(device) as draw:
+        _render_frame(draw, pos)
 
 # --- state / sync ---
 _state_lock = threading.Lock()
@@ -51,7 +103,7 @@ def _render_frame(draw, pos):
 
 def _anim_loop():
     global _anim_running
-    width = device.width
+    width = get_device().width
     step = 10        # ↑ πιο γρήγορο (ήταν ~5)
     sleep_s = 0.05   # ↑ πιο γρήγορο (ήταν ~0.10)
     bar_w = 20
@@ -60,8 +112,7 @@ def _anim_loop():
     direction = 1
     while _anim_running:
         with _state_lock:
-            with canvas(device) as draw:
-                _render_frame(draw, pos)
+            _paint(pos)
         pos += direction * step
         if pos <= 0 or pos + bar_w >= width:
             direction *= -1
@@ -79,6 +130,7 @@ def display_message(title: str, body: str, show_progress: bool):
 
     # ετοιμάζουμε νέο state
     lines = _wrap_two_lines(body, max_chars=21)
+    device = get_device()
 
     with _state_lock:
         _state["title"] = title or ""
@@ -86,11 +138,10 @@ def display_message(title: str, body: str, show_progress: bool):
         _state["show_progress"] = bool(show_progress)
         device.clear()
 
-    # αν δεν θέλουμε animation → ζωγραφίζουμε 1 φορά και τελειώσαμε
-    if not show_progress:
+    # αν δεν θέλουμε animation (ή δεν υπάρχει οθόνη) → ζωγραφίζουμε 1 φορά και τελειώσαμε
+    if not show_progress or isinstance(device, NullDisplay):
         with _state_lock:
-            with canvas(device) as draw:
-                _render_frame(draw, pos=0)
+            _paint(pos=0)
         # σταμάτα τυχόν παλιό animation
         if _anim_running:
             _anim_running = False
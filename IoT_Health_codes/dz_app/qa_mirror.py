@@ -0,0 +1,126 @@
+# qa_mirror.py — long-lived decrypted in-memory mirror for the Q&A API (app8.py)
+import sqlite3
+import threading
+import time
+
+# mirror table -> value column (same names as chat_verb.SCHEMA)
+MIRROR_TABLES = {
+    'temp_data': 'temp',
+    'spo2_data': 'spo2',
+}
+
+# <col>_rollup buckets, same cuts as health_database/rollups.RESOLUTIONS
+ROLLUP_BUCKETS = {
+    'minute': "substr(timestamp, 1, 16) || ':00'",
+    'hour':   "substr(timestamp, 1, 13) || ':00:00'",
+    'day':    "substr(timestamp, 1, 10)",
+}
+
+
+class QAMirror:
+    """
+    Plaintext copy of temp_data / spo2_data kept in a private :memory: database,
+    plus temp_rollup / spo2_rollup (n/min/max/avg per minute, hour and day).
+
+    Built lazily on first use, then topped up with rows whose id is greater than the
+    last one ingested (rows are append-only, so nothing else can change). Rows that
+    could not be decrypted (e.g. written under a key id this process does not have yet)
+    are fetched again on every refresh until they can.
+    Each question gets its own read-only snapshot (sqlite3 backup of the mirror),
+    so concurrent requests never share a connection and never see a half-applied refresh.
+
+    fetch_after(table, after_id) must return [{'id','timestamp','value'}, ...] ordered by id.
+    """
+
+    def __init__(self, fetch_after):
+        self._fetch_after = fetch_after
+        self._lock = threading.Lock()
+        self._mem = sqlite3.connect(":memory:", check_same_thread=False)
+        for table, col in MIRROR_TABLES.items():
+            self._mem.execute(f"""
+                CREATE TABLE {table} (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    {col} REAL
+                );
+            """)
+            self._mem.execute(f"CREATE INDEX idx_{table}_timestamp ON {table}(timestamp);")
+            self._mem.execute(f"""
+                CREATE TABLE {col}_rollup (
+                    resolution TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    n INTEGER,
+                    min_{col} REAL,
+                    max_{col} REAL,
+                    avg_{col} REAL,
+                    PRIMARY KEY (resolution, bucket)
+                );
+            """)
+        self._mem.commit()
+        self.last_id = {table: 0 for table in MIRROR_TABLES}
+        # ids at or below last_id whose value did not decrypt yet
+        self.undecrypted = {table: set() for table in MIRROR_TABLES}
+        self.rows = {table: 0 for table in MIRROR_TABLES}
+        self.last_refresh_ms = 0.0
+
+    def _refresh_locked(self):
+        start = time.perf_counter()
+        added = 0
+        for table, col in MIRROR_TABLES.items():
+            last_id, retry = self.last_id[table], self.undecrypted[table]
+            new_rows = self._fetch_after(table, min(retry) - 1 if retry else last_id)
+            if not new_rows:
+                continue
+            # only new rows and the retried ones; the rest between them is mirrored already
+            new_rows = [r for r in new_rows if r['id'] > last_id or r['id'] in retry]
+            values = [
+                (r['id'], r['timestamp'], float(r['value']))
+                for r in new_rows
+                if r.get('value') is not None
+            ]
+            self.undecrypted[table] = {r['id'] for r in new_rows if r.get('value') is None}
+            self._mem.executemany(
+                f"INSERT OR REPLACE INTO {table}(id,timestamp,{col}) VALUES (?,?,?)", values
+            )
+            if new_rows:
+                self.last_id[table] = max(last_id, new_rows[-1]['id'])
+            if values:
+                self._update_rollups(table, col, min(v[1] for v in values))
+            self.rows[table] += len(values)
+            added += len(values)
+        self._mem.commit()
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+        return added
+
+    def _update_rollups(self, table, col, since):
+        """Recompute the rollup buckets from the bucket of `since` onwards (only those can change)."""
+        for res, bucket_sql in ROLLUP_BUCKETS.items():
+            first = self._mem.execute(f"SELECT {bucket_sql} FROM (SELECT ? AS timestamp)", (since,)).fetchone()[0]
+            self._mem.execute(f"DELETE FROM {col}_rollup WHERE resolution=? AND bucket >= ?", (res, first))
+            self._mem.execute(f"""
+                INSERT INTO {col}_rollup (resolution, bucket, n, min_{col}, max_{col}, avg_{col})
+                SELECT ?, {bucket_sql} AS b, COUNT(*), MIN({col}), MAX({col}), AVG({col})
+                FROM {table} WHERE timestamp >= ? GROUP BY b
+            """, (res, first))
+
+    def refresh(self):
+        """Ingest rows added since the last refresh. Returns the number of rows added."""
+        with self._lock:
+            return self._refresh_locked()
+
+    def snapshot(self):
+        """Refresh, then return a new read-only :memory: connection with a copy of the mirror."""
+        snap = sqlite3.connect(":memory:", check_same_thread=False)
+        with self._lock:
+            self._refresh_locked()
+            self._mem.backup(snap)
+        snap.execute("PRAGMA query_only=ON;")
+        return snap
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rows": dict(self.rows),
+                "last_id": dict(self.last_id),
+                "last_refresh_ms": round(self.last_refresh_ms, 2),
+            }
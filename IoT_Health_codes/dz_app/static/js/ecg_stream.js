@@ -0,0 +1,156 @@
+// Live ECG waveform from /api/live/ecg: a chunked binary stream of frames (see
+// dz_app/ecg_wire.py), each a 24-byte little-endian header followed by delta-encoded
+// samples. Decoded straight into Float32Arrays and drawn on a plain canvas, so 250 Hz
+// does not go through JSON, string timestamps or Chart.js.
+const ECG_HEADER = 24;
+const ECG_FLAG_ENDED = 0x04;
+
+// Complete frames at the start of `bytes` (Uint8Array) -> { frames, rest }; rest is the
+// partial frame to prepend to the next chunk.
+window.decodeEcgFrames = function (bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const frames = [];
+  let pos = 0;
+  while (bytes.byteLength - pos >= ECG_HEADER) {
+    const version = view.getUint8(pos);
+    if (version !== 1) throw new Error(`unknown ECG frame version ${version}`);
+    const flags = view.getUint8(pos + 1);
+    const width = flags & 0x03;
+    const n = view.getUint16(pos + 20, true);
+    const end = pos + ECG_HEADER + Math.max(0, n - 1) * width;
+    if (bytes.byteLength < end) break;
+    const scale = view.getFloat32(pos + 12, true);
+    const samples = new Float32Array(n);
+    if (n) {
+      let q = view.getInt16(pos + 22, true);
+      samples[0] = q / scale;
+      for (let i = 1, off = pos + ECG_HEADER; i < n; i++, off += width) {
+        q += width === 1 ? view.getInt8(off) : view.getInt16(off, true);
+        samples[i] = q / scale;
+      }
+    }
+    frames.push({
+      id: view.getUint32(pos + 16, true),
+      rate: view.getUint16(pos + 2, true),
+      t0: view.getFloat64(pos + 4, true),
+      ended: (flags & ECG_FLAG_ENDED) !== 0,
+      samples,
+    });
+    pos = end;
+  }
+  return { frames, rest: bytes.slice(pos) };
+};
+
+// Reads /api/live/ecg until close(); reconnects after 2 s, resuming after the last frame.
+window.followEcgStream = function (onFrame) {
+  let lastId = null;
+  let controller = null;
+  let closed = false;
+
+  async function run() {
+    while (!closed) {
+      controller = new AbortController();
+      try {
+        const url = lastId === null ? '/api/live/ecg' : `/api/live/ecg?after=${lastId}`;
+        const response = await fetch(url, { signal: controller.signal });
+        const reader = response.body.getReader();
+        let pending = new Uint8Array(0);
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          const bytes = new Uint8Array(pending.length + value.length);
+          bytes.set(pending);
+          bytes.set(value, pending.length);
+          const { frames, rest } = decodeEcgFrames(bytes);
+          pending = rest;
+          for (const frame of frames) {
+            lastId = frame.id;
+            onFrame(frame);
+          }
+        }
+      } catch (e) {
+        if (closed) return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  }
+
+  run();
+  return { close: () => { closed = true; if (controller) controller.abort(); } };
+};
+
+// The last `seconds` of samples in a ring buffer, redrawn once per animation frame.
+// Samples missing between two frames (t0 later than where the previous one ended) are
+// kept as NaN, so the line breaks there instead of joining across the gap.
+window.RollingEcgPlot = function (canvas, seconds, color) {
+  let ring = new Float32Array(0);
+  let rate = 0;
+  let head = 0;
+  let filled = 0;
+  let next = null;  // time the next sample is due
+  let dirty = false;
+
+  function append(v) {
+    ring[head] = v;
+    head = (head + 1) % ring.length;
+    filled = Math.min(ring.length, filled + 1);
+  }
+
+  this.push = function (sampleRate, samples, t0) {
+    if (sampleRate !== rate) {
+      rate = sampleRate;
+      ring = new Float32Array(Math.max(1, Math.round(rate * seconds)));
+      head = filled = 0;
+      next = null;
+    }
+    if (t0 !== undefined && next !== null) {
+      const missing = Math.min(ring.length, Math.round((t0 - next) * rate));
+      for (let i = 0; i < missing; i++) append(NaN);
+    }
+    for (let i = 0; i < samples.length; i++) append(samples[i]);
+    if (t0 !== undefined) next = t0 + samples.length / rate;
+    if (!dirty) {
+      dirty = true;
+      requestAnimationFrame(draw);
+    }
+  };
+
+  function draw() {
+    dirty = false;
+    const ratio = window.devicePixelRatio || 1;
+    const width = canvas.clientWidth * ratio;
+    const height = canvas.clientHeight * ratio;
+    if (canvas.width !== width || canvas.height !== height) {
+      canvas.width = width;
+      canvas.height = height;
+    }
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, width, height);
+    if (filled < 2) return;
+    const start = (head - filled + ring.length) % ring.length;
+    let lo = Infinity;
+    let hi = -Infinity;
+    for (let i = 0; i < filled; i++) {
+      const v = ring[(start + i) % ring.length];
+      if (v < lo) lo = v;
+      if (v > hi) hi = v;
+    }
+    const span = hi - lo || 1;
+    ctx.strokeStyle = color || '#6366F1';
+    ctx.lineWidth = ratio;
+    ctx.beginPath();
+    let pen = false;
+    for (let i = 0; i < filled; i++) {
+      const v = ring[(start + i) % ring.length];
+      if (Number.isNaN(v)) {
+        pen = false;
+        continue;
+      }
+      const x = (i / (ring.length - 1)) * width;
+      const y = height - ((v - lo) / span) * (height - 4 * ratio) - 2 * ratio;
+      if (pen) ctx.lineTo(x, y); else ctx.moveTo(x, y);
+      pen = true;
+    }
+    ctx.stroke();
+  }
+};
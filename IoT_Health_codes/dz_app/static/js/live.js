@@ -0,0 +1,111 @@
+// Live measurement data from /api/live (Server-Sent Events). The server sends a 'status'
+// event on connect and then at most a few 'live' frames per second, each with the new
+// temperature/SpO2 readings and filtered ECG blocks since the previous frame, the
+// running jobs (active) and the jobs that ended. EventSource reconnects by itself and
+// resumes from the last frame it got.
+window.followLive = function (onFrame) {
+  const source = new EventSource('/api/live');
+  source.addEventListener('live', (e) => onFrame(JSON.parse(e.data)));
+  source.addEventListener('status', (e) => onFrame({ ...JSON.parse(e.data), status: true }));
+  return source;
+};
+
+function liveLabel(t) {
+  const d = new Date(t * 1000);
+  const pad = (n, w = 2) => String(n).padStart(w, '0');
+  return `${pad(d.getHours())}:${pad(d.getMinutes())}:${pad(d.getSeconds())}.${pad(d.getMilliseconds(), 3)}`;
+}
+
+// channel -> [label, value] points and value text of one frame
+const LIVE_CHANNELS = {
+  temperature: {
+    kinds: ['temperature', 'session'],
+    points: (f) => f.temperature.filter((r) => r.value !== null).map((r) => [liveLabel(r.t), r.value]),
+    text: (f) => {
+      const r = f.temperature.filter((r) => r.value !== null).pop();
+      return r && `${r.value.toFixed(2)} °C`;
+    },
+  },
+  spo2: {
+    kinds: ['spo2', 'session'],
+    points: (f) => f.spo2.filter((r) => r.spo2 !== null).map((r) => [liveLabel(r.t), r.spo2]),
+    text: (f) => {
+      const r = f.spo2[f.spo2.length - 1];
+      return r && `SpO₂ ${r.spo2 === null ? '--' : r.spo2 + ' %'} · ${r.bpm === null ? '--' : r.bpm + ' BPM'}`;
+    },
+  },
+  ecg: {
+    kinds: ['ecg', 'session'],
+    points: (f) => f.ecg.flatMap((b) => b.values.map((v, i) => [liveLabel(b.t0 + i / b.rate), v])),
+    text: (f) => {
+      const b = f.ecg[f.ecg.length - 1];
+      return b && `ECG ${b.rate} Hz`;
+    },
+  },
+};
+
+// One page's live panel: shown while a job of the channel runs, with a rolling chart of
+// the last opts.maxPoints values. opts.onEnd() runs when such a job ends (e.g. to reload
+// the stored series, which now has the new rows).
+window.showLiveMeasurement = function (channel, opts) {
+  const spec = LIVE_CHANNELS[channel];
+  const panel = document.getElementById(opts.panelId);
+  const value = document.getElementById(opts.valueId);
+  const canvas = document.getElementById(opts.canvasId);
+  const maxPoints = opts.maxPoints || 600;
+  let chart = null;
+
+  function ensureChart() {
+    if (chart) return chart;
+    chart = new Chart(canvas.getContext('2d'), {
+      type: 'line',
+      data: { labels: [], datasets: [{ label: opts.label, data: [], borderColor: opts.color || '#10B981',
+                                        borderWidth: 1, pointRadius: 0, fill: false }] },
+      options: {
+        animation: false,
+        scales: {
+          x: { display: true, ticks: { maxTicksLimit: 8 } },
+          y: { display: true, title: { display: true, text: opts.yTitle } },
+        },
+      },
+    });
+    return chart;
+  }
+
+  return followLive((frame) => {
+    const running = (frame.active || []).some((j) => spec.kinds.includes(j.kind) && j.state === 'running');
+    if (running) panel.classList.remove('hidden');
+    if (frame.status) return;
+
+    const points = spec.points(frame);
+    if (points.length) {
+      const c = ensureChart();
+      for (const [label, v] of points) {
+        c.data.labels.push(label);
+        c.data.datasets[0].data.push(v);
+      }
+      const extra = c.data.labels.length - maxPoints;
+      if (extra > 0) {
+        c.data.labels.splice(0, extra);
+        c.data.datasets[0].data.splice(0, extra);
+      }
+      c.update('none');
+    }
+    const text = spec.text(frame);
+    if (text) value.textContent = text;
+
+    const ended = (frame.ended || []).filter((j) => spec.kinds.includes(j.kind));
+    if (ended.length) {
+      value.textContent += ` — ${ended[ended.length - 1].state}`;
+      if (opts.onEnd) opts.onEnd();
+    }
+  });
+};
+
+// Short text of the latest values in a frame (home page, during a measurement)
+window.liveSummary = function (frame) {
+  return ['temperature', 'spo2', 'ecg']
+    .map((channel) => LIVE_CHANNELS[channel].text(frame))
+    .filter(Boolean)
+    .join(' · ');
+};
@@ -0,0 +1,68 @@
+// Charts loaded from /api/series/<table>: a downsampled overview first, and the
+// zoomed window (drag to select) refetched from the server, at full resolution
+// once it is small enough. Double-click returns to the overview.
+window.loadSeriesChart = function (canvasId, table, query, opts) {
+  const canvas = document.getElementById(canvasId);
+  if (!canvas) return { reload: () => {} };
+  const points = opts.points || 1000;
+  const status = opts.statusId ? document.getElementById(opts.statusId) : null;
+  let chart = null;
+
+  function fetchSeries(extra) {
+    const params = new URLSearchParams({ ...query, ...extra, points });
+    return fetch(`/api/series/${table}?${params}`).then((r) => r.json());
+  }
+
+  function render(series) {
+    if (chart) chart.destroy();
+    if (status) {
+      status.textContent = !series.total
+        ? opts.emptyText || 'No data available.'
+        : series.downsampled
+          ? `Showing ${series.points} of ${series.total} points — drag to zoom in, double-click to reset.`
+          : `Showing all ${series.total} points — double-click to reset.`;
+    }
+    if (!series.total) return;
+
+    chart = new Chart(canvas.getContext('2d'), {
+      type: 'line',
+      data: {
+        labels: series.timestamp,
+        datasets: [{
+          label: opts.label,
+          data: series.value,
+          borderColor: opts.color || '#6B7280',
+          borderWidth: 1,
+          pointRadius: 0,
+          fill: false,
+        }],
+      },
+      options: {
+        animation: false,
+        scales: {
+          x: { display: true, title: { display: true, text: 'Timestamp' } },
+          y: { display: true, title: { display: true, text: opts.yTitle } },
+        },
+        plugins: {
+          zoom: {
+            zoom: {
+              drag: { enabled: true },
+              mode: 'x',
+              onZoomComplete: ({ chart: c }) => {
+                const labels = c.data.labels;
+                const from = labels[Math.max(0, Math.floor(c.scales.x.min))];
+                const to = labels[Math.min(labels.length - 1, Math.ceil(c.scales.x.max))];
+                fetchSeries({ from, to }).then(render);
+              },
+            },
+          },
+        },
+      },
+    });
+  }
+
+  canvas.addEventListener('dblclick', () => fetchSeries({}).then(render));
+  fetchSeries({}).then(render);
+  // reload(): fetch the overview again, e.g. once a live measurement has been stored
+  return { reload: () => fetchSeries({}).then(render) };
+};
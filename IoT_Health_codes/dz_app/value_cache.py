@@ -0,0 +1,79 @@
+# value_cache.py — bounded LRU cache for decrypted sensor values (used by app8.py)
+import sys
+import threading
+from collections import OrderedDict
+
+# Rough per-entry cost: key tuple + int id + float value + OrderedDict link.
+# The table name string is shared between keys, so it is not counted.
+ENTRY_BYTES = sys.getsizeof((None, 0)) + sys.getsizeof(1 << 40) + sys.getsizeof(0.0) + 100
+
+
+class DecryptedValueCache:
+    """
+    Maps (table, row id) -> decrypted float value, evicting least recently used entries
+    once the estimated size goes over max_bytes.
+
+    Stored rows never change after insert, so entries never need invalidation.
+    Thread-safe: Flask may serve requests from several threads.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.max_entries = max(1, self.max_bytes // ENTRY_BYTES)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, table, ids):
+        """Return {id: value} for the ids that are cached; counts a hit or miss per id."""
+        found = {}
+        with self._lock:
+            data = self._data
+            for id_ in ids:
+                key = (table, id_)
+                if key in data:
+                    data.move_to_end(key)
+                    found[id_] = data[key]
+            self.hits += len(found)
+            self.misses += len(ids) - len(found)
+        return found
+
+    def put_many(self, table, items):
+        """Store (id, value) pairs; evicts the oldest entries if over budget."""
+        with self._lock:
+            data = self._data
+            for id_, value in items:
+                key = (table, id_)
+                data[key] = value
+                data.move_to_end(key)
+            overflow = len(data) - self.max_entries
+            for _ in range(max(0, overflow)):
+                data.popitem(last=False)
+            if overflow > 0:
+                self.evictions += overflow
+
+    def get(self, table, id_):
+        return self.get_many(table, [id_]).get(id_)
+
+    def put(self, table, id_, value):
+        self.put_many(table, [(id_, value)])
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "approx_bytes": len(self._data) * ENTRY_BYTES,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
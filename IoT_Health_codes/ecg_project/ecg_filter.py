@@ -0,0 +1,62 @@
+import numpy as np
+from scipy.signal import butter, iirnotch, sosfilt, sosfilt_zi, tf2sos
+
+
+def design_sos(fs, notch_hz=50.0, q=30.0, lowpass_hz=40.0, order=2):
+    """
+    Notch @ notch_hz (ρεύμα) followed by a Butterworth low-pass < lowpass_hz,
+    as one cascade of second-order sections.
+    """
+    nyq = 0.5 * fs
+    b_notch, a_notch = iirnotch(notch_hz / nyq, q)
+    return np.vstack([tf2sos(b_notch, a_notch),
+                      butter(order, lowpass_hz / nyq, btype='low', output='sos')])
+
+
+class EcgFilter:
+    """
+    Streaming notch + low-pass filter for ECG samples.
+
+    Keeps the second-order-section state between calls, so each new sample costs a
+    fixed amount of work (step) instead of refiltering a whole window. process() does
+    the same for a block of samples with sosfilt; the two can be mixed freely.
+    """
+
+    def __init__(self, fs, notch_hz=50.0, q=30.0, lowpass_hz=40.0, order=2):
+        self.fs = fs
+        self.sos = design_sos(fs, notch_hz, q, lowpass_hz, order)
+        self.reset()
+
+    def reset(self, x0=None):
+        """Zero state (as the first window of the old per-sample lfilter), or settled on level x0."""
+        if x0 is None:
+            self.zi = np.zeros((self.sos.shape[0], 2))
+        else:
+            self.zi = sosfilt_zi(self.sos) * x0
+        self._load_state()
+
+    def _load_state(self):
+        # plain floats for step(): indexing numpy scalars per sample costs more than the math
+        self._sections = [tuple(float(c) for c in row) for row in self.sos]
+        self._state = [[float(z[0]), float(z[1])] for z in self.zi]
+
+    def _store_state(self):
+        self.zi = np.array(self._state, dtype=float)
+
+    def step(self, x):
+        """Filter one sample; returns the filtered value."""
+        y = float(x)
+        # direct form II transposed per section, same as sosfilt
+        for (b0, b1, b2, _, a1, a2), z in zip(self._sections, self._state):
+            out = b0 * y + z[0]
+            z[0] = b1 * y - a1 * out + z[1]
+            z[1] = b2 * y - a2 * out
+            y = out
+        return y
+
+    def process(self, block):
+        """Filter a block of samples; returns a float array of the same length."""
+        self._store_state()
+        out, self.zi = sosfilt(self.sos, np.asarray(block, dtype=float), zi=self.zi)
+        self._state = [[float(z[0]), float(z[1])] for z in self.zi]
+        return out
@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class BoundedBuffer:
+    """
+    Fixed-capacity FIFO between two pipeline stages.
+
+    put_nowait() never blocks (for the acquisition thread): when full the item is refused
+    and counted in `dropped`. put() waits while full, which is how a slow stage pushes
+    back on the one before it. get_batch() takes up to max_items queued items at once.
+    """
+
+    def __init__(self, capacity, name):
+        self.capacity = max(1, int(capacity))
+        self.name = name
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.blocked_s = 0.0  # time producers spent waiting in put()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    def _append(self, item):
+        self._items.append(item)
+        self.put_count += 1
+        self.high_water = max(self.high_water, len(self._items))
+        self._cond.notify_all()
+
+    def put_nowait(self, item):
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                self.dropped += 1
+                return False
+            self._append(item)
+            return True
+
+    def put(self, item, timeout=None):
+        """Wait for room (at most timeout s); False if the item could not be queued."""
+        with self._cond:
+            start = time.monotonic()
+            ok = self._cond.wait_for(lambda: len(self._items) < self.capacity or self._closed, timeout)
+            self.blocked_s += time.monotonic() - start
+            if not ok or self._closed:
+                self.dropped += 1
+                return False
+            self._append(item)
+            return True
+
+    def get_batch(self, max_items, timeout=None):
+        """Up to max_items items, waiting at most timeout s for the first; [] on timeout or when closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popleft())
+            self._cond.notify_all()
+            return batch
+
+    def close(self):
+        """No more puts; consumers drain what is left, then get []."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def finished(self):
+        with self._cond:
+            return self._closed and not self._items
+
+
+class _Latency:
+    """Recent per-sample latencies (s) of one stage, for percentiles."""
+
+    def __init__(self, keep=10000):
+        self._values = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, now, samples):
+        with self._lock:
+            self._values.extend(now - s.t_read for s in samples)
+            self.count += len(samples)
+
+    def summary(self):
+        with self._lock:
+            values = np.array(self._values) * 1000.0
+        if not values.size:
+            return {"samples": self.count, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        p50, p95 = np.percentile(values, [50, 95])
+        return {"samples": self.count, "p50_ms": float(p50), "p95_ms": float(p95), "max_ms": float(values.max())}
+
+
+class EcgPipeline:
+    """
+    ECG acquisition split into three threads joined by bounded buffers:
+
+      acquisition : sampler.run() -> raw buffer (never blocks: drops when the DSP stage
+                    is behind; the next queued sample carries the gap in `missed`)
+      dsp         : ecg_filter.process() on each batch -> on_filtered(samples, filtered)
+                    -> store buffer (blocks while full: backpressure)
+      storage     : EcgChunker (encryption) + SampleWriter (batched commits)
+
+    so a slow fsync or print no longer delays the next ADC read.
+    The raw buffer holds `raw_capacity` samples (default 2 s), the store buffer
+    `store_capacity` DSP batches. metrics() gives per-stage depth, drops and latency
+    (from the ADC read to the stage finishing the sample).
+    """
+
+    def __init__(self, sampler, ecg_filter, chunker, writer, on_filtered=None,
+                 raw_capacity=None, store_capacity=64, batch=50, clock=time.monotonic):
+        self.sampler = sampler
+        self.ecg_filter = ecg_filter
+        self.chunker = chunker
+        self.writer = writer
+        self.on_filtered = on_filtered
+        self.batch = batch
+        self.clock = clock
+        self.raw = BoundedBuffer(raw_capacity or 2 * sampler.fs, 'raw')
+        self.store = BoundedBuffer(store_capacity, 'store')
+        self.latency = {"dsp": _Latency(), "storage": _Latency()}
+        self.errors = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    # --- control ---
+    def start(self, n_samples=None, duration=None):
+        self._threads = [
+            threading.Thread(target=self._guard, args=(self._acquire, n_samples, duration), name='ecg-acquisition'),
+            threading.Thread(target=self._guard, args=(self._dsp,), name='ecg-dsp'),
+            threading.Thread(target=self._guard, args=(self._storage,), name='ecg-storage'),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        """Stop acquiring; what was already read is still filtered and stored."""
+        self._stop.set()
+
+    @property
+    def running(self):
+        """True while any stage thread is still working."""
+        return any(t.is_alive() for t in self._threads)
+
+    def join(self, timeout=None):
+        for t in self._threads:
+            t.join(timeout)
+        if self.errors:
+            raise self.errors[0]
+
+    def run(self, n_samples=None, duration=None):
+        self.start(n_samples, duration)
+        try:
+            self.join()
+        except KeyboardInterrupt:
+            self.stop()
+            self.join()
+            raise
+
+    def _guard(self, target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            self.errors.append(e)
+            self.stop()
+            # unblock the other stages
+            self.raw.close()
+            self.store.close()
+
+    # --- stages ---
+    def _acquire(self, n_samples, duration):
+        gap = 0
+        try:
+            for sample in self.sampler.run(n_samples=n_samples, duration=duration, should_stop=self._stop.is_set):
+                if gap:
+                    sample = sample._replace(missed=sample.missed + gap)
+                if self.raw.put_nowait(sample):
+                    gap = 0
+                else:
+                    gap = sample.missed + 1
+        finally:
+            self.raw.close()
+
+    def _dsp(self):
+        try:
+            while True:
+                samples = self.raw.get_batch(self.batch, timeout=0.1)
+                if not samples:
+                    if self.raw.finished:
+                        return
+                    continue
+                filtered = self.ecg_filter.process([s.value for s in samples])
+                if self.on_filtered is not None:
+                    self.on_filtered(samples, filtered)
+                self.latency["dsp"].add(self.clock(), samples)
+                self.store.put((samples, filtered))
+        finally:
+            self.store.close()
+
+    def _storage(self):
+        try:
+            while True:
+                items = self.store.get_batch(16, timeout=0.1)
+                if not items:
+                    if self.store.finished:
+                        return
+                    continue
+                for samples, _ in items:
+                    for s in samples:
+                        if s.missed:
+                            # keep timestamp + k / rate true: a gap starts a new chunk
+                            self._write(self.chunker.flush())
+                        self._write(self.chunker.add(s.value, s.epoch))
+                    self.latency["storage"].add(self.clock(), samples)
+        finally:
+            self._write(self.chunker.flush())
+            self.writer.flush()
+
+    def _write(self, row):
+        if row:
+            self.writer.add(row)
+
+    # --- metrics ---
+    def metrics(self):
+        buffers = {}
+        for buf in (self.raw, self.store):
+            buffers[buf.name] = {"depth": len(buf), "high_water": buf.high_water, "capacity": buf.capacity,
+                                 "queued": buf.put_count, "dropped": buf.dropped,
+                                 "blocked_s": round(buf.blocked_s, 3)}
+        return {
+            "sampler": self.sampler.report(),
+            "buffers": buffers,
+            "latency": {name: lat.summary() for name, lat in self.latency.items()},
+        }
+
+    def report_lines(self):
+        m = self.metrics()
+        lines = []
+        for name, b in m["buffers"].items():
+            lines.append(f"  {name:>7} buffer: depth {b['depth']}, high water {b['high_water']}/{b['capacity']}, "
+                         f"dropped {b['dropped']}, producer blocked {b['blocked_s']:.3f} s")
+        for name, lat in m["latency"].items():
+            lines.append(f"  {name:>7} latency: {lat['samples']} samples, p50 {lat['p50_ms']:.1f} ms, "
+                         f"p95 {lat['p95_ms']:.1f} ms, max {lat['max_ms']:.1f} ms")
+        return lines
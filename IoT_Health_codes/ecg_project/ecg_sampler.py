@@ -0,0 +1,119 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# Sample rates the filters and the chunk format are used with (Hz)
+SAMPLE_RATES = (100, 250, 500)
+
+# One ADC reading:
+#   index    : deadline number k (sample k is due at start + k / fs); gaps = missed deadlines
+#   deadline : monotonic time it was due
+#   t_read   : monotonic time of the read (midpoint of the read call)
+#   epoch    : wall-clock time of the deadline (for timestamps in the DB)
+#   value    : what read() returned
+#   missed   : deadlines skipped right before this one (0 normally)
+Sample = namedtuple('Sample', 'index deadline t_read epoch value missed')
+
+
+class DeadlineSampler:
+    """
+    Calls read() at absolute monotonic deadlines start + k / fs, so the rate does not drift
+    with the time the rest of the loop takes (filtering, printing, encryption, DB writes).
+
+    A deadline that is already more than one period late when its turn comes is counted
+    as missed and skipped, keeping later samples on the same time grid; the next sample
+    has `missed` set so consumers can handle the gap. Lateness of each taken sample
+    (t_read - deadline) is recorded for the jitter report.
+
+    clock/sleep default to time.monotonic/time.sleep and can be replaced by a fake clock.
+    spin_s: sleep until this much before a deadline, then busy-wait (better jitter,
+    more CPU); 0 just sleeps.
+    """
+
+    def __init__(self, fs, read, clock=time.monotonic, sleep=time.sleep, wall_clock=time.time, spin_s=0.0):
+        if fs not in SAMPLE_RATES:
+            raise ValueError(f"sample rate must be one of {SAMPLE_RATES}, got {fs}")
+        self.fs = fs
+        self.period = 1.0 / fs
+        self.read = read
+        self.clock = clock
+        self.sleep = sleep
+        self.wall_clock = wall_clock
+        self.spin_s = spin_s
+        self.samples = 0
+        self.missed = 0
+        self._lateness = []
+        self._first = self._last = None
+
+    def run(self, n_samples=None, duration=None, should_stop=None):
+        """
+        Generate Samples until n_samples were taken, `duration` seconds passed or
+        should_stop() returns True (checked before every deadline).
+        """
+        start = self.clock()
+        wall_start = self.wall_clock()
+        k = 0
+        missed_run = 0
+        while True:
+            if n_samples is not None and self.samples >= n_samples:
+                return
+            if should_stop is not None and should_stop():
+                return
+            deadline = start + k * self.period
+            if duration is not None and deadline - start >= duration:
+                return
+
+            now = self.clock()
+            if now - deadline > self.period:
+                # too late for this one: skip whole periods to the latest deadline that is
+                # less than a period late, and take that one at once
+                skip = int((now - deadline) / self.period)
+                k += skip
+                missed_run += skip
+                self.missed += skip
+                continue
+
+            wait = deadline - now
+            if wait > 0 and not self.spin_s:
+                self.sleep(wait)
+            elif wait > 0:
+                if wait > self.spin_s:
+                    self.sleep(wait - self.spin_s)
+                while self.clock() < deadline:
+                    pass
+
+            t_before = self.clock()
+            value = self.read()
+            t_read = 0.5 * (t_before + self.clock())
+
+            self.samples += 1
+            self._lateness.append(t_before - deadline)
+            if self._first is None:
+                self._first = t_read
+            self._last = t_read
+            yield Sample(k, deadline, t_read, wall_start + (deadline - start), value, missed_run)
+            missed_run = 0
+            k += 1
+
+    def report(self):
+        """Achieved rate, missed deadlines and lateness percentiles (µs) of the run so far."""
+        lateness = np.array(self._lateness) * 1e6
+        span = (self._last - self._first) if self.samples > 1 else 0.0
+        p50, p95, p99 = np.percentile(lateness, [50, 95, 99]) if lateness.size else (0.0, 0.0, 0.0)
+        return {
+            "target_hz": self.fs,
+            "achieved_hz": (self.samples - 1) / span if span > 0 else 0.0,
+            "samples": self.samples,
+            "missed": self.missed,
+            "jitter_p50_us": float(p50),
+            "jitter_p95_us": float(p95),
+            "jitter_p99_us": float(p99),
+            "jitter_max_us": float(lateness.max()) if lateness.size else 0.0,
+        }
+
+    def report_line(self):
+        r = self.report()
+        return (f"ECG sampling: {r['samples']} samples at {r['achieved_hz']:.1f} Hz (target {r['target_hz']} Hz), "
+                f"{r['missed']} missed deadlines, lateness p50/p95/p99/max "
+                f"{r['jitter_p50_us']:.0f}/{r['jitter_p95_us']:.0f}/{r['jitter_p99_us']:.0f}/{r['jitter_max_us']:.0f} us")
@@ -5,12 +5,14 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from utils.encryption_utils import encrypt_field
+from health_database.enc_keys import encrypt
+from health_database.sample_writer import SampleWriter
+from health_database.ecg_chunks import ECG_CHUNK_COLUMNS, EcgChunker, ensure_ecg_chunks_table
+from ecg_filter import EcgFilter
+from ecg_sampler import SAMPLE_RATES, DeadlineSampler
+from ecg_pipeline import EcgPipeline
+import argparse
 import spidev
-import time
-import sqlite3
-from collections import deque
-from scipy.signal import butter, lfilter, iirnotch
 
 # ---------- SPI SETUP ----------
 spi = spidev.SpiDev()
@@ -24,69 +26,91 @@ def read_adc(channel):
     return ((adc[1] & 3) << 8) + adc[2]
 
 # ---------- FILTER SETUP ----------
-Fs = 100  # Sampling Rate (Hz)
-nyq = 0.5 * Fs
+# Notch @ 50Hz (ρεύμα) + Low-pass filter < 40Hz, ως second-order sections με κατάσταση:
+# κάθε νέο block φιλτράρεται μόνο του, χωρίς να ξαναφιλτράρεται όλο το παράθυρο.
+# Ένα φίλτρο ανά sample rate, σχεδιασμένο μία φορά (η κατάσταση μηδενίζεται σε κάθε μέτρηση)
+_filters = {}
 
-# Low-pass filter < 40Hz
-low_cutoff = 40 / nyq
-b_lp, a_lp = butter(2, low_cutoff, btype='low')
-
-# Notch @ 50Hz (ρεύμα)
-f0 = 50.0
-Q = 30.0
-b_notch, a_notch = iirnotch(f0 / nyq, Q)
-
-def apply_filters(signal):
-    # 1. Notch filter
-    notch_filtered = lfilter(b_notch, a_notch, signal)
-    # 2. Low-pass filter
-    return lfilter(b_lp, a_lp, notch_filtered)
+def get_filter(fs):
+    if fs not in _filters:
+        _filters[fs] = EcgFilter(fs, notch_hz=50.0, q=30.0, lowpass_hz=40.0)
+    return _filters[fs]
 
 # ---------- DATABASE SETUP ----------
 db_path = "/home/anna/health_database/health_data.db"
 
-def save_ecg_data(value):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-   # Κρυπτογράφηση ECG
-    blob = encrypt_field(str(value).encode())
-    cursor.execute(
-        "INSERT INTO ecg_data (timestamp, enc_ecg) VALUES (datetime('now','localtime'), ?)",
-        (blob,),
-    )
-    conn.commit()
-    conn.close()
-
-# ---------- DATA SETUP ----------
-window_size = 200
-raw_data = deque([0]*window_size, maxlen=window_size)
-filtered_data = deque([0]*window_size, maxlen=window_size)
-
-i = 0
-max_samples = 70
-print("Printing raw and filtered ECG data (up to 70 samples)...")
-
-try:
-    while i < max_samples:
-        value = read_adc(0)
-        raw_data.append(value)
-        
-        # Apply filter
-        filtered = apply_filters(list(raw_data))[-1]
-        filtered_data.append(filtered)
-
+# Samples are packed into chunks (one encrypted int16 array per row in ecg_chunks)
+# and the chunk rows are committed in batches (one fsync per flush, not per sample)
+ensure_ecg_chunks_table(db_path)
+writer = SampleWriter(db_path, 'ecg_chunks', ECG_CHUNK_COLUMNS, max_rows=1, max_delay_ms=1000)
+
+# ---------- PIPELINE ----------
+# Τρία νήματα: ανάγνωση ADC (μόνο αυτό, στα deadlines) -> φίλτρα + print -> κρυπτογράφηση + DB,
+# με bounded buffers ανάμεσα, ώστε ένα αργό fsync ή print να μην καθυστερεί την επόμενη ανάγνωση
+def make_pipeline(fs=100, on_filtered=None):
+    """
+    EcgPipeline for one measurement at fs Hz on the open SPI bus and writer: a new
+    sampler and chunk session, the rate's filter with its state reset.
+    """
+    ecg_filter = get_filter(fs)
+    ecg_filter.reset()
+    chunker = EcgChunker(fs, encrypt, chunk_size=500)
+    sampler = DeadlineSampler(fs, lambda: read_adc(0))
+    return EcgPipeline(sampler, ecg_filter, chunker, writer, on_filtered=on_filtered)
+
+def measure(n_samples=70, fs=100, on_filtered=None, should_stop=None):
+    """
+    Up to n_samples at fs Hz; should_stop() ends the run early (what was read is still
+    stored). Returns the finished EcgPipeline, for its sampler and metrics.
+    """
+    pipeline = make_pipeline(fs, on_filtered)
+    pipeline.start(n_samples=n_samples)
+    try:
+        while pipeline.running:
+            if should_stop is not None and should_stop():
+                pipeline.stop()
+            pipeline.join(0.1)
+        pipeline.join()
+    except BaseException:
+        pipeline.stop()
+        pipeline.join()
+        raise
+    return pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="ECG (MCP3008 ch0) -> filtered print + encrypted SQLite")
+    parser.add_argument("-r", "--rate", type=int, choices=SAMPLE_RATES, default=100,
+                        help="sample rate in Hz, default 100")
+    parser.add_argument("-n", "--samples", type=int, default=70,
+                        help="number of samples to read, default 70")
+    args = parser.parse_args()
+
+    Fs = args.rate  # Sampling Rate (Hz), τηρείται με απόλυτα deadlines (ecg_sampler)
+    max_samples = args.samples
+    printed = 0
+
+    def print_filtered(samples, filtered):
         # Print raw and filtered values
-        print(f"Sample {i+1}: Raw = {value}, Filtered = {filtered:.2f}")
-
-        # Save raw data to database
-        save_ecg_data(value)
-
-        time.sleep(0.01)
-        i += 1
-
-    print("Completed 70 samples")
-    spi.close()
-
-except KeyboardInterrupt:
-    print("Terminated with Ctrl+C")
-    spi.close()
\ No newline at end of file
+        nonlocal printed
+        for sample, value in zip(samples, filtered):
+            printed += 1
+            print(f"Sample {printed}: Raw = {sample.value}, Filtered = {value:.2f}")
+
+    pipeline = make_pipeline(Fs, on_filtered=print_filtered)
+    print(f"Printing raw and filtered ECG data (up to {max_samples} samples at {Fs} Hz)...")
+
+    try:
+        pipeline.run(n_samples=max_samples)
+        print(f"Completed {pipeline.sampler.samples} samples")
+
+    except KeyboardInterrupt:
+        print("Terminated with Ctrl+C")
+    finally:
+        writer.close()
+        print(pipeline.sampler.report_line())
+        print("\n".join(pipeline.report_lines()))
+        print(writer.report())
+        spi.close()
+
+if __name__ == '__main__':
+    main()
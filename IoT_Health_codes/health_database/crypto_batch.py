@@ -0,0 +1,76 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
+
+from health_database.enc_keys import current_key_id, decrypt, encrypt
+
+# Below this many items a batch is handled inline: pool hand-off costs more than it saves.
+PARALLEL_THRESHOLD = int(os.getenv('CRYPTO_PARALLEL_THRESHOLD', '2000'))
+WORKERS = int(os.getenv('CRYPTO_WORKERS', str(os.cpu_count() or 4)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='crypto')
+        return _pool
+
+
+def _decrypt_slice(items):
+    out = []
+    for blob, key_id in items:
+        if blob is None:
+            out.append(None)
+            continue
+        try:
+            out.append(decrypt(blob, key_id))
+        except Exception:
+            out.append(None)
+    return out
+
+
+def _encrypt_slice(key_id, items):
+    return [encrypt(pt, key_id) if pt is not None else None for pt in items]
+
+
+def _map_slices(func, items, threshold, workers):
+    items = list(items)
+    if len(items) < max(1, threshold) or workers <= 1:
+        return func(items)
+    # one contiguous slice per worker keeps the result order and the hand-off count low
+    step = -(-len(items) // workers)
+    slices = [items[i:i + step] for i in range(0, len(items), step)]
+    out = []
+    for part in _get_pool().map(func, slices):
+        out.extend(part)
+    return out
+
+
+def decrypt_many(blobs, threshold=PARALLEL_THRESHOLD, workers=WORKERS, key_ids=None):
+    """
+    Bulk counterpart of decrypt_field: returns plaintext bytes per blob, in order,
+    with None for missing or undecryptable blobs (decrypt_field would raise).
+    key_ids gives each row's key_id column (see enc_keys); None means all legacy key.
+
+    Large batches are split over a shared thread pool; the AES-GCM work in the
+    cryptography backend runs without the GIL, so the slices really overlap.
+    """
+    blobs = list(blobs)
+    items = list(zip(blobs, key_ids if key_ids is not None else repeat(None)))
+    return _map_slices(_decrypt_slice, items, threshold, workers)
+
+
+def encrypt_many(plaintexts, threshold=PARALLEL_THRESHOLD, workers=WORKERS, key_id=None):
+    """
+    Bulk counterpart of encrypt_field (None stays None), same pooling as decrypt_many.
+    Encrypts under key_id, by default current_key_id(); store enc_keys.stored_key_id(key_id) with the rows.
+    """
+    if key_id is None:
+        key_id = current_key_id()
+    return _map_slices(partial(_encrypt_slice, key_id), plaintexts, threshold, workers)
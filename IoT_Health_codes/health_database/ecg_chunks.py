@@ -0,0 +1,112 @@
+import sqlite3
+import sys
+import time
+import uuid
+from array import array
+
+from health_database.enc_keys import current_key_id, ensure_key_id_columns, stored_key_id
+
+# One row per window of ECG samples instead of one row per sample.
+#   timestamp   : time of the first sample ('YYYY-MM-DD HH:MM:SS.fff'), same name as the
+#                 other tables so day ranges / MAX(timestamp) / indexes work the same way
+#   sample_rate : Hz, sample k is at timestamp + k / sample_rate
+#   enc_samples : encrypt_field() of the samples packed as little-endian int16
+#   key_id      : key that encrypted enc_samples (see enc_keys)
+ECG_CHUNKS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ecg_chunks (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    sample_rate REAL NOT NULL,
+    n_samples INTEGER NOT NULL,
+    enc_samples BLOB,
+    key_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_ecg_chunks_timestamp ON ecg_chunks(timestamp);
+"""
+
+# Column order used with SampleWriter
+ECG_CHUNK_COLUMNS = ('session_id', 'timestamp', 'sample_rate', 'n_samples', 'enc_samples', 'key_id')
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def ensure_ecg_chunks_table(db_path):
+    """Create ecg_chunks (and its index) if it does not exist yet."""
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        conn.executescript(ECG_CHUNKS_SCHEMA)
+        ensure_key_id_columns(conn, ('ecg_chunks',))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def chunk_timestamp(epoch_s):
+    """Epoch seconds -> local 'YYYY-MM-DD HH:MM:SS.fff' (like datetime('now','localtime') plus ms)."""
+    ms = int(round((epoch_s % 1) * 1000))
+    if ms == 1000:
+        epoch_s, ms = epoch_s + 1, 0
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(epoch_s)) + f'.{ms:03d}'
+
+
+def pack_samples(values):
+    """Pack integer samples (10-bit ADC values fit easily) as little-endian int16 bytes."""
+    packed = array('h', values)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_samples(data):
+    """Inverse of pack_samples, as array('h'). app8.py uses numpy.frombuffer(data, '<i2') instead."""
+    packed = array('h')
+    packed.frombytes(data)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed
+
+
+class EcgChunker:
+    """
+    Collects samples of one acquisition session and emits one encrypted ecg_chunks row
+    (tuple in ECG_CHUNK_COLUMNS order) every `chunk_size` samples.
+
+        chunker = EcgChunker(Fs, encrypt)     # enc_keys.encrypt, under the current key
+        row = chunker.add(value)      # None until a chunk is complete
+        row = chunker.flush()         # last, partial chunk (or None)
+    """
+
+    def __init__(self, sample_rate, encrypt, chunk_size=DEFAULT_CHUNK_SIZE, session_id=None, key_id=None):
+        # encrypt(plaintext, key_id), as enc_keys.encrypt; key_id defaults to the current key
+        self.sample_rate = float(sample_rate)
+        self.encrypt = encrypt
+        self.key_id = current_key_id() if key_id is None else key_id
+        self.chunk_size = int(chunk_size)
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self._samples = array('h')
+        self._start = None
+
+    def add(self, value, t=None):
+        """Add one sample; t is its epoch time (defaults to now) and matters only for the first sample of a chunk."""
+        if self._start is None:
+            self._start = time.time() if t is None else t
+        self._samples.append(int(value))
+        if len(self._samples) >= self.chunk_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        if not self._samples:
+            return None
+        row = (
+            self.session_id,
+            chunk_timestamp(self._start),
+            self.sample_rate,
+            len(self._samples),
+            self.encrypt(pack_samples(self._samples), self.key_id),
+            stored_key_id(self.key_id),
+        )
+        self._samples = array('h')
+        self._start = None
+        return row
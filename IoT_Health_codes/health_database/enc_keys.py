@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import threading
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from utils.encryption_utils import decrypt_field, encrypt_field
+
+# Every table with enc_* BLOBs has a key_id column saying which key encrypted the row:
+#   NULL / 0 : DB_ENC_KEY through utils.encryption_utils (all rows written before key rotation)
+#   1, 2, ...: keys from DB_ENC_KEYS="1:<hex>,2:<hex>" (16 or 32 bytes each), AES-GCM with
+#              blob = 12-byte nonce + ciphertext/tag
+# DB_ENC_KEY_ID picks the key for new rows (default 0). To rotate: add the new key to
+# DB_ENC_KEYS, point DB_ENC_KEY_ID at it, restart the writers and run rotate_key.py.
+# Keep old keys listed until rotate_key.py reports nothing left under them.
+LEGACY_KEY_ID = 0
+
+# table -> encrypted column
+ENCRYPTED_COLUMNS = {
+    'temp_data': 'enc_temp',
+    'spo2_data': 'enc_spo2',
+    'ecg_data': 'enc_ecg',
+    'ecg_chunks': 'enc_samples',
+    'rollups': 'enc_stats',
+}
+
+_keys = None
+_keys_lock = threading.Lock()
+
+
+def _load_keys():
+    # read lazily: app8.py loads .env after its imports
+    global _keys
+    with _keys_lock:
+        if _keys is None:
+            keys = {}
+            for item in filter(None, (p.strip() for p in os.getenv('DB_ENC_KEYS', '').split(','))):
+                key_id, _, hex_key = item.partition(':')
+                keys[int(key_id)] = AESGCM(bytes.fromhex(hex_key.strip()))
+            if LEGACY_KEY_ID in keys:
+                raise ValueError("DB_ENC_KEYS: key id 0 is reserved for DB_ENC_KEY")
+            _keys = keys
+        return _keys
+
+
+def current_key_id():
+    """Key id for new rows (DB_ENC_KEY_ID, default 0 = DB_ENC_KEY)."""
+    key_id = int(os.getenv('DB_ENC_KEY_ID', str(LEGACY_KEY_ID)))
+    if key_id != LEGACY_KEY_ID and key_id not in _load_keys():
+        raise KeyError(f"DB_ENC_KEY_ID={key_id} is not in DB_ENC_KEYS")
+    return key_id
+
+
+def stored_key_id(key_id):
+    """Value for the key_id column: NULL for the legacy key, so untouched rows and new ones match."""
+    return None if not key_id else key_id
+
+
+def encrypt(plaintext, key_id=None):
+    """encrypt_field under key_id (default: current_key_id())."""
+    if key_id is None:
+        key_id = current_key_id()
+    if not key_id:
+        return encrypt_field(plaintext)
+    nonce = os.urandom(12)
+    return nonce + _load_keys()[key_id].encrypt(nonce, plaintext, None)
+
+
+def decrypt(blob, key_id=None):
+    """decrypt_field for a row stored with key_id (None/0 = legacy key). Raises on unknown key or bad tag."""
+    if not key_id:
+        return decrypt_field(blob)
+    return _load_keys()[key_id].decrypt(blob[:12], blob[12:], None)
+
+
+def ensure_key_id_columns(target, tables=None):
+    """
+    Add the key_id column to the given tables (default: all of ENCRYPTED_COLUMNS) where
+    missing; tables that do not exist are skipped. target is a db path or a connection/cursor.
+    """
+    conn = sqlite3.connect(target, timeout=10) if isinstance(target, str) else target
+    try:
+        for table in tables or ENCRYPTED_COLUMNS:
+            cols = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+            if cols and 'key_id' not in cols:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN key_id INTEGER")
+        if isinstance(target, str):
+            conn.commit()
+    finally:
+        if isinstance(target, str):
+            conn.close()
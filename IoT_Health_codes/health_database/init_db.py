@@ -1,7 +1,9 @@
 import os
 import sys
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import sqlite3
+import time
 
 # Ensure parent directory is on path to find utils package
 def add_parent_to_path():
@@ -10,7 +12,10 @@ def add_parent_to_path():
         sys.path.insert(0, parent_dir)
 add_parent_to_path()
 
-from utils.encryption_utils import encrypt_field
+from health_database.enc_keys import current_key_id, decrypt, encrypt, ensure_key_id_columns, stored_key_id
+from health_database.ecg_chunks import ECG_CHUNKS_SCHEMA, DEFAULT_CHUNK_SIZE, pack_samples
+from health_database.rollups import ROLLUPS_SCHEMA
+from health_database.crypto_batch import encrypt_many
 
 # Load environment variables
 load_dotenv()
@@ -28,55 +33,165 @@ def get_columns(cursor, table_name: str) -> list:
     return [row[1] for row in cursor.fetchall()]
 
 
-def migrate_table(cursor, table: str, cols: list):
+def table_exists(cursor, table: str) -> bool:
+    return cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+
+def migrate_table(cursor, table: str, cols: list, batch_rows: int = 5000, checkpoint_rows: int = 100_000):
     """
     Migrate plaintext columns to encrypted BLOB columns for a specific table.
     cols: list of tuples (plain_col, encrypted_col)
+
+    The plaintext table is renamed to <table>_old and copied into the new schema in id
+    order, batch_rows at a time: each batch is encrypted with encrypt_many (thread pool)
+    and written with one executemany. The work is committed every checkpoint_rows rows,
+    so an interrupted run resumes after the last copied id instead of starting over;
+    <table>_old is dropped only once everything has been copied.
     """
+    conn = cursor.connection
     old_table = f"{table}_old"
     new_table = table
-
-    # Drop any leftover old_table from failed runs
-    if cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (old_table,)).fetchone():
-        cursor.execute(f"DROP TABLE {old_table};")
-
-    # Get existing columns of new_table
-    if cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (new_table,)).fetchone():
-        existing = get_columns(cursor, new_table)
-    else:
-        existing = []
-
-    # Determine if migration is needed (plain columns exist)
     plain_cols = [pc for pc, _ in cols]
-    if not any(pc in existing for pc in plain_cols):
-        print(f"Skipping {new_table}: no plaintext columns to migrate.")
-        return
+    enc_cols = [enc for _, enc in cols]
 
-    # Rename current table to old
-    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {old_table};")
+    if table_exists(cursor, old_table):
+        # Leftover from an interrupted run: <table>_old still holds the plaintext rows
+        if table_exists(cursor, new_table) and any(pc in get_columns(cursor, new_table) for pc in plain_cols):
+            raise RuntimeError(f"Both {old_table} and a plaintext {new_table} exist; resolve by hand.")
+        print(f"Resuming migration of {new_table} from {old_table}.")
+    else:
+        # Determine if migration is needed (plain columns exist)
+        existing = get_columns(cursor, new_table) if table_exists(cursor, new_table) else []
+        if not any(pc in existing for pc in plain_cols):
+            print(f"Skipping {new_table}: no plaintext columns to migrate.")
+            return
+        cursor.execute(f"ALTER TABLE {new_table} RENAME TO {old_table};")
 
     # Create new schema with encrypted BLOB columns
-    create_cols = ["id INTEGER PRIMARY KEY", "timestamp TEXT NOT NULL"] + [f"{enc} BLOB" for _, enc in cols]
-    cursor.execute(f"CREATE TABLE {new_table} ({', '.join(create_cols)});")
-
-    # Migrate and encrypt data
-    sel_cols = ", ".join(plain_cols)
-    cursor.execute(f"SELECT id, timestamp, {sel_cols} FROM {old_table};")
-    for row in cursor.fetchall():
-        id_, timestamp, *values = row
-        enc_values = []
-        for val, (pc, enc_col) in zip(values, cols):
-            enc_values.append(encrypt_field(str(val).encode()) if val is not None else None)
-        placeholders = ', '.join(['?'] * (2 + len(enc_values)))
-        enc_cols_list = ', '.join([enc for _, enc in cols])
-        cursor.execute(
-            f"INSERT INTO {new_table} (id, timestamp, {enc_cols_list}) VALUES ({placeholders});",
-            (id_, timestamp, *enc_values)
-        )
+    create_cols = (["id INTEGER PRIMARY KEY", "timestamp TEXT NOT NULL"] + [f"{enc} BLOB" for enc in enc_cols]
+                   + ["key_id INTEGER"])
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {new_table} ({', '.join(create_cols)});")
+    ensure_key_id_columns(cursor, (new_table,))  # resumed from a run that predates key_id
+    conn.commit()
+    key_id = current_key_id()
+
+    last_id = cursor.execute(f"SELECT COALESCE(MAX(id), -1) FROM {new_table}").fetchone()[0]
+    total = cursor.execute(f"SELECT COUNT(*) FROM {old_table} WHERE id > ?", (last_id,)).fetchone()[0]
+    select_sql = (f"SELECT id, timestamp, {', '.join(plain_cols)} FROM {old_table} "
+                  f"WHERE id > ? ORDER BY id LIMIT {int(batch_rows)};")
+    insert_sql = (f"INSERT INTO {new_table} (id, timestamp, {', '.join(enc_cols)}, key_id) "
+                  f"VALUES ({', '.join(['?'] * (3 + len(enc_cols)))});")
+
+    done = since_checkpoint = 0
+    t0 = time.perf_counter()
+    while True:
+        # keyset pagination: no cursor has to stay open across the checkpoint commits
+        rows = cursor.execute(select_sql, (last_id,)).fetchall()
+        if not rows:
+            break
+        plaintexts = [str(val).encode() if val is not None else None for row in rows for val in row[2:]]
+        blobs = encrypt_many(plaintexts, key_id=key_id)
+        n = len(enc_cols)
+        cursor.executemany(insert_sql, [
+            (row[0], row[1], *blobs[i * n:(i + 1) * n], stored_key_id(key_id)) for i, row in enumerate(rows)
+        ])
+        last_id = rows[-1][0]
+        done += len(rows)
+        since_checkpoint += len(rows)
+        if since_checkpoint >= checkpoint_rows:
+            conn.commit()
+            since_checkpoint = 0
+            elapsed = time.perf_counter() - t0
+            print(f"  {new_table}: {done}/{total} rows ({done / elapsed:.0f} rows/s), checkpoint at id {last_id}")
 
     # Drop old table
     cursor.execute(f"DROP TABLE {old_table};")
-    print(f"Migrated and encrypted table: {new_table}")
+    conn.commit()
+    elapsed = time.perf_counter() - t0
+    print(f"Migrated and encrypted table: {new_table} ({done} rows in {elapsed:.1f} s, "
+          f"{done / elapsed if elapsed else 0:.0f} rows/s)")
+
+
+# Tables read by day/range in the dashboard (dz_app/app8.py)
+TIMESTAMP_INDEXED_TABLES = ['temp_data', 'spo2_data', 'ecg_data']
+
+
+def create_timestamp_indexes(cursor, tables=TIMESTAMP_INDEXED_TABLES):
+    """
+    Add an index on timestamp so that range filters
+    (timestamp >= day AND timestamp < next_day) and MAX(timestamp) are index seeks.
+    """
+    for table in tables:
+        if not cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            continue
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp);")
+        print(f"Timestamp index ready: {table}")
+
+
+def migrate_ecg_to_chunks(cursor, chunk_size=DEFAULT_CHUNK_SIZE, max_gap_s=2.0):
+    """
+    Copy per-sample ecg_data rows into ecg_chunks (one encrypted int16 array per chunk).
+
+    Consecutive rows less than max_gap_s apart form one session ('legacy-<first id>').
+    Old rows only have 1 s timestamps, so each session's sample rate is estimated as
+    samples / covered seconds. ecg_data is left in place; drop it once the chunks are checked.
+    Runs once: skipped if legacy chunks already exist.
+    """
+    if not cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ecg_data'").fetchone():
+        return
+    for stmt in ECG_CHUNKS_SCHEMA.split(';'):
+        if stmt.strip():
+            cursor.execute(stmt)
+    if cursor.execute("SELECT 1 FROM ecg_chunks WHERE session_id LIKE 'legacy-%' LIMIT 1").fetchone():
+        print("Skipping ecg_chunks: ecg_data already migrated.")
+        return
+
+    ensure_key_id_columns(cursor, ('ecg_data', 'ecg_chunks'))
+    key_id = current_key_id()
+    insert_sql = ("INSERT INTO ecg_chunks (session_id, timestamp, sample_rate, n_samples, enc_samples, key_id) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+    stats = {'sessions': 0, 'chunks': 0, 'samples': 0, 'skipped': 0}
+
+    def write_session(first_id, first_ts, last_ts, values):
+        rate = len(values) / ((last_ts - first_ts).total_seconds() + 1)
+        rows = []
+        for off in range(0, len(values), chunk_size):
+            part = values[off:off + chunk_size]
+            start = first_ts + timedelta(seconds=off / rate)
+            rows.append((f"legacy-{first_id}", start.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                         rate, len(part), encrypt(pack_samples(part), key_id), stored_key_id(key_id)))
+        cursor.executemany(insert_sql, rows)
+        stats['sessions'] += 1
+        stats['chunks'] += len(rows)
+        stats['samples'] += len(values)
+
+    # separate cursor so the INSERTs do not reset the streaming SELECT
+    reader = cursor.connection.cursor()
+    reader.execute("SELECT id, timestamp, enc_ecg, key_id FROM ecg_data ORDER BY id")
+    session = None  # [first_id, first_ts, last_ts, values]
+    while True:
+        batch = reader.fetchmany(5000)
+        if not batch:
+            break
+        for id_, ts, blob, row_key_id in batch:
+            try:
+                value = int(float(decrypt(blob, row_key_id).decode()))
+                t = datetime.strptime(ts[:19], '%Y-%m-%d %H:%M:%S')
+            except Exception:
+                stats['skipped'] += 1
+                continue
+            if session and (t - session[2]).total_seconds() <= max_gap_s:
+                session[2] = t
+                session[3].append(value)
+            else:
+                if session:
+                    write_session(*session)
+                session = [id_, t, t, [value]]
+    if session:
+        write_session(*session)
+
+    print(f"Migrated ecg_data -> ecg_chunks: {stats['samples']} samples, {stats['sessions']} sessions, "
+          f"{stats['chunks']} chunks ({stats['skipped']} undecryptable rows skipped)")
 
 
 def main():
@@ -93,7 +208,16 @@ def main():
     for table, cols in tables_to_migrate.items():
         migrate_table(cursor, table, cols)
 
-    conn.commit()()
+    create_timestamp_indexes(cursor)
+    migrate_ecg_to_chunks(cursor)
+
+    # Rollups are filled on ingest; run rebuild_rollups.py once to cover existing rows
+    cursor.execute(ROLLUPS_SCHEMA)
+
+    # Which key encrypted each row (NULL = DB_ENC_KEY); rotate_key.py re-encrypts under a new one
+    ensure_key_id_columns(cursor)
+
+    conn.commit()
     conn.close()
     print("All migrations complete.")
 
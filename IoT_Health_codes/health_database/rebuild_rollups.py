@@ -0,0 +1,77 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+# Ensure parent directory is on path to find utils package
+PARENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+from dotenv import load_dotenv
+from health_database.enc_keys import current_key_id, decrypt, encrypt, ensure_key_id_columns
+from health_database.crypto_batch import decrypt_many
+from health_database.rollups import ROLLUPS_SCHEMA, VITAL_SOURCES, bucket_stats, merge_into, merge_stats
+
+load_dotenv()
+
+DB_PATH = os.getenv(
+    "DB_PATH",
+    os.path.join(PARENT_DIR, 'health_database', 'health_data.db')
+)
+
+
+def rebuild_vital(conn, vital, batch=5000):
+    """Recompute every minute/hour/day rollup of one vital from its raw table."""
+    table, blob_col = VITAL_SOURCES[vital]
+    if not conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+        print(f"Skipping {vital}: no {table} table.")
+        return
+    start = time.perf_counter()
+    stats = {}
+    n = 0
+    # scan and rewrite in one write transaction: the live writers' merges into the
+    # rollups wait for it, instead of landing in between and being deleted with the rest
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cur = conn.execute(f"SELECT timestamp, {blob_col}, key_id FROM {table} ORDER BY id")
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            samples = []
+            for (ts, _, _), pt in zip(rows, decrypt_many([r[1] for r in rows], key_ids=[r[2] for r in rows])):
+                try:
+                    samples.append((ts, float(pt.decode())))
+                except (AttributeError, ValueError):
+                    continue  # missing / undecryptable
+            for key, s in bucket_stats(samples).items():
+                stats[key] = merge_stats(stats.get(key), s)
+            n += len(samples)
+
+        conn.execute("DELETE FROM rollups WHERE vital=?", (vital,))
+        merge_into(conn, vital, stats, encrypt, decrypt, current_key_id())
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    print(f"Rebuilt {vital} rollups: {n} samples -> {len(stats)} buckets in {time.perf_counter() - start:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the rollups table from the raw vital tables")
+    parser.add_argument("--vital", choices=sorted(VITAL_SOURCES), action="append",
+                        help="vital to rebuild (repeatable), default all")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.executescript(ROLLUPS_SCHEMA)
+    ensure_key_id_columns(conn)
+    for vital in args.vital or sorted(VITAL_SOURCES):
+        rebuild_vital(conn, vital)
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import threading
+
+from health_database.enc_keys import current_key_id, ensure_key_id_columns, stored_key_id
+
+# Pre-aggregated min/max/avg/count per minute, hour and day for each vital.
+# The stats are encrypted like every other value: enc_stats = encrypt_field(b'[n, sum, min, max]'),
+# under the key recorded in key_id (see enc_keys).
+ROLLUPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    vital TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    enc_stats BLOB,
+    key_id INTEGER,
+    PRIMARY KEY (vital, resolution, bucket)
+);
+"""
+
+# vital -> (source table, encrypted column)
+VITAL_SOURCES = {
+    'temp': ('temp_data', 'enc_temp'),
+    'spo2': ('spo2_data', 'enc_spo2'),
+}
+
+# resolution -> how a 'YYYY-MM-DD HH:MM:SS' timestamp is cut to its bucket
+RESOLUTIONS = {
+    'minute': lambda ts: ts[:16] + ':00',
+    'hour':   lambda ts: ts[:13] + ':00:00',
+    'day':    lambda ts: ts[:10],
+}
+
+
+def ensure_rollups_table(db_path):
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        conn.executescript(ROLLUPS_SCHEMA)
+        ensure_key_id_columns(conn, ('rollups',))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def pack_stats(stats):
+    return json.dumps(stats, separators=(',', ':')).encode()
+
+
+def unpack_stats(data):
+    """b'[n, sum, min, max]' -> dict with n/min/max/avg."""
+    n, total, lo, hi = json.loads(data)
+    return {'n': n, 'min': lo, 'max': hi, 'avg': total / n if n else None}
+
+
+def merge_stats(a, b):
+    if a is None:
+        return list(b)
+    return [a[0] + b[0], a[1] + b[1], min(a[2], b[2]), max(a[3], b[3])]
+
+
+def bucket_stats(samples):
+    """[(timestamp, value)] -> {(resolution, bucket): [n, sum, min, max]}."""
+    out = {}
+    for ts, value in samples:
+        for res, cut in RESOLUTIONS.items():
+            key = (res, cut(ts))
+            out[key] = merge_stats(out.get(key), (1, value, value, value))
+    return out
+
+
+class RollupAccumulator:
+    """
+    Collects plaintext samples of one vital between writer flushes and merges them into
+    the rollups table inside the SampleWriter transaction:
+
+        rollup = RollupAccumulator('temp', encrypt, decrypt)    # enc_keys.encrypt / enc_keys.decrypt
+        writer.add_flush_hook(rollup.flush, rollup.rollback)
+        rollup.add(ts, value)          # before writer.add((ts, blob))
+
+    If the flush transaction fails, rollback() puts the stats back, so they are merged
+    again with the rows when the writer retries them.
+    """
+
+    def __init__(self, vital, encrypt, decrypt, key_id=None):
+        # encrypt(plaintext, key_id) / decrypt(blob, key_id); key_id defaults to the current key
+        self.vital = vital
+        self.encrypt = encrypt
+        self.decrypt = decrypt
+        self.key_id = current_key_id() if key_id is None else key_id
+        self._pending = {}
+        self._inflight = {}  # stats taken by the running flush
+        self._lock = threading.Lock()
+
+    def add(self, timestamp, value):
+        if value is None:
+            return
+        value = float(value)
+        with self._lock:
+            for res, cut in RESOLUTIONS.items():
+                key = (res, cut(timestamp))
+                self._pending[key] = merge_stats(self._pending.get(key), (1, value, value, value))
+
+    def flush(self, conn):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._inflight = pending
+        if pending:
+            merge_into(conn, self.vital, pending, self.encrypt, self.decrypt, self.key_id)
+
+    def rollback(self):
+        """The flush transaction failed: keep its stats for the next flush."""
+        with self._lock:
+            for key, stats in self._inflight.items():
+                self._pending[key] = merge_stats(self._pending.get(key), stats)
+            self._inflight = {}
+
+
+def merge_into(conn, vital, stats, encrypt, decrypt, key_id):
+    """
+    Merge {(resolution, bucket): [n, sum, min, max]} into the stored rollups of `vital`.
+    Stored stats are read under their own key_id; merged ones are written under key_id.
+    """
+    rows = []
+    for (res, bucket), new in stats.items():
+        cur = conn.execute(
+            "SELECT enc_stats, key_id FROM rollups WHERE vital=? AND resolution=? AND bucket=?",
+            (vital, res, bucket),
+        ).fetchone()
+        old = json.loads(decrypt(cur[0], cur[1])) if cur and cur[0] is not None else None
+        rows.append((vital, res, bucket, encrypt(pack_stats(merge_stats(old, new)), key_id),
+                     stored_key_id(key_id)))
+    conn.executemany(
+        "INSERT OR REPLACE INTO rollups (vital, resolution, bucket, enc_stats, key_id) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
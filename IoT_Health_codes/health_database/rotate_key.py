@@ -0,0 +1,102 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+# Ensure parent directory is on path to find utils package
+PARENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+from dotenv import load_dotenv
+from health_database.enc_keys import ENCRYPTED_COLUMNS, current_key_id, ensure_key_id_columns, stored_key_id
+from health_database.crypto_batch import decrypt_many, encrypt_many
+
+load_dotenv()
+
+DB_PATH = os.getenv(
+    "DB_PATH",
+    os.path.join(PARENT_DIR, 'health_database', 'health_data.db')
+)
+
+
+def rotate_table(conn, table, key_id, batch=200, pause_ms=50, max_rows_per_s=0):
+    """
+    Re-encrypt every row of `table` that is not under key_id, batch rows per transaction.
+
+    Runs next to the sensor scripts and the dashboard: each batch is a short write
+    transaction followed by a pause, so inserts only ever wait for one small batch.
+    A row is only updated if its BLOB is still the one that was read, so stats rewritten
+    concurrently (rollups) are never overwritten with stale values. Returns (done, failed).
+    """
+    blob_col = ENCRYPTED_COLUMNS[table]
+    target = stored_key_id(key_id)
+    select_sql = (f"SELECT rowid, {blob_col}, key_id FROM {table} "
+                  f"WHERE rowid > ? AND key_id IS NOT ? AND {blob_col} IS NOT NULL ORDER BY rowid LIMIT ?")
+    update_sql = f"UPDATE {table} SET {blob_col} = ?, key_id = ? WHERE rowid = ? AND {blob_col} IS ?"
+
+    last_rowid = done = failed = 0
+    start = time.perf_counter()
+    while True:
+        rows = conn.execute(select_sql, (last_rowid, target, batch)).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        plaintexts = decrypt_many([r[1] for r in rows], key_ids=[r[2] for r in rows])
+        blobs = encrypt_many(plaintexts, key_id=key_id)
+        updates = [(new, target, r[0], r[1]) for r, pt, new in zip(rows, plaintexts, blobs) if pt is not None]
+        failed += len(rows) - len(updates)
+        with conn:
+            conn.executemany(update_sql, updates)
+        done += len(updates)
+
+        # throttle: fixed pause per batch, plus a rows/s ceiling if asked for
+        pause = pause_ms / 1000.0
+        if max_rows_per_s:
+            pause = max(pause, done / max_rows_per_s - (time.perf_counter() - start))
+        time.sleep(pause)
+
+    elapsed = time.perf_counter() - start
+    print(f"{table}: re-encrypted {done} rows under key {key_id} in {elapsed:.1f} s"
+          + (f" ({failed} undecryptable rows left as they are)" if failed else ""))
+    return done, failed
+
+
+def remaining(conn, table, key_id):
+    blob_col = ENCRYPTED_COLUMNS[table]
+    return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE key_id IS NOT ? AND {blob_col} IS NOT NULL",
+                        (stored_key_id(key_id),)).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-encrypt all enc_* values under one key while the device keeps running")
+    parser.add_argument("--to", type=int, default=None,
+                        help="target key id (default DB_ENC_KEY_ID, the key new rows are written with)")
+    parser.add_argument("--table", choices=sorted(ENCRYPTED_COLUMNS), action="append",
+                        help="table to rotate (repeatable), default all")
+    parser.add_argument("--batch", type=int, default=200, help="rows per transaction, default 200")
+    parser.add_argument("--pause-ms", type=int, default=50, help="pause after each batch, default 50 ms")
+    parser.add_argument("--max-rows-per-s", type=int, default=0, help="rate ceiling, default none")
+    args = parser.parse_args()
+
+    key_id = current_key_id() if args.to is None else args.to
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    ensure_key_id_columns(conn)
+    tables = [t for t in (args.table or ENCRYPTED_COLUMNS)
+              if conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (t,)).fetchone()]
+    for table in tables:
+        rotate_table(conn, table, key_id, args.batch, args.pause_ms, args.max_rows_per_s)
+
+    # rows written by writers still on an old key show up here; rerun after restarting them
+    left = {t: remaining(conn, t, key_id) for t in tables}
+    conn.close()
+    if any(left.values()):
+        print("Still under other keys: " + ", ".join(f"{t}={n}" for t, n in left.items() if n))
+    else:
+        print(f"All rows are under key {key_id}; older keys can be removed from DB_ENC_KEYS.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import atexit
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+def now_timestamp(utc=False):
+    """Timestamp in the same 'YYYY-MM-DD HH:MM:SS' form as datetime('now'[, 'localtime'])."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime() if utc else time.localtime())
+
+
+class SampleWriter:
+    """
+    Buffers rows in memory and writes them with a single executemany per transaction.
+
+    A flush happens when `max_rows` rows are pending or `max_delay_ms` has passed since
+    the previous flush (checked on every add), and always on close(). close() is also
+    registered with atexit, so a Ctrl+C that ends the script still writes the tail.
+
+    Usage:
+        writer = SampleWriter(DB_PATH, 'temp_data', ('timestamp', 'enc_temp'))
+        writer.add((now_timestamp(), blob))
+        ...
+        writer.close()
+    """
+
+    def __init__(self, db_path, table, columns, max_rows=100, max_delay_ms=1000, verbose=False):
+        self.db_path = db_path
+        self.table = table
+        self.columns = tuple(columns)
+        self.max_rows = max(1, int(max_rows))
+        self.max_delay = max_delay_ms / 1000.0
+        self.verbose = verbose
+
+        placeholders = ", ".join(["?"] * len(self.columns))
+        self._sql = f"INSERT INTO {table} ({', '.join(self.columns)}) VALUES ({placeholders})"
+        self._pending = []
+        self._lock = threading.Lock()
+        self._conn = None
+        self._closed = False
+        self._last_flush = time.monotonic()
+        self._flush_hooks = []  # (hook, on_rollback)
+
+        # stats
+        self.rows_written = 0
+        self.flushes = 0
+        # flush durations: running totals, plus the most recent ones (writers can live as
+        # long as the acquisition daemon, so the full history is not kept)
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.flush_ms = deque(maxlen=1000)
+
+        atexit.register(self.close)
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        return self._conn
+
+    def add_flush_hook(self, hook, on_rollback=None):
+        """
+        Register hook(conn) to run inside every flush transaction, after the INSERT.
+        on_rollback() is called if that transaction fails after the hook started, so a
+        hook that consumed state of its own can put it back for the retry with the rows.
+        """
+        self._flush_hooks.append((hook, on_rollback))
+
+    def add(self, row):
+        """Queue one row (tuple matching `columns`); flushes if a threshold is reached."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"SampleWriter for {self.table} is closed")
+            self._pending.append(tuple(row))
+            due = (len(self._pending) >= self.max_rows or
+                   time.monotonic() - self._last_flush >= self.max_delay)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all pending rows in one transaction. Returns the number of rows written."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+
+            start = time.perf_counter()
+            conn = self._connection()
+            started = []
+            try:
+                with conn:  # BEGIN ... COMMIT (ROLLBACK on error)
+                    conn.executemany(self._sql, rows)
+                    for hook, on_rollback in self._flush_hooks:
+                        started.append(on_rollback)
+                        hook(conn)
+            except Exception:
+                # keep the rows (and the hooks' state) so a later flush/close can retry them
+                self._pending = rows + self._pending
+                for on_rollback in started:
+                    if on_rollback is not None:
+                        on_rollback()
+                raise
+            ms = (time.perf_counter() - start) * 1000
+
+            self.rows_written += len(rows)
+            self.flushes += 1
+            self.flush_ms.append(ms)
+            self.flush_ms_total += ms
+            self.flush_ms_max = max(self.flush_ms_max, ms)
+            if self.verbose:
+                print(f"[{self.table}] flushed {len(rows)} row(s) in {ms:.1f} ms")
+            return len(rows)
+
+    def close(self):
+        """
+        Flush what is left and close the connection. Safe to call more than once.
+        If the flush fails the error is raised and the writer stays open with its rows,
+        so close() (or the atexit hook) can retry them.
+        """
+        if self._closed:
+            return
+        self.flush()
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        atexit.unregister(self.close)
+
+    def report(self):
+        """One-line summary: rows written, number of flushes and flush timings."""
+        if not self.flushes:
+            return f"[{self.table}] wrote 0 rows"
+        total = self.flush_ms_total
+        return (f"[{self.table}] wrote {self.rows_written} row(s) in {self.flushes} flush(es), "
+                f"avg {total / self.flushes:.1f} ms, max {self.flush_ms_max:.1f} ms, total {total:.1f} ms")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -7,10 +7,12 @@ parser.add_argument("-r", "--raw", action="store_true",
                     help="print raw data instead of calculation result")
 parser.add_argument("-t", "--time", type=int, default=30,
                     help="duration in seconds to read from sensor, default 30")
+parser.add_argument("--int-pin", type=int, default=None,
+                    help="BCM GPIO wired to the sensor's INT pin: wait for its interrupt instead of polling")
 args = parser.parse_args()
 
 print('sensor starting...')
-hrm = HeartRateMonitor(print_raw=args.raw, print_result=(not args.raw))
+hrm = HeartRateMonitor(print_raw=args.raw, print_result=(not args.raw), int_pin=args.int_pin)
 hrm.start_sensor()
 try:
     time.sleep(args.time)
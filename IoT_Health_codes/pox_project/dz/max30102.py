@@ -3,6 +3,7 @@
 # this code is currently for python 2.7
 from __future__ import print_function
 from time import sleep
+import numpy as np
 import smbus
 
 # register addresses
@@ -34,14 +35,27 @@ REG_PROX_INT_THRESH = 0x30
 REG_REV_ID = 0xFE
 REG_PART_ID = 0xFF
 
+# FIFO depth in samples, bytes per sample (3 bytes each for Red and IR in SpO2 mode)
+FIFO_DEPTH = 32
+BYTES_PER_SAMPLE = 6
+# SMBus block reads/writes carry at most 32 bytes
+I2C_BLOCK_MAX = 32
+# with the setup() values: 100 sps (SPO2_CONFIG 0x27) averaged by 4 (FIFO_CONFIG 0x4f)
+SAMPLE_RATE = 25
+# A_FULL fires when 32 - FIFO_A_FULL[3:0] (0xf) samples are unread
+ALMOST_FULL = FIFO_DEPTH - 0x0f
+# OVF_COUNTER[4:0] stops counting here
+OVF_COUNTER_MAX = 0x1f
+
 
 class MAX30102():
     # by default, this assumes that the device is at 0x57 on channel 1
-    def __init__(self, channel=1, address=0x57):
+    # bus: an already open smbus-style handle (e.g. a shared, arbitrated one) instead of SMBus(channel)
+    def __init__(self, channel=1, address=0x57, bus=None):
         #print("Channel: {0}, address: {1}".format(channel, address))
         self.address = address
         self.channel = channel
-        self.bus = smbus.SMBus(self.channel)
+        self.bus = bus if bus is not None else smbus.SMBus(self.channel)
 
         self.reset()
 
@@ -106,16 +120,27 @@ class MAX30102():
         self.bus.write_i2c_block_data(self.address, reg, value)
 
     def get_data_present(self):
-        read_ptr = self.bus.read_byte_data(self.address, REG_FIFO_RD_PTR)
-        write_ptr = self.bus.read_byte_data(self.address, REG_FIFO_WR_PTR)
-        if read_ptr == write_ptr:
-            return 0
-        else:
-            num_samples = write_ptr - read_ptr
-            # account for pointer wrap around
-            if num_samples < 0:
-                num_samples += 32
-            return num_samples
+        return self.get_fifo_status()[0]
+
+    def get_fifo_status(self):
+        """
+        (unread samples, samples lost since the last read) from one block read of
+        FIFO_WR_PTR, OVF_COUNTER, FIFO_RD_PTR. OVF_COUNTER saturates at OVF_COUNTER_MAX.
+        """
+        write_ptr, ovf, read_ptr = self.bus.read_i2c_block_data(self.address, REG_FIFO_WR_PTR, 3)
+        # account for pointer wrap around
+        num_samples = (write_ptr - read_ptr) % FIFO_DEPTH
+        # equal pointers with lost samples means a full FIFO, not an empty one
+        if num_samples == 0 and ovf > 0:
+            num_samples = FIFO_DEPTH
+        return num_samples, ovf
+
+    def read_interrupt_status(self):
+        """
+        Read (and so clear) INTR_STATUS_1/2; this releases the INT pin.
+        Bit 7 of the first byte is A_FULL, bit 6 PPG_RDY.
+        """
+        return self.bus.read_i2c_block_data(self.address, REG_INTR_STATUS_1, 2)
 
     def read_fifo(self):
         """
@@ -137,22 +162,42 @@ class MAX30102():
 
         return red_led, ir_led
 
+    def read_fifo_burst(self, num_samples):
+        """
+        Read num_samples samples from the FIFO with block reads of FIFO_DATA
+        (the read pointer advances per sample, the register address does not),
+        as many samples per transaction as fit in an SMBus block.
+        Returns (red, ir) as numpy int32 arrays.
+        """
+        per_read = I2C_BLOCK_MAX // BYTES_PER_SAMPLE
+        raw = bytearray()
+        remaining = num_samples
+        while remaining > 0:
+            n = min(remaining, per_read)
+            raw += bytearray(self.bus.read_i2c_block_data(self.address, REG_FIFO_DATA, n * BYTES_PER_SAMPLE))
+            remaining -= n
+
+        d = np.frombuffer(bytes(raw), dtype=np.uint8).reshape(-1, BYTES_PER_SAMPLE).astype(np.int32)
+        # mask MSB [23:18]
+        red_led = (d[:, 0] << 16 | d[:, 1] << 8 | d[:, 2]) & 0x03FFFF
+        ir_led = (d[:, 3] << 16 | d[:, 4] << 8 | d[:, 5]) & 0x03FFFF
+
+        return red_led, ir_led
+
     def read_sequential(self, amount=100):
         """
         This function will read the red-led and ir-led `amount` times.
-        This works as blocking function.
+        This works as blocking function. Returns (red, ir) as numpy arrays.
         """
-        red_buf = []
-        ir_buf = []
+        red_bufs = []
+        ir_bufs = []
         count = amount
         while count > 0:
-            num_bytes = self.get_data_present()
-            while num_bytes > 0:
-                red, ir = self.read_fifo()
-
-                red_buf.append(red)
-                ir_buf.append(ir)
-                num_bytes -= 1
-                count -= 1
-
-        return red_buf, ir_buf
+            num_samples = min(self.get_data_present(), count)
+            if num_samples > 0:
+                red, ir = self.read_fifo_burst(num_samples)
+                red_bufs.append(red)
+                ir_bufs.append(ir)
+                count -= num_samples
+
+        return np.concatenate(red_bufs), np.concatenate(ir_bufs)
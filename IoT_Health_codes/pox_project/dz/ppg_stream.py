@@ -0,0 +1,177 @@
+# -*-coding:utf-8
+import queue
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+
+import numpy as np
+
+import hrcalc
+
+# one computed reading; timestamp is time.time(), monotonic is time.monotonic(),
+# samples is the total number of samples received when it was computed
+HRResult = namedtuple('HRResult', 'timestamp monotonic bpm valid_bpm spo2 valid_spo2 finger samples')
+
+# below this mean on both channels there is no finger on the sensor
+FINGER_THRESHOLD = 50000
+
+
+class PPGRingBuffer(object):
+    """
+    Fixed-size ring buffer for the IR and Red channels.
+    Every sample is stored twice (at i and i + size), so the newest `size` samples
+    are always one contiguous slice, oldest first, and window() never copies.
+    """
+
+    def __init__(self, size=hrcalc.BUFFER_SIZE):
+        self.size = size
+        self._ir = np.zeros(2 * size, dtype=np.int64)
+        self._red = np.zeros(2 * size, dtype=np.int64)
+        self._pos = 0
+        self._filled = 0
+        self.count = 0  # samples written in total
+
+    @property
+    def full(self):
+        return self._filled >= self.size
+
+    def clear(self):
+        """Start a new window; `count` keeps counting so results stay ordered."""
+        self._filled = 0
+
+    def extend(self, ir, red):
+        ir = np.asarray(ir, dtype=np.int64)
+        red = np.asarray(red, dtype=np.int64)
+        n = ir.shape[0]
+        # only the newest `size` samples can still be in the window
+        m = min(n, self.size)
+        idx = (self._pos + n - m + np.arange(m)) % self.size
+        for buf, data in ((self._ir, ir[n - m:]), (self._red, red[n - m:])):
+            buf[idx] = data
+            buf[idx + self.size] = data
+        self._pos = (self._pos + n) % self.size
+        self._filled = min(self._filled + n, self.size)
+        self.count += n
+
+    def window(self):
+        """(ir, red) views of the newest `size` samples; only valid until the next extend()."""
+        return (self._ir[self._pos:self._pos + self.size],
+                self._red[self._pos:self._pos + self.size])
+
+
+class HRStream(object):
+    """
+    Streaming HR/SpO2: samples go into a PPGRingBuffer and hrcalc runs on the newest
+    window once every `hop` samples (default SAMPLE_FREQ, i.e. once a second) instead
+    of after every FIFO drain. hop=1 gives the old behaviour of one result per drain.
+    BPM is smoothed over the last `smooth` valid readings, as before.
+
+    Every HRResult is published to the latest() slot, to subscribed callbacks (called
+    on the pushing thread) and to subscribed queues; wait() blocks until a new one.
+    """
+
+    def __init__(self, hop=hrcalc.SAMPLE_FREQ, window=hrcalc.BUFFER_SIZE, smooth=4):
+        self.hop = max(1, int(hop))
+        self.buffer = PPGRingBuffer(window)
+        self.bpm = 0
+        self._bpms = deque(maxlen=smooth)
+        self._pending = 0
+        self._latest = None
+        self._cond = threading.Condition()
+        self._subscribers = []
+
+    def reset(self):
+        """Forget the window, BPM history and latest result (a new measurement on the same stream)."""
+        self.buffer.clear()
+        self._bpms.clear()
+        self.bpm = 0
+        self._pending = 0
+        with self._cond:
+            self._latest = None
+
+    def push(self, ir, red):
+        """Add samples from one drain; returns the new HRResult if one was computed, else None."""
+        n = len(ir)
+        if n == 0:
+            return None
+        self.buffer.extend(ir, red)
+        self._pending += n
+        if not self.buffer.full or self._pending < self.hop:
+            return None
+        self._pending = 0
+
+        ir_data, red_data = self.buffer.window()
+        bpm, valid_bpm, spo2, valid_spo2 = hrcalc.calc_hr_and_spo2(ir_data, red_data)
+        finger = not (np.mean(ir_data) < FINGER_THRESHOLD and np.mean(red_data) < FINGER_THRESHOLD)
+        if valid_bpm:
+            self._bpms.append(bpm)
+            self.bpm = np.mean(self._bpms)
+            if not finger:
+                self.bpm = 0
+
+        result = HRResult(time.time(), time.monotonic(), self.bpm, valid_bpm, spo2, valid_spo2,
+                          finger, self.buffer.count)
+        self._publish(result)
+        return result
+
+    def _publish(self, result):
+        with self._cond:
+            self._latest = result
+            subscribers = list(self._subscribers)
+            self._cond.notify_all()
+        for callback in subscribers:
+            try:
+                callback(result)
+            except Exception:
+                # a broken consumer must not stop the sensor thread
+                traceback.print_exc()
+
+    def latest(self):
+        """Most recent HRResult (None until the first window is full); safe from any thread."""
+        with self._cond:
+            return self._latest
+
+    def wait(self, after=None, timeout=None):
+        """
+        Block until there is a result newer than `after` (an HRResult, or None for any
+        result) and return it; returns None on timeout.
+        """
+        newer = lambda: self._latest is not None and (after is None or self._latest.samples > after.samples)
+        with self._cond:
+            if not self._cond.wait_for(newer, timeout):
+                return None
+            return self._latest
+
+    def subscribe(self, callback):
+        """Call callback(result) for every new HRResult, on the thread that pushes samples."""
+        with self._cond:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._cond:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def subscribe_queue(self, maxsize=16):
+        """
+        A queue.Queue that receives every new HRResult. When the consumer falls behind
+        the oldest result is dropped, so the sensor thread never blocks on it.
+        """
+        q = queue.Queue(maxsize)
+
+        def put(result):
+            while True:
+                try:
+                    q.put_nowait(result)
+                    return
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+        q.unsubscribe = lambda: self.unsubscribe(put)
+        self.subscribe(put)
+        return q
@@ -1,9 +1,16 @@
 
-from max30102 import MAX30102
+from max30102 import MAX30102, SAMPLE_RATE, FIFO_DEPTH, ALMOST_FULL, OVF_COUNTER_MAX
 import hrcalc
+from ppg_stream import HRStream
 import threading
 import time
-import numpy as np
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:  # not on a Pi: interrupt mode then needs notify_interrupt() calls
+    GPIO = None
+
+ACQUISITION_MODES = ('interrupt', 'adaptive', 'poll')
 
 
 class HeartRateMonitor(object):
@@ -12,62 +19,189 @@ class HeartRateMonitor(object):
     """
 
     LOOP_TIME = 0.01
+    # adaptive polling never sleeps less than this
+    MIN_POLL_TIME = 0.02
 
-    def __init__(self, print_raw=False, print_result=False):
+    def __init__(self, print_raw=False, print_result=False, hop=hrcalc.SAMPLE_FREQ,
+                 mode=None, int_pin=None, bus=None):
+        """
+        mode picks how the thread waits for samples:
+          'interrupt': sleep until the INT pin (BCM int_pin, via RPi.GPIO) signals A_FULL,
+                       i.e. 17 unread samples; without GPIO, notify_interrupt() wakes it
+          'adaptive':  sleep until the FIFO should be almost full at the measured sample
+                       rate; aims lower after an overflow and creeps back up
+          'poll':      check the FIFO every LOOP_TIME (the original behaviour)
+        Default: 'interrupt' if int_pin is given and RPi.GPIO is available, else 'adaptive'.
+        Interrupt mode is opt-in: wire the sensor's INT pin to a GPIO and pass its BCM
+        number (main.py --int-pin, MAX30102_INT_PIN for the acquisition daemon).
+        bus: smbus-style handle for the sensor (e.g. a shared, arbitrated I2C bus);
+        default: the driver opens its own.
+        """
+        if mode is None:
+            mode = 'interrupt' if int_pin is not None and GPIO is not None else 'adaptive'
+        if mode not in ACQUISITION_MODES:
+            raise ValueError("mode must be one of {0}".format(", ".join(ACQUISITION_MODES)))
+        self.mode = mode
+        self.int_pin = int_pin
+        self._data_ready = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self._reset_stats()
         self.bpm = 0
         if print_raw is True:
             print('IR, Red')
         self.print_raw = print_raw
         self.print_result = print_result
+        # results are recomputed every `hop` samples (SAMPLE_FREQ = once a second)
+        self.stream = HRStream(hop=hop)
+        # kept between start_sensor() calls, so only the first one pays the reset + 1 s wait
+        self._sensor = None
+        self._bus = bus
+
+    def latest(self):
+        """Most recent HRResult with timestamps, or None before the first full window."""
+        return self.stream.latest()
+
+    def wait(self, after=None, timeout=None):
+        """Block until a result newer than `after` arrives (see HRStream.wait)."""
+        return self.stream.wait(after, timeout)
+
+    def subscribe(self, callback):
+        """callback(result) for every new HRResult, called on the sensor thread."""
+        return self.stream.subscribe(callback)
+
+    def unsubscribe(self, callback):
+        self.stream.unsubscribe(callback)
+
+    def subscribe_queue(self, maxsize=16):
+        """queue.Queue of new HRResults; drops the oldest when full (see HRStream.subscribe_queue)."""
+        return self.stream.subscribe_queue(maxsize)
+
+    def notify_interrupt(self, *args):
+        """The INT pin went low (A_FULL): wake the sensor thread. Also the GPIO callback."""
+        self._data_ready.set()
+
+    def _reset_stats(self):
+        with self._stats_lock:
+            self._stats = {"wakeups": 0, "empty_wakeups": 0, "drains": 0, "samples": 0,
+                           "overflows": 0, "dropped": 0, "saturated": 0}
+
+    def acquisition_stats(self):
+        """
+        Counters of the sensor thread since the last start_sensor(): wakeups
+        (empty_wakeups found no data), drains, samples read, overflows (drains that
+        found OVF_COUNTER > 0) and dropped samples (sum of OVF_COUNTER). The counter saturates at 31: `saturated` drains lost
+        at least that many, so `dropped` is then a lower bound.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["mode"] = self.mode
+        return stats
 
     def run_sensor(self):
-        sensor = MAX30102()
-        ir_data = []
-        red_data = []
-        bpms = []
-
-        # run until told to stop
-        while not self._thread.stopped:
-            # check if any data is available
-            num_bytes = sensor.get_data_present()
-            if num_bytes > 0:
-                # grab all the data and stash it into arrays
-                while num_bytes > 0:
-                    red, ir = sensor.read_fifo()
-                    num_bytes -= 1
-                    ir_data.append(ir)
-                    red_data.append(red)
-                    if self.print_raw:
-                        print("{0}, {1}".format(ir, red))
-
-                while len(ir_data) > 100:
-                    ir_data.pop(0)
-                    red_data.pop(0)
-
-                if len(ir_data) == 100:
-                    bpm, valid_bpm, spo2, valid_spo2 = hrcalc.calc_hr_and_spo2(ir_data, red_data)
-                    if valid_bpm:
-                        bpms.append(bpm)
-                        while len(bpms) > 4:
-                            bpms.pop(0)
-                        self.bpm = np.mean(bpms)
-                        if (np.mean(ir_data) < 50000 and np.mean(red_data) < 50000):
-                            self.bpm = 0
-                            if self.print_result:
-                                print("Finger not detected")
-                        if self.print_result:
-                            print("BPM: {0}, SpO2: {1}".format(self.bpm, spo2))
-
-            time.sleep(self.LOOP_TIME)
-
-        sensor.shutdown()
+        if self._sensor is None:
+            self._sensor = MAX30102(bus=self._bus)
+        else:
+            # wake from shutdown with empty FIFO pointers
+            self._sensor.setup()
+        sensor = self._sensor
+        use_gpio = self.mode == 'interrupt' and self.int_pin is not None and GPIO is not None
+        if use_gpio:
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.int_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(self.int_pin, GPIO.FALLING, callback=self.notify_interrupt)
+
+        # time for the FIFO to fill up to A_FULL at the nominal rate
+        fill_time = ALMOST_FULL / float(SAMPLE_RATE)
+        # interrupt mode without an edge (missed, or no GPIO): drain halfway between
+        # A_FULL and a full FIFO, before samples are overwritten
+        edge_timeout = fill_time + 0.5 * (FIFO_DEPTH - ALMOST_FULL) / float(SAMPLE_RATE)
+        rate = float(SAMPLE_RATE)
+        target = ALMOST_FULL
+        wait = fill_time
+        last_drain = time.monotonic()
+
+        try:
+            # run until told to stop
+            while not self._thread.stopped:
+                if self.mode == 'interrupt':
+                    # the timeout only covers a missed edge
+                    self._data_ready.wait(edge_timeout)
+                    self._data_ready.clear()
+                    # clear A_FULL so the pin can fire again
+                    sensor.read_interrupt_status()
+                elif self.mode == 'adaptive':
+                    self._data_ready.wait(wait)
+                else:
+                    self._data_ready.wait(self.LOOP_TIME)
+                if self._thread.stopped:
+                    break
+
+                num_samples, dropped = self._drain(sensor)
+
+                if self.mode == 'adaptive' and num_samples > 0:
+                    now = time.monotonic()
+                    # follow the sensor's actual rate, within 2x of the nominal one
+                    observed = (num_samples + dropped) / max(now - last_drain, 1e-3)
+                    rate = min(max(0.8 * rate + 0.2 * observed, SAMPLE_RATE / 2.0), SAMPLE_RATE * 2.0)
+                    last_drain = now
+                    if dropped:
+                        # woke up too late: aim for a lower fill level from now on
+                        target = max(1, target // 2)
+                    elif target < ALMOST_FULL:
+                        target += 1
+                    wait = max(self.MIN_POLL_TIME, target / rate)
+        finally:
+            if use_gpio:
+                GPIO.remove_event_detect(self.int_pin)
+            sensor.shutdown()
+
+    def _drain(self, sensor):
+        """Read everything in the FIFO; returns (samples read, samples lost since the last drain)."""
+        num_samples, dropped = sensor.get_fifo_status()
+        if num_samples > 0:
+            # grab all the data in block reads
+            red_data, ir_data = sensor.read_fifo_burst(num_samples)
+            self._process(red_data, ir_data)
+
+        with self._stats_lock:
+            stats = self._stats
+            stats["wakeups"] += 1
+            if num_samples > 0:
+                stats["drains"] += 1
+                stats["samples"] += num_samples
+            else:
+                stats["empty_wakeups"] += 1
+            if dropped:
+                stats["overflows"] += 1
+                stats["dropped"] += dropped
+                if dropped >= OVF_COUNTER_MAX:
+                    stats["saturated"] += 1
+        return num_samples, dropped
+
+    def _process(self, red_data, ir_data):
+        if self.print_raw:
+            for ir, red in zip(ir_data.tolist(), red_data.tolist()):
+                print("{0}, {1}".format(ir, red))
+
+        result = self.stream.push(ir_data, red_data)
+        if result is not None and result.valid_bpm:
+            self.bpm = result.bpm
+            if not result.finger and self.print_result:
+                print("Finger not detected")
+            if self.print_result:
+                print("BPM: {0}, SpO2: {1}".format(self.bpm, result.spo2))
 
     def start_sensor(self):
+        self._data_ready.clear()
+        self.stream.reset()
+        self._reset_stats()
         self._thread = threading.Thread(target=self.run_sensor)
         self._thread.stopped = False
         self._thread.start()
 
     def stop_sensor(self, timeout=2.0):
         self._thread.stopped = True
+        self._data_ready.set()
         self.bpm = 0
         self._thread.join(timeout)
@@ -10,6 +10,11 @@ MA_SIZE = 4
 # sampling frequency * 4 (in algorithm.h)
 BUFFER_SIZE = 100
 
+# Vectorized port of the loop version: the results (hr, hr_valid, spo2, spo2_valid)
+# are identical, including the quirks of the original C code (x[-1] as the left
+# neighbour of sample 0, first index on ties, 32-bit wrap of the ratio numerator).
+# benchmarks/bench_hrcalc.py checks this against the loop version and times both.
+
 
 # this assumes ir_data and red_data as np.array
 def calc_hr_and_spo2(ir_data, red_data):
@@ -17,17 +22,21 @@ def calc_hr_and_spo2(ir_data, red_data):
     By detecting  peaks of PPG cycle and corresponding AC/DC
     of red/infra-red signal, the an_ratio for the SPO2 is computed.
     """
+    ir = np.asarray(ir_data)
+    red = np.asarray(red_data)
+
     # get dc mean
-    ir_mean = int(np.mean(ir_data))
+    ir_mean = int(np.mean(ir))
 
     # remove DC mean and inver signal
     # this lets peak detecter detect valley
-    x = -1 * (np.array(ir_data) - ir_mean)
+    x = -1 * (np.array(ir) - ir_mean)
 
-    # 4 point moving average
+    # 4 point moving average; the last MA_SIZE samples stay as they are
     # x is np.array with int values, so automatically casted to int
-    for i in range(x.shape[0] - MA_SIZE):
-        x[i] = np.sum(x[i:i+MA_SIZE]) / MA_SIZE
+    n = x.shape[0] - MA_SIZE
+    if n > 0:
+        x[:n] = np.convolve(x, np.ones(MA_SIZE, dtype=x.dtype), 'valid')[:n] / MA_SIZE
 
     # calculate threshold
     n_th = int(np.mean(x))
@@ -36,11 +45,9 @@ def calc_hr_and_spo2(ir_data, red_data):
 
     ir_valley_locs, n_peaks = find_peaks(x, BUFFER_SIZE, n_th, 4, 15)
     # print(ir_valley_locs[:n_peaks], ",", end="")
-    peak_interval_sum = 0
     if n_peaks >= 2:
-        for i in range(1, n_peaks):
-            peak_interval_sum += (ir_valley_locs[i] - ir_valley_locs[i-1])
-        peak_interval_sum = int(peak_interval_sum / (n_peaks - 1))
+        # the sum of consecutive intervals is last - first
+        peak_interval_sum = int((ir_valley_locs[n_peaks-1] - ir_valley_locs[0]) / (n_peaks - 1))
         hr = int(SAMPLE_FREQ * 60 / peak_interval_sum)
         hr_valid = True
     else:
@@ -52,51 +59,16 @@ def calc_hr_and_spo2(ir_data, red_data):
     # find precise min near ir_valley_locs (???)
     exact_ir_valley_locs_count = n_peaks
 
-    # find ir-red DC and ir-red AC for SPO2 calibration ratio
-    # find AC/DC maximum of raw
-
     # FIXME: needed??
-    for i in range(exact_ir_valley_locs_count):
-        if ir_valley_locs[i] > BUFFER_SIZE:
-            spo2 = -999  # do not use SPO2 since valley loc is out of range
-            spo2_valid = False
-            return hr, hr_valid, spo2, spo2_valid
-
-    i_ratio_count = 0
-    ratio = []
+    if any(loc > BUFFER_SIZE for loc in ir_valley_locs[:exact_ir_valley_locs_count]):
+        spo2 = -999  # do not use SPO2 since valley loc is out of range
+        spo2_valid = False
+        return hr, hr_valid, spo2, spo2_valid
 
     # find max between two valley locations
     # and use ratio between AC component of Ir and Red DC component of Ir and Red for SpO2
-    red_dc_max_index = -1
-    ir_dc_max_index = -1
-    for k in range(exact_ir_valley_locs_count-1):
-        red_dc_max = -16777216
-        ir_dc_max = -16777216
-        if ir_valley_locs[k+1] - ir_valley_locs[k] > 3:
-            for i in range(ir_valley_locs[k], ir_valley_locs[k+1]):
-                if ir_data[i] > ir_dc_max:
-                    ir_dc_max = ir_data[i]
-                    ir_dc_max_index = i
-                if red_data[i] > red_dc_max:
-                    red_dc_max = red_data[i]
-                    red_dc_max_index = i
-
-            red_ac = int((red_data[ir_valley_locs[k+1]] - red_data[ir_valley_locs[k]]) * (red_dc_max_index - ir_valley_locs[k]))
-            red_ac = red_data[ir_valley_locs[k]] + int(red_ac / (ir_valley_locs[k+1] - ir_valley_locs[k]))
-            red_ac = red_data[red_dc_max_index] - red_ac  # subtract linear DC components from raw
-
-            ir_ac = int((ir_data[ir_valley_locs[k+1]] - ir_data[ir_valley_locs[k]]) * (ir_dc_max_index - ir_valley_locs[k]))
-            ir_ac = ir_data[ir_valley_locs[k]] + int(ir_ac / (ir_valley_locs[k+1] - ir_valley_locs[k]))
-            ir_ac = ir_data[ir_dc_max_index] - ir_ac  # subtract linear DC components from raw
-
-            nume = red_ac * ir_dc_max
-            denom = ir_ac * red_dc_max
-            if (denom > 0 and i_ratio_count < 5) and nume != 0:
-                # original cpp implementation uses overflow intentionally.
-                # but at 64-bit OS, Pyhthon 3.X uses 64-bit int and nume*100/denom does not trigger overflow
-                # so using bit operation ( &0xffffffff ) is needed
-                ratio.append(int(((nume * 100) & 0xffffffff) / denom))
-                i_ratio_count += 1
+    ratio = segment_ratios(ir, red, ir_valley_locs[:exact_ir_valley_locs_count])[:5]
+    i_ratio_count = len(ratio)
 
     # choose median value since PPG signal may vary from beat to beat
     ratio = sorted(ratio)  # sort to ascending order
@@ -122,6 +94,52 @@ def calc_hr_and_spo2(ir_data, red_data):
     return hr, hr_valid, spo2, spo2_valid
 
 
+def segment_ratios(ir, red, valley_locs):
+    """
+    Red/IR AC-DC ratio (x100) of every valley-to-valley segment longer than 3 samples,
+    in order; segments where the ratio is undefined are left out.
+    Assumes raw sample values above -16777216 (the loop version's initial maximum),
+    which holds for the sensor's 18-bit counts.
+    """
+    locs = np.asarray(valley_locs, dtype=np.int64)
+    if locs.size < 2:
+        return []
+    start, end = locs[:-1], locs[1:]
+    length = end - start
+    lo, hi = int(locs[0]), int(locs[-1])
+    offsets = start - lo
+
+    # segment maxima of raw ir/red over [start, end), and the first index reaching them
+    ir_seg, red_seg = ir[lo:hi], red[lo:hi]
+    seg_id = np.repeat(np.arange(start.size), length)
+    pos = np.arange(lo, hi)
+    ir_dc_max = np.maximum.reduceat(ir_seg, offsets)
+    red_dc_max = np.maximum.reduceat(red_seg, offsets)
+    no_hit = np.iinfo(np.int64).max
+    ir_dc_max_index = np.minimum.reduceat(np.where(ir_seg == ir_dc_max[seg_id], pos, no_hit), offsets)
+    red_dc_max_index = np.minimum.reduceat(np.where(red_seg == red_dc_max[seg_id], pos, no_hit), offsets)
+
+    keep = length > 3
+    start, end, length = start[keep], end[keep], length[keep]
+    ir_dc_max, red_dc_max = ir_dc_max[keep].astype(np.int64), red_dc_max[keep].astype(np.int64)
+    ir_dc_max_index, red_dc_max_index = ir_dc_max_index[keep], red_dc_max_index[keep]
+
+    def ac(sig, dc_max_index):
+        # subtract the linear DC component (valley-to-valley line) from the raw maximum
+        sig = sig.astype(np.int64)
+        slope = (sig[end] - sig[start]) * (dc_max_index - start)
+        line = sig[start] + np.trunc(slope / length).astype(np.int64)
+        return sig[dc_max_index] - line
+
+    nume = ac(red, red_dc_max_index) * ir_dc_max
+    denom = ac(ir, ir_dc_max_index) * red_dc_max
+    ok = (denom > 0) & (nume != 0)
+    # original cpp implementation uses overflow intentionally.
+    # but at 64-bit OS, Pyhthon 3.X uses 64-bit int and nume*100/denom does not trigger overflow
+    # so using bit operation ( &0xffffffff ) is needed
+    return np.trunc(((nume[ok] * 100) & 0xffffffff) / denom[ok]).astype(np.int64).tolist()
+
+
 def find_peaks(x, size, min_height, min_dist, max_num):
     """
     Find at most MAX_NUM peaks above MIN_HEIGHT separated by at least MIN_DISTANCE
@@ -137,59 +155,44 @@ def find_peaks(x, size, min_height, min_dist, max_num):
 def find_peaks_above_min_height(x, size, min_height, max_num):
     """
     Find all peaks above MIN_HEIGHT
+
+    A peak starts at i with x[i] > min_height and x[i] > x[i-1] (x[-1] for i = 0, as in
+    the original scan), may stay flat, and must then drop: x[i] > x[j] where j is the
+    first index after i with a different value (capped at size - 1).
     """
+    x = np.asarray(x)
+    last = size - 1
+    if last <= 0:
+        return [], 0
+    i = np.arange(last)
+    rising = (x[:last] > min_height) & (x[:last] > x[i - 1])
 
-    i = 0
-    n_peaks = 0
-    ir_valley_locs = []  # [0 for i in range(max_num)]
-    while i < size - 1:
-        if x[i] > min_height and x[i] > x[i-1]:  # find the left edge of potential peaks
-            n_width = 1
-            # original condition i+n_width < size may cause IndexError
-            # so I changed the condition to i+n_width < size - 1
-            while i + n_width < size - 1 and x[i] == x[i+n_width]:  # find flat peaks
-                n_width += 1
-            if x[i] > x[i+n_width] and n_peaks < max_num:  # find the right edge of peaks
-                # ir_valley_locs[n_peaks] = i
-                ir_valley_locs.append(i)
-                n_peaks += 1  # original uses post increment
-                i += n_width + 1
-            else:
-                i += n_width
-        else:
-            i += 1
+    # first index after i whose value differs from x[i]
+    changes = np.flatnonzero(x[1:size] != x[:last]) + 1
+    pos = np.searchsorted(changes, i, side='right')
+    right = np.minimum(np.append(changes, last)[pos], last)
 
-    return ir_valley_locs, n_peaks
+    ir_valley_locs = np.flatnonzero(rising & (x[:last] > x[right]))[:max_num].tolist()
+    return ir_valley_locs, len(ir_valley_locs)
 
 
 def remove_close_peaks(n_peaks, ir_valley_locs, x, min_dist):
     """
     Remove peaks separated by less than MIN_DISTANCE
-    """
 
-    # should be equal to maxim_sort_indices_descend
-    # order peaks from large to small
-    # should ignore index:0
-    sorted_indices = sorted(ir_valley_locs, key=lambda i: x[i])
-    sorted_indices.reverse()
-
-    # this "for" loop expression does not check finish condition
-    # for i in range(-1, n_peaks):
-    i = -1
-    while i < n_peaks:
-        old_n_peaks = n_peaks
-        n_peaks = i + 1
-        # this "for" loop expression does not check finish condition
-        # for j in (i + 1, old_n_peaks):
-        j = i + 1
-        while j < old_n_peaks:
-            n_dist = (sorted_indices[j] - sorted_indices[i]) if i != -1 else (sorted_indices[j] + 1)  # lag-zero peak of autocorr is at index -1
-            if n_dist > min_dist or n_dist < -1 * min_dist:
-                sorted_indices[n_peaks] = sorted_indices[j]
-                n_peaks += 1  # original uses post increment
-            j += 1
-        i += 1
-
-    sorted_indices[:n_peaks] = sorted(sorted_indices[:n_peaks])
-
-    return sorted_indices, n_peaks
+    Peaks are visited from highest to lowest (later peak first on ties); each one still
+    kept drops the remaining peaks within min_dist of it. Peaks closer than min_dist to
+    the start of the buffer are dropped too.
+    """
+    locs = np.asarray(ir_valley_locs[:n_peaks], dtype=np.int64)
+    # sorted() is stable, so reversing an ascending sort puts later peaks first on ties
+    locs = locs[np.argsort(np.asarray(x)[locs], kind='stable')[::-1]]
+
+    keep = locs + 1 > min_dist  # lag-zero peak of autocorr is at index -1
+    dist = np.abs(locs[:, None] - locs[None, :]) > min_dist
+    for i in range(locs.size):
+        if keep[i]:
+            keep[i + 1:] &= dist[i, i + 1:]
+
+    kept = np.sort(locs[keep]).tolist()
+    return kept, len(kept)
@@ -5,13 +5,14 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from utils.encryption_utils import encrypt_field
+from health_database.enc_keys import encrypt, decrypt, current_key_id, stored_key_id, ensure_key_id_columns
+from health_database.sample_writer import SampleWriter, now_timestamp
+from health_database.rollups import RollupAccumulator, ensure_rollups_table
 import time
 import numpy as np
 from max30102 import MAX30102
 from scipy.signal import butter, lfilter
 from collections import deque
-import sqlite3
 
 # ---------- SENSOR SETUP ----------
 Fs = 100  # Sampling rate (Hz, based on MAX30102 default)
@@ -68,19 +69,26 @@ def calculate_spo2(red_data, ir_data, window_size=20):
 # ---------- DATABASE SETUP ----------
 DB_PATH = "/home/anna/health_database/health_data.db"
 
+# Οι μετρήσεις γράφονται σε παρτίδες (ένα commit ανά flush)
+writer = SampleWriter(DB_PATH, 'spo2_data', ('timestamp', 'enc_spo2', 'key_id'), max_rows=10, max_delay_ms=5000)
+
+# Κλειδί κρυπτογράφησης για τις νέες μετρήσεις (DB_ENC_KEY_ID, βλ. enc_keys)
+ensure_key_id_columns(DB_PATH, ('spo2_data',))
+KEY_ID = current_key_id()
+
+# min/max/avg ανά λεπτό/ώρα/ημέρα, ενημερώνονται στο ίδιο transaction με τις μετρήσεις
+ensure_rollups_table(DB_PATH)
+rollup = RollupAccumulator('spo2', encrypt, decrypt, KEY_ID)
+writer.add_flush_hook(rollup.flush, rollup.rollback)
+
 def save_spo2(spo2):
     """Αποθηκεύει το SpO2 στον πίνακα spo2_data."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
         # Κρυπτογράφηση SpO₂
-        blob = encrypt_field(str(spo2).encode())
-        cursor.execute(
-            "INSERT INTO spo2_data (timestamp, enc_spo2) VALUES (datetime('now'), ?)",
-            (blob,),
-        )
-        conn.commit()
-        conn.close()
+        blob = encrypt(str(spo2).encode(), KEY_ID)
+        ts = now_timestamp(utc=True)
+        rollup.add(ts, spo2)
+        writer.add((ts, blob, stored_key_id(KEY_ID)))
     except Exception as e:
         print(f"Σφάλμα αποθήκευσης SpO2: {e}")
 
@@ -121,4 +129,6 @@ try:
 except KeyboardInterrupt:
     print("\nStopped by user.")
 finally:
+    writer.close()
+    print(writer.report())
     sensor.shutdown()
\ No newline at end of file
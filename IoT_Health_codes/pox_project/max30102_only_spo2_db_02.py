@@ -3,12 +3,9 @@
 
 import os
 import sys
-import re
 import time
 import math
-import threading
 import argparse
-import sqlite3
 
 # ---------- PATH / IMPORTS ----------
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -16,12 +13,26 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 # Χρησιμοποιούμε την ίδια κρυπτογράφηση & DB όπως στο max30102_only_spo2_db.py
-from utils.encryption_utils import encrypt_field  # same as original
-from heartrate_monitor import HeartRateMonitor    # measurement like main_03.py
+from health_database.enc_keys import encrypt, decrypt, current_key_id, stored_key_id, ensure_key_id_columns
+from health_database.sample_writer import SampleWriter, now_timestamp
+from health_database.rollups import RollupAccumulator, ensure_rollups_table
+from heartrate_monitor import HeartRateMonitor    # measurement like main_03.py (HRResult records)
 
 # ---------- DATABASE ----------
 DB_PATH = "/home/anna/health_database/health_data.db"
 
+# Οι μετρήσεις γράφονται σε παρτίδες (ένα commit ανά flush)
+writer = SampleWriter(DB_PATH, 'spo2_data', ('timestamp', 'enc_spo2', 'key_id'), max_rows=10, max_delay_ms=5000)
+
+# Κλειδί κρυπτογράφησης για τις νέες μετρήσεις (DB_ENC_KEY_ID, βλ. enc_keys)
+ensure_key_id_columns(DB_PATH, ('spo2_data',))
+KEY_ID = current_key_id()
+
+# min/max/avg ανά λεπτό/ώρα/ημέρα, ενημερώνονται στο ίδιο transaction με τις μετρήσεις
+ensure_rollups_table(DB_PATH)
+rollup = RollupAccumulator('spo2', encrypt, decrypt, KEY_ID)
+writer.add_flush_hook(rollup.flush, rollup.rollback)
+
 def save_spo2(spo2_int: int):
     """
     Αποθηκεύει ΜΟΝΟ λογικές μετρήσεις SpO2 (1..100) στον πίνακα spo2_data,
@@ -30,76 +41,13 @@ def save_spo2(spo2_int: int):
     if not (1 <= spo2_int <= 100):
         return
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        blob = encrypt_field(str(spo2_int).encode())
-        cur.execute(
-            "INSERT INTO spo2_data (timestamp, enc_spo2) VALUES (datetime('now','localtime'), ?)",
-            (blob,),
-        )
-        conn.commit()
-        conn.close()
+        blob = encrypt(str(spo2_int).encode(), KEY_ID)
+        ts = now_timestamp()
+        rollup.add(ts, spo2_int)
+        writer.add((ts, blob, stored_key_id(KEY_ID)))
     except Exception as e:
         print(f"Σφάλμα αποθήκευσης SpO2: {e}")
 
-# ---------- STDOUT PROXY (όπως στο main_03 measurement) ----------
-class _StdoutProxy:
-    """
-    Παγιδεύει γραμμές τύπου: 'BPM: 71.0, SpO2: 99.52'
-    και μηνύματα 'no finger' από το thread του HeartRateMonitor.
-    Κρατά τις τελευταίες τιμές και δεν τις ξανατυπώνει (για να τυπώνουμε 1Hz).
-    """
-    LINE_RE = re.compile(r"\bBPM:\s*([0-9.]+)\s*,\s*SpO2:\s*([0-9.\-NaN]+)", re.IGNORECASE)
-    NO_FINGER_RE = re.compile(r"no\s*finger", re.IGNORECASE)
-
-    def __init__(self, real_out):
-        self.real_out = real_out
-        self.buf = ""
-        self.lock = threading.Lock()
-        self.last_bpm = None
-        self.last_spo2 = None
-        self.no_finger = False
-
-    def write(self, s):
-        self.buf += s
-        while "\n" in self.buf:
-            line, self.buf = self.buf.split("\n", 1)
-            self._handle_line(line)
-
-    def flush(self):
-        pass
-
-    def _handle_line(self, line):
-        if self.NO_FINGER_RE.search(line):
-            with self.lock:
-                self.no_finger = True
-
-        m = self.LINE_RE.search(line)
-        if m:
-            try:
-                bpm = float(m.group(1))
-            except Exception:
-                bpm = None
-            try:
-                spo2 = float(m.group(2))
-            except Exception:
-                spo2 = None
-            with self.lock:
-                self.last_bpm = bpm
-                self.last_spo2 = spo2
-                if bpm is not None or spo2 is not None:
-                    self.no_finger = False
-            # καταπίνουμε τη γραμμή (δεν την τυπώνουμε)
-            return
-
-        # οτιδήποτε άλλο μήνυμα επιτρέπεται να περάσει
-        if line.strip() and not self.LINE_RE.search(line):
-            print(line, file=self.real_out, flush=True)
-
-    def snapshot(self):
-        with self.lock:
-            return self.last_bpm, self.last_spo2, self.no_finger
-
 # ---------- HELPERS ----------
 def _to_int_or_zero(val, lo, hi):
     try:
@@ -115,6 +63,53 @@ def _to_int_or_zero(val, lo, hi):
     except Exception:
         return 0
 
+# ---------- MEASUREMENT ----------
+def measure(duration=20, hrm=None, on_reading=None, should_stop=None):
+    """
+    Μετρά SpO2 για `duration` s και αποθηκεύει τις λογικές τιμές· επιστρέφει πόσες αποθηκεύτηκαν.
+    hrm: ένας HeartRateMonitor που κρατιέται ανάμεσα σε μετρήσεις (χωρίς νέο reset του
+    αισθητήρα)· αν λείπει φτιάχνεται ένας για αυτή τη μέτρηση. on_reading(spo2_i, saved)
+    καλείται μία φορά το δευτερόλεπτο, should_stop() τερματίζει νωρίτερα.
+    """
+    if hrm is None:
+        # οι τιμές έρχονται ως HRResult (ένα ανά δευτερόλεπτο), χωρίς prints
+        hrm = HeartRateMonitor(print_raw=False, print_result=False)
+    hrm.start_sensor()
+
+    t_end = time.monotonic() + duration
+    last = None
+    saved = 0
+
+    try:
+        while True:
+            remaining = t_end - time.monotonic()
+            if remaining <= 0 or (should_stop is not None and should_stop()):
+                break
+            # Περιμένουμε νέο αποτέλεσμα (όχι polling)· timeout 1s ώστε να τυπώνουμε 1Hz
+            result = hrm.wait(after=last, timeout=min(1.0, remaining))
+
+            # BPM δεν αποθηκεύεται εδώ – μόνο SpO2.
+            # Κανόνας SpO2 όπως στο main_03: 0 όταν no finger ή άκυρη μέτρηση, αλλιώς στρογγυλοποίηση και clamp 0..100.
+            spo2_i = 0
+            if result is not None:
+                last = result
+                if result.finger and result.valid_spo2:
+                    spo2_i = _to_int_or_zero(result.spo2, lo=0, hi=100)
+
+            # Αποθήκευση ΜΟΝΟ λογικών (1..100) και μόνο για νέα αποτελέσματα
+            if 1 <= spo2_i <= 100:
+                save_spo2(spo2_i)
+                saved += 1
+
+            # Προαιρετικό ενημερωτικό (1Hz) για τον χρήστη
+            print(f"SpO2 snapshot: {spo2_i} (saved: {saved})", flush=True)
+            if on_reading is not None:
+                on_reading(spo2_i, saved)
+    finally:
+        hrm.stop_sensor()
+        writer.flush()
+    return saved
+
 # ---------- MAIN ----------
 def main():
     parser = argparse.ArgumentParser(description="MAX30102 SpO2 -> encrypted SQLite (20 samples default)")
@@ -122,54 +117,19 @@ def main():
                         help="duration in seconds to read from sensor, default 20")
     args = parser.parse_args()
 
-    # Εγκατάσταση proxy stdout ώστε να πάρουμε τις τιμές από το HeartRateMonitor σαν στο main_03.py
-    real_stdout = sys.stdout
-    proxy = _StdoutProxy(real_stdout)
-    sys.stdout = proxy
-
     print("Reading SpO2 (1Hz) and storing valid values to DB... (stops after default 20s)")
     print("Place the sensor on your finger and keep steady.")
 
-    # Εκκίνηση HeartRateMonitor με print_result=True (όπως στο main_03)
-    hrm = HeartRateMonitor(print_raw=False, print_result=True)
-    hrm.start_sensor()
-
-    t_end = time.time() + args.time
-    last_tick = 0.0
-    saved = 0
-
+    # το πλήθος κρατιέται και όταν η μέτρηση διακοπεί με Ctrl+C
+    progress = {"saved": 0}
     try:
-        while time.time() < t_end:
-            now = time.time()
-            if now - last_tick >= 1.0:
-                bpm_f, spo2_f, no_finger = proxy.snapshot()
-
-                # BPM δεν αποθηκεύεται εδώ – μόνο SpO2.
-                # Κανόνας SpO2 όπως στο main_03: 0 όταν no finger, αλλιώς στρογγυλοποίηση και clamp 0..100.
-                if no_finger:
-                    spo2_i = 0
-                else:
-                    spo2_i = _to_int_or_zero(spo2_f, lo=0, hi=100)
-
-                # Αποθήκευση ΜΟΝΟ λογικών (1..100), όπως ζητήθηκε
-                if 1 <= spo2_i <= 100:
-                    save_spo2(spo2_i)
-                    saved += 1
-
-                # Προαιρετικό ενημερωτικό (1Hz) για τον χρήστη
-                print(f"SpO2 snapshot: {spo2_i} (saved: {saved})", file=real_stdout, flush=True)
-
-                last_tick = now
-
-            time.sleep(0.01)
-
+        measure(args.time, on_reading=lambda spo2_i, saved: progress.update(saved=saved))
     except KeyboardInterrupt:
-        print("\nStopped by user.", file=real_stdout, flush=True)
+        print("\nStopped by user.", flush=True)
     finally:
-        # Επαναφορά stdout για να φανούν τα τελικά μηνύματα
-        sys.stdout = real_stdout
-        hrm.stop_sensor()
-        print(f"Done. Stored {saved} valid SpO2 value(s) to DB.", flush=True)
+        writer.close()
+        print(writer.report())
+        print(f"Done. Stored {progress['saved']} valid SpO2 value(s) to DB.", flush=True)
 
 if __name__ == "__main__":
     main()
@@ -5,10 +5,11 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from utils.encryption_utils import encrypt_field
+from health_database.enc_keys import encrypt, decrypt, current_key_id, stored_key_id, ensure_key_id_columns
+from health_database.sample_writer import SampleWriter, now_timestamp
+from health_database.rollups import RollupAccumulator, ensure_rollups_table
 import smbus2
 import time
-import sqlite3
 
 
 # I2C ρυθμίσεις
@@ -19,6 +20,18 @@ TEMP_REG = 0x05  # Καταχωρητής θερμοκρασίας
 # Database settings
 DB_PATH = "/home/anna/health_database/health_data.db"
 
+# Οι μετρήσεις γράφονται σε παρτίδες (ένα commit ανά flush)
+writer = SampleWriter(DB_PATH, 'temp_data', ('timestamp', 'enc_temp', 'key_id'), max_rows=10, max_delay_ms=5000)
+
+# Κλειδί κρυπτογράφησης για τις νέες μετρήσεις (DB_ENC_KEY_ID, βλ. enc_keys)
+ensure_key_id_columns(DB_PATH, ('temp_data',))
+KEY_ID = current_key_id()
+
+# min/max/avg ανά λεπτό/ώρα/ημέρα, ενημερώνονται στο ίδιο transaction με τις μετρήσεις
+ensure_rollups_table(DB_PATH)
+rollup = RollupAccumulator('temp', encrypt, decrypt, KEY_ID)
+writer.add_flush_hook(rollup.flush, rollup.rollback)
+
 # Αρχικοποίηση I2C διαύλου
 bus = smbus2.SMBus(I2C_BUS)
 
@@ -47,49 +60,57 @@ def read_temperature():
 def save_temperature(temp):
     """Αποθηκεύει τη θερμοκρασία στον πίνακα temp_data."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
         # Κρυπτογράφηση της θερμοκρασίας
         plaintext = str(temp).encode()
-        
+
         # set_badge("{plaintext:1F°C")
-              
-        blob      = encrypt_field(plaintext)
-        cursor.execute(
-           "INSERT INTO temp_data (timestamp, enc_temp) VALUES (datetime('now','localtime'), ?)",
-            (blob,),
-        )
-         
-        conn.commit()
-        conn.close()
+
+        blob      = encrypt(plaintext, KEY_ID)
+        ts = now_timestamp()
+        rollup.add(ts, temp)
+        writer.add((ts, blob, stored_key_id(KEY_ID)))
     except Exception as e:
         print(f"Σφάλμα αποθήκευσης θερμοκρασίας: {e}")
 
+def measure(count=20, interval=1.0, on_reading=None, should_stop=None):
+    """
+    Παίρνει `count` μετρήσεις ανά `interval` s και τις αποθηκεύει· επιστρέφει πόσες αποθηκεύτηκαν.
+    on_reading(i, temp) καλείται μετά από κάθε μέτρηση (temp None σε αποτυχία)· όταν
+    should_stop() επιστρέψει True η μέτρηση σταματά νωρίτερα. Ο δίαυλος και ο writer
+    μένουν ανοιχτοί (τους κλείνει η main ή η υπηρεσία acquisition στο τέλος).
+    """
+    configure_mcp9808()
+    saved = 0
+    for i in range(count):
+        if should_stop is not None and should_stop():
+            break
+        temp = read_temperature()
+        if temp is not None:
+            print(f"Θερμοκρασία: {temp:.2f} °C")
+            save_temperature(temp)
+            saved += 1
+        else:
+            print("Αποτυχία ανάγνωσης θερμοκρασίας")
+        if on_reading is not None:
+            on_reading(i + 1, temp)
+
+        if i + 1 < count:
+            time.sleep(interval)
+    writer.flush()
+    return saved
+
 def main():
     """Κύρια συνάρτηση για ανάγνωση θερμοκρασίας και τερματισμό μετά από 20 δείγματα."""
-    configure_mcp9808()
     print("Ανάγνωση θερμοκρασίας από MCP9808 και αποθήκευση στη βάση...")
 
-    count = 0
     try:
-        while True:
-            temp = read_temperature()
-            if temp is not None:
-                print(f"Θερμοκρασία: {temp:.2f} °C")
-                save_temperature(temp)
-            else:
-                print("Αποτυχία ανάγνωσης θερμοκρασίας")
-
-            count += 1
-            if count >= 20:
-                print("Έγιναν 20 μετρήσεις — τερματισμός.")
-                break
-
-            time.sleep(1)
-
+        measure(count=20, interval=1.0)
+        print("Έγιναν 20 μετρήσεις — τερματισμός.")
     except KeyboardInterrupt:
         print("\nΠρόγραμμα τερματίστηκε από τον χρήστη")
     finally:
+        writer.close()
+        print(writer.report())
         bus.close()
 
 if __name__ == "__main__":